@@ -0,0 +1,299 @@
+"""Adaptive concurrency limits per route class, shedding what is over them.
+
+Without this, every request competes for the same threads, CPU and database
+under overload, so cheap catalog reads queue behind grade uploads and password
+hashing until everything times out. `classify_rest` / `classify_grpc` put each
+route or RPC in a class:
+
+- `auth`: logins and user creation (a password hash each);
+- `bulk`: grade uploads;
+- `export`: exports and the streamed gRPC grade list;
+- `write`: other changes (POST/PUT/PATCH/DELETE);
+- `read`: everything else.
+
+An admitted request keeps its slot until its response body starts
+streaming: the work the limit protects is done by then, and what follows runs
+at the client's pace. Exports are the exception. They keep their slot until
+the download ends, because bounding concurrent downloads is the point of their
+class. They have that class to themselves, so slow downloads use up only
+`export` slots and never the slots grade uploads need.
+
+The classes only protect each other if the threads behind them are not the
+bottleneck. `size_threadpool` (called at startup) grows AnyIO's thread limiter,
+which runs the sync endpoints, by the sum of the class maxima. A burst in one
+class then cannot take the threads that another class's admitted requests
+need.
+
+Event streams (SSE and the gRPC watches), admin diagnostics and `/metrics`
+are not limited: streams stay open by design, and diagnostics are most needed
+under overload.
+
+Each class has an `AdaptiveLimit` on requests in flight, adjusted AIMD style
+from the latency of the requests it admits (time to the first response
+byte): one slower than the class target (`ADMISSION_TARGET_MS`) cuts the
+limit by 10%, at most once per target interval; one within it, while the class
+is at least half busy, raises it by 1/limit (about +1 per limit's worth of
+requests). The limit stays between 1 and `ADMISSION_MAX_CONCURRENCY`, where
+it starts. A request over its class limit is refused at once: 503 with
+`Retry-After` on REST, RESOURCE_EXHAUSTED on gRPC.
+
+Limits are per worker process, like the thread pools they protect.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+import anyio.to_thread
+import grpc
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from . import config, metrics
+from .grpc_interceptors import wrap_rpc_handler
+
+CLASSES = ("auth", "read", "write", "bulk", "export")
+
+DECISIONS = metrics.counter("admission_requests_total", "Admission decisions (admitted/shed) by route class.",
+                            ("class", "decision"))
+IN_FLIGHT = metrics.gauge("admission_in_flight", "Admitted requests in flight by route class.", ("class",))
+LIMIT = metrics.gauge("admission_limit", "Current adaptive concurrency limit by route class.", ("class",))
+DECREASES = metrics.counter("admission_limit_decreases_total",
+                            "Limit cuts after a response slower than the class target.", ("class",))
+
+# Routes that do not follow the method-based default; None means not limited.
+_REST_ROUTES = {
+    "POST /api/users/": "auth",
+    "POST /api/faculty/courses/{course_id}/grades": "bulk",
+    "GET /api/student/me/grades/events": None,
+}
+_REST_PREFIXES = (("/api/auth/", "auth"), ("/api/exports/", "export"), ("/api/admin/", None), ("/metrics", None))
+_GRPC_METHODS = {
+    "/userservice.UserService/AuthenticateUser": "auth",
+    "/userservice.UserService/CreateUser": "auth",
+    "/gradeservice.GradeService/UploadGrades": "bulk",
+    "/gradeservice.GradeService/StreamStudentGrades": "export",
+    "/gradeservice.GradeService/WatchGrades": None,
+    "/courseservice.CourseService/WatchCourseChanges": None,
+    "/adminservice.AdminService/CaptureProfile": None,
+}
+_WRITE_PREFIXES = ("Create", "Update", "Delete", "Upload")
+# Classes whose streamed responses hold their slot until the stream ends.
+_HELD_WHILE_STREAMING = ("export",)
+
+
+def _compile(routes: dict) -> list:
+    compiled = []
+    for route, cls in routes.items():
+        method, _, path = route.partition(" ")
+        compiled.append((method, compile_path(path)[0], cls))
+    return compiled
+
+
+_rest_routes = _compile(_REST_ROUTES)
+
+
+def classify_rest(method: str, path: str) -> Optional[str]:
+    for route_method, regex, cls in _rest_routes:
+        if route_method == method and regex.match(path):
+            return cls
+    for prefix, cls in _REST_PREFIXES:
+        if path.startswith(prefix):
+            return cls
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def classify_grpc(method: str) -> Optional[str]:
+    if method in _GRPC_METHODS:
+        return _GRPC_METHODS[method]
+    return "write" if method.rsplit("/", 1)[-1].startswith(_WRITE_PREFIXES) else "read"
+
+
+class AdaptiveLimit:
+    """AIMD limit on the requests of one class in flight."""
+
+    BACKOFF = 0.9
+
+    def __init__(self, name: str, maximum: int, target: float, minimum: int = 1):
+        self.name = name
+        self.maximum = maximum
+        self.minimum = minimum
+        self.target = target
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        LIMIT.labels(name).inc(self.limit)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            admitted = self.in_flight < int(self.limit)
+            if admitted:
+                self.in_flight += 1
+        DECISIONS.labels(self.name, "admitted" if admitted else "shed").inc()
+        if admitted:
+            IN_FLIGHT.labels(self.name).inc()
+        return admitted
+
+    def release(self, latency: float) -> None:
+        """End an admitted request that took `latency` seconds to respond."""
+        decreased = False
+        with self._lock:
+            busy = self.in_flight
+            self.in_flight -= 1
+            before = self.limit
+            if latency > self.target:
+                now = time.monotonic()
+                # Requests admitted together tend to finish slow together: one cut per interval.
+                if now - self._last_decrease >= self.target:
+                    self.limit = max(self.minimum, self.limit * self.BACKOFF)
+                    self._last_decrease = now
+                    decreased = True
+            elif busy * 2 >= self.limit:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            change = self.limit - before
+        IN_FLIGHT.labels(self.name).dec()
+        if change:
+            LIMIT.labels(self.name).inc(change)
+        if decreased:
+            DECREASES.labels(self.name).inc()
+
+
+def _per_class(text: str) -> Dict[str, float]:
+    values = {}
+    for entry in filter(None, (e.strip() for e in text.split(","))):
+        name, _, value = entry.partition("=")
+        if name.strip() not in CLASSES:
+            raise ValueError(f"Unknown route class {name.strip()!r}; expected one of {', '.join(CLASSES)}")
+        values[name.strip()] = float(value)
+    return values
+
+
+limits: Dict[str, AdaptiveLimit] = {}
+
+
+def configure(enabled: bool = None) -> Dict[str, AdaptiveLimit]:
+    """(Re)build the class limits from config; none when disabled."""
+    global limits
+    enabled = config.ADMISSION_CONTROL if enabled is None else enabled
+    for limit in limits.values():
+        LIMIT.labels(limit.name).dec(limit.limit)
+    limits = {}
+    if enabled:
+        maximum = _per_class(config.ADMISSION_MAX_CONCURRENCY)
+        target = _per_class(config.ADMISSION_TARGET_MS)
+        missing = [cls for cls in CLASSES if cls not in maximum or cls not in target]
+        if missing:
+            raise ValueError(f"ADMISSION_MAX_CONCURRENCY and ADMISSION_TARGET_MS need every route class; "
+                             f"missing {', '.join(missing)}")
+        limits = {cls: AdaptiveLimit(cls, int(maximum[cls]), target[cls] / 1000) for cls in CLASSES}
+    return limits
+
+
+def size_threadpool() -> None:
+    """Grow the default AnyIO thread limiter by the sum of the class maxima.
+    The pool keeps its original size for unlimited routes (admin, /metrics).
+    Call once from the event loop, e.g. in a startup handler."""
+    if limits:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens += sum(limit.maximum for limit in limits.values())
+
+
+def _retry_after() -> str:
+    return str(config.ADMISSION_RETRY_AFTER_SECONDS)
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying the class limits to REST requests.
+
+    Install inside CORS and the rate limiter: refused requests still get CORS
+    headers, and rate-limited ones never take a slot. Call `size_threadpool`
+    at startup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit = limits.get(classify_rest(scope["method"], scope["path"])) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        if not limit.try_acquire():
+            response = JSONResponse({"detail": "Server is overloaded; retry later"}, status_code=503,
+                                    headers={"Retry-After": _retry_after()})
+            await response(scope, receive, send)
+            return
+        started = time.perf_counter()
+        first_byte = None
+        released = False
+        hold_stream = limit.name in _HELD_WHILE_STREAMING
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                limit.release(first_byte if first_byte is not None else time.perf_counter() - started)
+
+        async def send_wrapper(message):
+            nonlocal first_byte
+            if message["type"] == "http.response.start" and first_byte is None:
+                first_byte = time.perf_counter() - started
+            elif message["type"] == "http.response.body" and message.get("more_body") and not hold_stream:
+                release()  # a streamed body: the rest goes at the client's pace
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            release()
+
+
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    """gRPC counterpart of `AdmissionMiddleware`. Install after the rate limit
+    interceptor."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or not limits:
+            return handler
+        limit = limits.get(classify_grpc(handler_call_details.method))
+        if limit is None:
+            return handler
+        hold_stream = limit.name in _HELD_WHILE_STREAMING
+
+        def admit(context):
+            if not limit.try_acquire():
+                context.set_trailing_metadata((("retry-after", _retry_after()),))
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Server is overloaded; retry later")
+
+        def unary(behavior):
+            def wrapper(request, context):
+                admit(context)
+                started = time.perf_counter()
+                try:
+                    return behavior(request, context)
+                finally:
+                    limit.release(time.perf_counter() - started)
+            return wrapper
+
+        def stream(behavior):
+            def wrapper(request, context):
+                admit(context)
+                started = time.perf_counter()
+                first_message = None
+                try:
+                    for response in behavior(request, context):
+                        if first_message is None:
+                            first_message = time.perf_counter() - started
+                            if not hold_stream:
+                                limit.release(first_message)
+                        yield response
+                finally:
+                    if hold_stream or first_message is None:
+                        limit.release(first_message if first_message is not None else time.perf_counter() - started)
+            return wrapper
+
+        return wrap_rpc_handler(handler, unary, stream)
+
+
+configure()
@@ -1,6 +1,11 @@
 import os
 from datetime import timedelta
 
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    return os.environ.get(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
 # Load config from environment
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./backend/dev.db")
 
@@ -14,8 +19,43 @@ REFRESH_TOKEN_EXPIRE_SECONDS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_SECONDS"
 MAX_LOGIN_ATTEMPTS = int(os.environ.get("MAX_LOGIN_ATTEMPTS", 5))
 LOCKOUT_DURATION_SECONDS = int(os.environ.get("LOCKOUT_DURATION_SECONDS", 15 * 60))  # 15 minutes
 
-# Rate limit config (used if you add slowapi + redis)
+# Port for the gRPC server started alongside the REST app
+GRPC_PORT = int(os.environ.get("GRPC_PORT", 50051))
+# gRPC executor threads for ordinary calls, plus one per open watch stream
+# (WatchCourseChanges / WatchGrades, see app/grpc_watch.py) up to GRPC_MAX_WATCHES
+GRPC_MAX_WORKERS = int(os.environ.get("GRPC_MAX_WORKERS", 10))
+GRPC_MAX_WATCHES = int(os.environ.get("GRPC_MAX_WATCHES", 1000))
+
+# Rate limiting (see app/rate_limit.py). RATE_LIMIT is the default for the routes
+# in RATE_LIMIT_ROUTES (comma-separated "METHOD /route/template" or gRPC method,
+# each optionally "=N/period"), per caller; the other two apply to every route.
+# "" turns a limit off.
 RATE_LIMIT = os.environ.get("RATE_LIMIT", "5/minute")
+RATE_LIMIT_ROUTES = os.environ.get(
+    "RATE_LIMIT_ROUTES", "POST /api/auth/login,/userservice.UserService/AuthenticateUser"
+)
+RATE_LIMIT_PER_IP = os.environ.get("RATE_LIMIT_PER_IP", "")
+RATE_LIMIT_PER_USER = os.environ.get("RATE_LIMIT_PER_USER", "")
+# "memory" (per worker process) or "redis" (shared; needs the redis package)
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "memory").strip().lower()
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 100_000))
+# Take the client IP from the last X-Forwarded-For entry: only behind a proxy that sets it
+RATE_LIMIT_FORWARDED_FOR = _env_flag("RATE_LIMIT_FORWARDED_FOR")
+
+# Adaptive load shedding per route class (auth/read/write/bulk/export, see app/admission.py):
+# the most requests in flight per class and worker, and the response latency
+# above which a class limit is cut. Over the limit: 503 / RESOURCE_EXHAUSTED.
+ADMISSION_CONTROL = _env_flag("ADMISSION_CONTROL", True)
+ADMISSION_MAX_CONCURRENCY = os.environ.get("ADMISSION_MAX_CONCURRENCY", "auth=16,read=128,write=32,bulk=4,export=2")
+ADMISSION_TARGET_MS = os.environ.get("ADMISSION_TARGET_MS", "auth=1000,read=250,write=500,bulk=5000,export=5000")
+ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", 1))
+
+# Single-writer queue with group commit for small writes (see app/write_queue.py):
+# off by default; batch size limit and how long the writer waits to fill a batch
+WRITE_QUEUE = _env_flag("WRITE_QUEUE")
+WRITE_QUEUE_MAX_BATCH = int(os.environ.get("WRITE_QUEUE_MAX_BATCH", 64))
+WRITE_QUEUE_MAX_WAIT_MS = float(os.environ.get("WRITE_QUEUE_MAX_WAIT_MS", 0))
 
 # CORS origins - set the frontend origin here in production
 # For development, allow common ports (5173 for Vite, 8080 for build servers, localhost)
@@ -23,3 +63,49 @@ CORS_ORIGINS = os.environ.get(
     "CORS_ORIGINS",
     "http://localhost:5173,http://localhost:8080,http://127.0.0.1:5173,http://127.0.0.1:8080"
 ).split(",")
+
+# SQL instrumentation (see app/sql_instrumentation.py)
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 200))
+SLOW_QUERY_EXPLAIN = _env_flag("SLOW_QUERY_EXPLAIN", True)
+# Log a likely N+1 when one statement shape runs this many times in one request
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", 5))
+# Adds X-DB-Queries / X-DB-Time / X-DB-Rows response headers (x-db-* trailers on gRPC)
+# and turns on per-request row counting. Debug only.
+DB_DEBUG_HEADERS = _env_flag("DB_DEBUG_HEADERS")
+
+# Tracing (see app/tracing.py). TRACE_EXPORT: "" (off), "file" or "otlp"
+TRACE_EXPORT = os.environ.get("TRACE_EXPORT", "").strip().lower()
+TRACE_FILE = os.environ.get("TRACE_FILE", "./backend/traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.environ.get("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# Fraction of new traces recorded; a decision received in `traceparent` wins
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))
+TRACE_SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "p4-backend")
+
+# On-demand sampling profiler (see app/profiler.py); longest capture allowed
+PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", 60))
+
+# Connection-pool monitor (see app/pool_monitor.py): warn about connections held
+# longer than this, and record the app frames that checked each one out
+POOL_HOLD_WARN_SECONDS = float(os.environ.get("POOL_HOLD_WARN_SECONDS", 10))
+POOL_CAPTURE_STACKS = _env_flag("POOL_CAPTURE_STACKS", True)
+POOL_EVENT_LOG_SIZE = int(os.environ.get("POOL_EVENT_LOG_SIZE", 100))
+
+# Streamed responses (exports, NDJSON lists; see app/streaming.py): rows fetched
+# from the cursor and encoded per response chunk
+EXPORT_BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", 1000))
+
+# In-process event hub (see app/events.py): replay buffer per topic, number of
+# topics kept for replay, and the queue bound that closes slow subscribers
+EVENTS_REPLAY_PER_TOPIC = int(os.environ.get("EVENTS_REPLAY_PER_TOPIC", 100))
+EVENTS_REPLAY_TOPICS = int(os.environ.get("EVENTS_REPLAY_TOPICS", 50_000))
+EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", 256))
+# Server-sent events: open streams per worker process, heartbeat comment interval,
+# and the reconnect delay suggested to clients
+SSE_MAX_CONNECTIONS = int(os.environ.get("SSE_MAX_CONNECTIONS", 1000))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", 15))
+SSE_RETRY_MS = int(os.environ.get("SSE_RETRY_MS", 3000))
+
+# Change log behind GET /api/changes (see app/outbox.py): how long entries are
+# kept, and how often the app compacts (0: never; run scripts/compact_changes)
+CHANGE_LOG_RETENTION_HOURS = float(os.environ.get("CHANGE_LOG_RETENTION_HOURS", 7 * 24))
+CHANGE_LOG_COMPACT_INTERVAL_SECONDS = float(os.environ.get("CHANGE_LOG_COMPACT_INTERVAL_SECONDS", 3600))
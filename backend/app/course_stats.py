@@ -0,0 +1,153 @@
+"""Per-course grade statistics, cached per grades version.
+
+A course's statistics only change when one of its grades does, and every grade
+write bumps `CourseVersion.grades_version` in the same transaction
+(`crud._bump_course_version`). So results are cached under
+`(course_id, grades_version)`: a request reads the version (one single-row
+query, which also tells a missing course apart) and only recomputes after an
+upload. Entries for older versions are never asked for again and fall out of
+the LRU.
+
+The aggregation is one `GROUP BY semester, grade_value` in SQL. Grades take a
+handful of distinct values, so the result is a small histogram per semester no
+matter how many students a course has, and mean, spread and percentiles are
+exact when computed from it with `grading.grade_points`.
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import metrics, models, tracing
+from .grading import grade_points
+
+CACHE_SIZE = 1024
+PERCENTILES = (("p25", 25), ("median", 50), ("p75", 75), ("p90", 90))
+
+CACHE_LOOKUPS = metrics.counter(
+    "course_stats_cache_total", "Course statistics lookups, by result (hit/miss).", ("result",)
+)
+
+_cache: "OrderedDict[Tuple[int, int], dict]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def grades_version(db: Session, course_id: int) -> Optional[int]:
+    """The course's grades version (0 before any grade), or None if it does not exist."""
+    row = db.execute(
+        select(models.Course.id, models.CourseVersion.grades_version)
+        .outerjoin(models.CourseVersion, models.CourseVersion.course_id == models.Course.id)
+        .where(models.Course.id == course_id)
+    ).first()
+    if row is None:
+        return None
+    return row.grades_version or 0
+
+
+def version_tag(course_id: int, version: int) -> str:
+    return f"stats.{course_id}.{version}"
+
+
+@tracing.traced()
+def get_course_stats(db: Session, course_id: int, version: Optional[int] = None) -> Optional[dict]:
+    """`{"course_id", "version", "overall", "semesters"}` for a course, or None
+    if it does not exist. Statistics dicts are shaped like `schemas.GradeStats`.
+
+    Pass `version` when the caller already read it (for a conditional request).
+    """
+    if version is None:
+        version = grades_version(db, course_id)
+        if version is None:
+            return None
+    key = (course_id, version)
+    with _lock:
+        stats = _cache.get(key)
+        if stats is not None:
+            _cache.move_to_end(key)
+    CACHE_LOOKUPS.labels("hit" if stats is not None else "miss").inc()
+    if stats is None:
+        stats = compute_course_stats(db, course_id, version)
+        with _lock:
+            _cache[key] = stats
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return stats
+
+
+def compute_course_stats(db: Session, course_id: int, version: int = 0) -> dict:
+    """Aggregate a course's grades without the cache."""
+    rows = db.execute(
+        select(models.Grade.semester, models.Grade.grade_value, func.count())
+        .where(models.Grade.course_id == course_id)
+        .group_by(models.Grade.semester, models.Grade.grade_value)
+    ).all()
+    by_semester: Dict[Optional[str], Dict[str, int]] = {}
+    overall: Dict[str, int] = {}
+    for semester, value, n in rows:
+        counts = by_semester.setdefault(semester, {})
+        counts[value] = counts.get(value, 0) + n
+        overall[value] = overall.get(value, 0) + n
+    return {
+        "course_id": course_id,
+        "version": version,
+        "overall": summarize(overall),
+        # Unnamed semesters last.
+        "semesters": [summarize(by_semester[s], semester=s)
+                      for s in sorted(by_semester, key=lambda s: (s is None, s or ""))],
+    }
+
+
+def summarize(counts: Dict[str, int], semester: Optional[str] = None) -> dict:
+    """Statistics for one histogram of `grade_value -> count`.
+
+    Only values with grade points enter the numbers; percentiles are
+    nearest-rank, so they are always a grade someone actually got.
+    """
+    pointed = sorted((grade_points(v), n) for v, n in counts.items() if grade_points(v) is not None)
+    graded = sum(n for _, n in pointed)
+    stats = {
+        "semester": semester,
+        "count": sum(counts.values()),
+        "graded": graded,
+        "mean": None, "stddev": None, "min": None, "max": None,
+        **{name: None for name, _ in PERCENTILES},
+        "distribution": [
+            {"grade_value": v, "count": n, "points": grade_points(v)}
+            for v, n in sorted(counts.items(), key=_distribution_order)
+        ],
+    }
+    if graded:
+        mean = sum(p * n for p, n in pointed) / graded
+        variance = sum(n * (p - mean) ** 2 for p, n in pointed) / graded
+        stats.update(
+            mean=round(mean, 4),
+            stddev=round(math.sqrt(variance), 4),
+            min=pointed[0][0],
+            max=pointed[-1][0],
+            **{name: _nearest_rank(pointed, graded, q) for name, q in PERCENTILES},
+        )
+    return stats
+
+
+def _nearest_rank(pointed: List[Tuple[float, int]], total: int, q: int) -> float:
+    rank = max(1, math.ceil(q / 100 * total))
+    seen = 0
+    for points, n in pointed:
+        seen += n
+        if seen >= rank:
+            return points
+    return pointed[-1][0]
+
+
+def _distribution_order(item):
+    # Highest points first, then values without points alphabetically.
+    points = grade_points(item[0])
+    return (points is None, -(points or 0), item[0])
+
+
+def clear_cache() -> None:
+    with _lock:
+        _cache.clear()
@@ -1,10 +1,12 @@
+from sqlalchemy import bindparam, event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from jose import jwt
 from typing import List
 from fastapi import HTTPException
-from . import models, schemas, config
+from . import models, schemas, config, events, outbox, student_summary, tracing, write_queue
 import secrets
 import hashlib
 
@@ -12,15 +14,29 @@ import hashlib
 # argon2 is more secure and avoids bcrypt's 72-byte password length limitation
 pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 
+# Hot single-row lookups are built once at import time with bound parameters.
+# Re-using the same statement object skips per-call query construction and lets
+# SQLAlchemy reuse its memoized cache key to hit the compiled-SQL cache
+# directly. See backend/benchmarks/bench_lookups.py.
+_USER_BY_ID = select(models.User).where(models.User.id == bindparam("user_id")).limit(1)
+_USER_BY_USERNAME = select(models.User).where(models.User.username == bindparam("username")).limit(1)
+_COURSE_BY_ID = select(models.Course).where(models.Course.id == bindparam("course_id")).limit(1)
+_REFRESH_TOKEN_BY_HASH = (
+    select(models.RefreshToken).where(models.RefreshToken.token_hash == bindparam("token_hash")).limit(1)
+)
 
+
+@tracing.traced()
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+@tracing.traced()
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+@tracing.traced()
 def create_user(db: Session, user_in: schemas.UserCreate) -> models.User:
     user = models.User(
         username=user_in.username,
@@ -34,20 +50,24 @@ def create_user(db: Session, user_in: schemas.UserCreate) -> models.User:
     return user
 
 
+@tracing.traced()
 def get_user_by_username(db: Session, username: str):
-    return db.query(models.User).filter(models.User.username == username).first()
+    return db.execute(_USER_BY_USERNAME, {"username": username}).scalars().first()
 
 
+@tracing.traced()
 def get_user_by_id(db: Session, user_id: int):
     """Return a user by numeric id."""
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    return db.execute(_USER_BY_ID, {"user_id": user_id}).scalars().first()
 
 
+@tracing.traced()
 def get_all_users(db: Session):
     """Return all users (for faculty grade entry student dropdown)."""
     return db.query(models.User).all()
 
 
+@tracing.traced()
 def authenticate_user(db: Session, username: str, password: str):
     user = get_user_by_username(db, username)
     if not user:
@@ -56,26 +76,39 @@ def authenticate_user(db: Session, username: str, password: str):
     if user.locked_until and user.locked_until > datetime.utcnow():
         return None
     if not verify_password(password, user.password_hash):
+        _record_login_attempt(db, user.id, succeeded=False)
+        return None
+    # Successful login -> reset counters (nothing to write when they are clear)
+    if user.failed_login_attempts or user.locked_until:
+        _record_login_attempt(db, user.id, succeeded=True)
+    return user
+
+
+@write_queue.serialized
+def _record_login_attempt(db: Session, user_id: int, succeeded: bool):
+    """Reset the failed-login count, or add a failure and possibly lock the account.
+
+    Kept apart from `authenticate_user` so the password check stays in the
+    caller's thread when writes are queued."""
+    user = db.get(models.User, user_id)
+    if succeeded:
+        user.failed_login_attempts = 0
+        user.locked_until = None
+    else:
         # increment failed attempts and possibly lock account
         user.failed_login_attempts = (user.failed_login_attempts or 0) + 1
         if user.failed_login_attempts >= config.MAX_LOGIN_ATTEMPTS:
             user.locked_until = datetime.utcnow() + timedelta(seconds=config.LOCKOUT_DURATION_SECONDS)
             user.failed_login_attempts = 0
-        db.add(user)
-        db.commit()
-        return None
-    # Successful login -> reset counters
-    user.failed_login_attempts = 0
-    user.locked_until = None
-    db.add(user)
     db.commit()
-    return user
 
 
 def _hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
+@tracing.traced()
+@write_queue.serialized
 def create_refresh_token(db: Session, user_id: int, expires_delta: int = config.REFRESH_TOKEN_EXPIRE_SECONDS):
     """Create a refresh token record and return the raw token."""
     raw = secrets.token_urlsafe(32)
@@ -88,12 +121,13 @@ def create_refresh_token(db: Session, user_id: int, expires_delta: int = config.
     return raw, rt
 
 
+@tracing.traced()
 def verify_refresh_token(db: Session, raw_token: str):
     """Return the RefreshToken row if valid and not revoked/expired, else None."""
     if not raw_token:
         return None
     token_hash = _hash_token(raw_token)
-    rt = db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == token_hash).first()
+    rt = db.execute(_REFRESH_TOKEN_BY_HASH, {"token_hash": token_hash}).scalars().first()
     if not rt or rt.revoked:
         return None
     if rt.expires_at and rt.expires_at < datetime.utcnow():
@@ -101,6 +135,7 @@ def verify_refresh_token(db: Session, raw_token: str):
     return rt
 
 
+@tracing.traced()
 def revoke_refresh_token(db: Session, rt: models.RefreshToken):
     rt.revoked = True
     db.add(rt)
@@ -108,54 +143,136 @@ def revoke_refresh_token(db: Session, rt: models.RefreshToken):
     return True
 
 
+@tracing.traced()
 def revoke_user_refresh_tokens(db: Session, user_id: int):
     db.query(models.RefreshToken).filter(models.RefreshToken.user_id == user_id).update({"revoked": True})
     db.commit()
 
 
+@tracing.traced()
 def create_access_token(subject: str, expires_delta: int = config.ACCESS_TOKEN_EXPIRE_SECONDS) -> str:
     to_encode = {"sub": str(subject), "exp": datetime.utcnow() + timedelta(seconds=expires_delta)}
     return jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
 
 
 # Course CRUD
+@tracing.traced()
 def create_course(db: Session, course_in: schemas.CourseCreate) -> models.Course:
     course = models.Course(code=course_in.code, name=course_in.name, instructor=course_in.instructor, capacity=course_in.capacity)
     db.add(course)
+    db.flush()
+    payload = events.course_payload(course)
+    outbox.record(db, "course", "created", course.id, payload)
     db.commit()
     db.refresh(course)
+    events.hub.publish(events.COURSES_TOPIC, "created", payload)
     return course
 
 
+@tracing.traced()
 def get_courses(db: Session) -> List[models.Course]:
     return db.query(models.Course).all()
 
 
+@tracing.traced()
 def get_course(db: Session, course_id: int):
-    return db.query(models.Course).filter(models.Course.id == course_id).first()
+    return db.execute(_COURSE_BY_ID, {"course_id": course_id}).scalars().first()
 
 
+@tracing.traced()
 def update_course(db: Session, course_id: int, data: dict):
-    course = db.query(models.Course).filter(models.Course.id == course_id).first()
+    course = get_course(db, course_id)
     if not course:
         return None
     for k, v in data.items():
         setattr(course, k, v)
+    payload = events.course_payload(course)
+    outbox.record(db, "course", "updated", course.id, payload)
     db.commit()
     db.refresh(course)
+    events.hub.publish(events.COURSES_TOPIC, "updated", payload)
     return course
 
 
+@tracing.traced()
 def delete_course(db: Session, course_id: int) -> bool:
-    course = db.query(models.Course).filter(models.Course.id == course_id).first()
+    course = get_course(db, course_id)
     if not course:
         return False
+    db.query(models.CourseVersion).filter(models.CourseVersion.course_id == course_id).delete()
     db.delete(course)
+    outbox.record(db, "course", "deleted", course_id)
     db.commit()
+    events.hub.publish(events.COURSES_TOPIC, "deleted", {"id": course_id})
     return True
 
 
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _bump_course_version(db: Session, course_id: int, roster: bool = False, grades: bool = False):
+    """Increment a course's cache-validator counters; call before the caller's commit."""
+    cv = models.CourseVersion
+    changes = {}
+    if roster:
+        changes[cv.roster_version] = cv.roster_version + 1
+    if grades:
+        changes[cv.grades_version] = cv.grades_version + 1
+    dialect = db.get_bind().dialect.name
+    if dialect in _UPSERT_INSERTS:
+        # One INSERT ... ON CONFLICT DO UPDATE: concurrent first bumps of a course
+        # cannot both miss the row and both insert it.
+        stmt = _UPSERT_INSERTS[dialect](cv).values(
+            course_id=course_id, roster_version=int(roster), grades_version=int(grades))
+        db.execute(stmt.on_conflict_do_update(index_elements=[cv.course_id], set_=changes))
+        return
+    updated = db.query(cv).filter(cv.course_id == course_id).update(changes, synchronize_session=False)
+    if not updated:
+        db.add(cv(course_id=course_id, roster_version=int(roster), grades_version=int(grades)))
+
+
+@tracing.traced()
+def get_course_version_tag(db: Session, course_id: int):
+    """Return an opaque tag that changes whenever the course's enrollments,
+    its students' usernames/emails or its grades change, or None if the course
+    does not exist."""
+    row = (
+        db.query(models.Course.id, models.CourseVersion.roster_version, models.CourseVersion.grades_version)
+        .outerjoin(models.CourseVersion, models.CourseVersion.course_id == models.Course.id)
+        .filter(models.Course.id == course_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return f"{course_id}.{row.roster_version or 0}.{row.grades_version or 0}"
+
+
+_ROSTER_USER_FIELDS = ("username", "email")
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_rosters_of_changed_students(db: Session, flush_context, instances):
+    """Rosters show each student's username and email, so a change to either
+    bumps the roster version of every course the student is enrolled in.
+
+    Runs for any ORM change to a `User`; bulk UPDATEs and manual SQL bypass it.
+    """
+    for obj in db.dirty:
+        if not isinstance(obj, models.User):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[field].history.has_changes() for field in _ROSTER_USER_FIELDS):
+            continue
+        course_ids = db.execute(
+            select(models.Enrollment.course_id).where(models.Enrollment.student_id == obj.id)
+        ).scalars().all()
+        for course_id in course_ids:
+            _bump_course_version(db, course_id, roster=True)
+
+
 # Enrollment
+@tracing.traced()
+@write_queue.serialized
 def enroll_student(db, student_id, course_id):
     # Check if already enrolled
     existing = db.query(models.Enrollment).filter(
@@ -171,13 +288,18 @@ def enroll_student(db, student_id, course_id):
 
     enrollment = models.Enrollment(student_id=student_id, course_id=course_id)
     db.add(enrollment)
+    _bump_course_version(db, course_id, roster=True)
+    db.flush()
+    outbox.record(db, "enrollment", "created", enrollment.id, events.enrollment_payload(enrollment))
     db.commit()
     db.refresh(enrollment)
     return enrollment
 
 
+@tracing.traced()
 def upload_grades(db: Session, course_id: int, entries: list[dict], uploaded_by: int):
     result_grades = []
+    changed = []  # (grade, op) for new grades and changed values: logged and pushed to their students
 
     for entry in entries:
 
@@ -201,6 +323,8 @@ def upload_grades(db: Session, course_id: int, entries: list[dict], uploaded_by:
 
         if grade:
             # Update existing grade
+            if grade.grade_value != entry["grade_value"]:
+                changed.append((grade, "updated"))
             grade.grade_value = entry["grade_value"]
             grade.uploaded_by = uploaded_by
         else:
@@ -212,12 +336,27 @@ def upload_grades(db: Session, course_id: int, entries: list[dict], uploaded_by:
                 uploaded_by=uploaded_by
             )
             db.add(grade)
+            changed.append((grade, "created"))
 
         result_grades.append(grade)
 
+    notifications = []
+    if result_grades:
+        _bump_course_version(db, course_id, grades=True)
+        db.flush()
+        student_summary.refresh(db, (grade.student_id for grade in result_grades))
+        # Read before commit expires the objects.
+        logged = []
+        for grade, op in changed:
+            data = events.grade_payload(grade)
+            logged.append((op, grade.id, data))
+            notifications.extend(events.grade_events(data))
+        outbox.record_many(db, "grade", logged)
     db.commit()
+    events.hub.publish_many(notifications)
     return result_grades
 
 
+@tracing.traced()
 def get_grades_for_student(db: Session, student_id: int):
     return db.query(models.Grade).filter(models.Grade.student_id == student_id).all()
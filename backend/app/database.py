@@ -1,13 +1,22 @@
 from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import DATABASE_URL
+from .metrics import instrument_pool
+from .sql_instrumentation import instrument_engine
+from . import pool_monitor, tracing
 
 # For a simple scaffold we use SQLAlchemy synchronous engine.
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
 )
+instrument_engine(engine)
+instrument_pool(engine)
+pool_monitor.instrument_pool(engine)
+tracing.instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+tracing.instrument_sessions(SessionLocal)
 Base = declarative_base()
 
 
@@ -20,3 +29,12 @@ def init_db():
     # Import models so they are registered with Base.metadata before creating tables
     from . import models  # noqa: F401
     Base.metadata.create_all(bind=engine)
+    # `create_all` skips tables that already exist, so indexes added to a model
+    # later would never reach an existing dev database. Create them explicitly.
+    # (IF NOT EXISTS rather than checkfirst: reflection skips expression indexes.)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+    from .search import install_search_index
+    install_search_index(engine)
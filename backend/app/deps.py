@@ -17,7 +17,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from .database import SessionLocal
-from . import crud, config
+from . import crud, config, tracing
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -31,6 +31,7 @@ def get_db():
         db.close()
 
 
+@tracing.traced("deps.get_current_user")
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """Decode JWT access token and return the current user.
 
@@ -42,7 +43,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
+        with tracing.start_span("jwt.decode"):
+            payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
         sub = payload.get("sub")
         if sub is None:
             raise credentials_exception
@@ -54,14 +56,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     return user
 
 
-def require_role(role: str):
-    """Return a dependency that ensures the current user has the given role.
+def require_role(*roles: str):
+    """Return a dependency that ensures the current user has one of the given roles.
 
     Usage:
       @router.post("/secure", dependencies=[Depends(require_role("faculty"))])
     """
     def role_checker(current_user = Depends(get_current_user)):
-        if current_user.role != role:
+        if current_user.role not in roles:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient privileges")
         return current_user
 
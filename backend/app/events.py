@@ -0,0 +1,315 @@
+"""In-process pub/sub hub for change notifications.
+
+Write paths publish an `Event` to a topic after their transaction commits
+(`crud.upload_grades` publishes each new or changed grade to its student's
+topic, `student_grades_topic`, and to `GRADES_TOPIC`; course writes publish to
+`COURSES_TOPIC`). Push endpoints subscribe to the topics of one
+client and forward what arrives, instead of every client polling the database.
+
+- Every subscriber has a bounded queue (`EVENTS_QUEUE_SIZE`). Publishing never
+  blocks: a subscriber whose queue is full is closed as `overflowed`, and its
+  client is expected to reconnect and resume, so one slow consumer cannot hold
+  up the publisher or grow memory without bound.
+- Events carry a sequence number, unique within this process, exposed to
+  clients as a resume token `"<epoch>-<seq>"` (SSE `id:` / `Last-Event-ID`).
+  The last `EVENTS_REPLAY_PER_TOPIC` events of up to `EVENTS_REPLAY_TOPICS`
+  topics are kept, so a reconnecting client gets what it missed. `replay` says
+  when that is no longer possible (events evicted, or a token from before a
+  restart, which changes the epoch) and the client has to refetch instead.
+- Subscribers can wait from a thread (`Subscription.get`) or a coroutine
+  (`Subscription.get_async`); publishers are usually threadpool threads.
+
+The hub lives in one process. With several workers, a client connected to one
+worker only hears about writes made by that worker.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from . import config, metrics
+
+logger = logging.getLogger(__name__)
+
+PUBLISHED = metrics.counter("events_published_total", "Events published to the in-process hub, by kind.", ("kind",))
+OVERFLOWS = metrics.counter(
+    "events_subscriber_overflows_total", "Subscribers closed because their queue was full."
+)
+
+
+class Event(NamedTuple):
+    seq: int
+    topic: str
+    kind: str
+    data: dict
+    at: float  # time.time() at publish
+
+
+class Subscription:
+    """A subscriber's queue. Iterate with `get` / `get_async`; always `close()`."""
+
+    def __init__(self, hub: "EventHub", topics: Set[str], maxsize: int, loop=None):
+        self.hub = hub
+        self.topics = topics
+        self.maxsize = maxsize
+        self.closed = False
+        self.overflowed = False
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._loop = loop
+        self._ready = asyncio.Event() if loop is not None else None
+
+    def _deliver(self, event: Event) -> None:
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                self.closed = self.overflowed = True
+                self._queue.clear()
+                OVERFLOWS.inc()
+            else:
+                self._queue.append(event)
+            self._cond.notify()
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event, or None on timeout or once closed."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            return self._queue.popleft() if self._queue else None
+
+    async def get_async(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Like `get`, for subscriptions made with `loop=`."""
+        with self._cond:
+            if self._queue or self.closed:
+                return self._queue.popleft() if self._queue else None
+            self._ready.clear()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._cond:
+            return self._queue.popleft() if self._queue else None
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self._wake()
+        self.hub._unsubscribe(self)
+
+
+class Resumption(NamedTuple):
+    """What `EventHub.resume` returns."""
+    subscription: Subscription
+    missed: List[Event]
+    start: str  # "resumed", "ready" or "reset"
+    position: int  # seq of the latest event when the subscription started
+
+
+class EventHub:
+    def __init__(self, replay_per_topic: int, replay_topics: int, queue_size: int):
+        self.replay_per_topic = replay_per_topic
+        self.replay_topics = replay_topics
+        self.queue_size = queue_size
+        # Tokens from another process lifetime must not be taken for ours.
+        self.epoch = f"{int(time.time()):x}{os.getpid():x}"
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._recent: "OrderedDict[str, deque]" = OrderedDict()
+        # Highest seq dropped from each replay buffer / from a topic evicted entirely.
+        self._dropped: Dict[str, int] = {}
+        self._evicted_floor = 0
+
+    # Tokens
+
+    def token(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_token(self, token: Optional[str]) -> Optional[int]:
+        """The seq in one of our tokens; None if missing, malformed or from another epoch."""
+        epoch, _, seq = (token or "").strip().rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def position(self) -> int:
+        """Seq of the latest event; a token for it resumes from "now"."""
+        return self._last_seq
+
+    # Publishing
+
+    def publish(self, topic: str, kind: str, data: dict) -> Event:
+        with self._lock:
+            event = Event(next(self._seq), topic, kind, data, time.time())
+            self._last_seq = event.seq
+            self._remember(event)
+            # Under the lock, so every subscriber sees events in seq order.
+            for sub in self._subscribers.get(topic, ()):
+                sub._deliver(event)
+        PUBLISHED.labels(kind).inc()
+        return event
+
+    def publish_many(self, events: Iterable[Tuple[str, str, dict]]) -> List[Event]:
+        return [self.publish(topic, kind, data) for topic, kind, data in events]
+
+    def _remember(self, event: Event) -> None:
+        recent = self._recent.get(event.topic)
+        if recent is None:
+            recent = self._recent[event.topic] = deque()
+            if self._evicted_floor:
+                # The topic may have been evicted before; don't claim its older events.
+                self._dropped[event.topic] = self._evicted_floor
+            while len(self._recent) > self.replay_topics:
+                topic, old = self._recent.popitem(last=False)
+                self._evicted_floor = max(self._evicted_floor, old[-1].seq, self._dropped.pop(topic, 0))
+        else:
+            self._recent.move_to_end(event.topic)
+        recent.append(event)
+        if len(recent) > self.replay_per_topic:
+            self._dropped[event.topic] = recent.popleft().seq
+
+    def replay(self, topics: Iterable[str], after: int) -> Tuple[List[Event], bool]:
+        """Events on `topics` with seq > `after`, oldest first, and whether that
+        is all of them (False: some were already dropped)."""
+        with self._lock:
+            return self._replay(topics, after)
+
+    def _replay(self, topics: Iterable[str], after: int) -> Tuple[List[Event], bool]:
+        events, complete = [], True
+        for topic in topics:
+            recent = self._recent.get(topic)
+            floor = self._dropped.get(topic, 0) if recent is not None else self._evicted_floor
+            if after < floor:
+                complete = False
+            if recent:
+                events.extend(e for e in recent if e.seq > after)
+        events.sort(key=lambda e: e.seq)
+        return events, complete
+
+    # Subscribing
+
+    def subscribe(self, topics: Iterable[str], queue_size: Optional[int] = None, loop=None) -> Subscription:
+        """Start receiving events on `topics`. Pass `loop` (the running event
+        loop) to wait with `get_async`."""
+        sub = Subscription(self, set(topics), queue_size or self.queue_size, loop)
+        with self._lock:
+            self._add(sub)
+        return sub
+
+    def resume(self, topics: Iterable[str], token: Optional[str], queue_size: Optional[int] = None,
+               loop=None) -> "Resumption":
+        """Subscribe to `topics`, picking up after `token` (the resume token of
+        the last event a client saw, or None for a new client).
+
+        Registering and reading the replay buffer happen together, so the
+        missed events and the subscription's queue neither overlap nor leave a
+        gap. `start` tells the client how the stream begins:
+
+        - "resumed": `missed` continues right after `token`;
+        - "ready": no token; send `position` so the client has one;
+        - "reset": `token` is foreign or its events were dropped; the client
+          must refetch, then continue from `position`.
+        """
+        sub = Subscription(self, set(topics), queue_size or self.queue_size, loop)
+        after = self.parse_token(token) if token else None
+        with self._lock:
+            self._add(sub)
+            position = self._last_seq
+            if after is None:
+                return Resumption(sub, [], "reset" if token else "ready", position)
+            missed, complete = self._replay(sub.topics, after)
+        if not complete:
+            return Resumption(sub, [], "reset", position)
+        return Resumption(sub, missed, "resumed", position)
+
+    def _add(self, sub: Subscription) -> None:
+        for topic in sub.topics:
+            self._subscribers.setdefault(topic, set()).add(sub)
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._subscribers.get(topic)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[topic]
+
+    def close_all(self) -> None:
+        """Close every subscription (at shutdown); their streams end and the
+        clients reconnect elsewhere."""
+        with self._lock:
+            subs = {sub for subs in self._subscribers.values() for sub in subs}
+        for sub in subs:
+            sub.close()
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+
+hub = EventHub(config.EVENTS_REPLAY_PER_TOPIC, config.EVENTS_REPLAY_TOPICS, config.EVENTS_QUEUE_SIZE)
+metrics.gauge_func("events_subscribers", "Open subscriptions on the in-process event hub.", hub.subscriber_count)
+
+
+# Topics. Every grade change goes to its student's topic and to GRADES_TOPIC.
+COURSES_TOPIC = "courses"
+GRADES_TOPIC = "grades"
+
+
+def student_grades_topic(student_id: int) -> str:
+    return f"grades.student.{student_id}"
+
+
+def grade_payload(grade) -> dict:
+    """A grade as `schemas.GradeRead` serializes it."""
+    return {
+        "id": grade.id,
+        "student_id": grade.student_id,
+        "course_id": grade.course_id,
+        "grade_value": grade.grade_value,
+        "semester": grade.semester,
+        "uploaded_by": grade.uploaded_by,
+        "uploaded_at": grade.uploaded_at.isoformat() if grade.uploaded_at else None,
+    }
+
+
+def grade_events(data: dict) -> List[Tuple[str, str, dict]]:
+    """`publish_many` arguments for a new or changed grade (its `grade_payload`)."""
+    return [(student_grades_topic(data["student_id"]), "grade", data), (GRADES_TOPIC, "grade", data)]
+
+
+def course_payload(course) -> dict:
+    """A course's `schemas.CourseRead` fields and `created_at`."""
+    return {
+        "id": course.id,
+        "code": course.code,
+        "name": course.name,
+        "instructor": course.instructor,
+        "capacity": course.capacity,
+        "created_at": course.created_at.isoformat() if course.created_at else None,
+    }
+
+
+def enrollment_payload(enrollment) -> dict:
+    return {
+        "id": enrollment.id,
+        "student_id": enrollment.student_id,
+        "course_id": enrollment.course_id,
+        "enrolled_at": enrollment.enrolled_at.isoformat() if enrollment.enrolled_at else None,
+    }
@@ -0,0 +1,43 @@
+"""Grade values to grade points.
+
+`Grade.grade_value` is free text. Faculty upload the numeric 4.0 scale
+("4.0", "3.5", ... "0.0"), but letter grades and marks without points (INC, W,
+DRP, P) turn up too. `grade_points` maps a value to the number averages and
+statistics are computed over, or None when the value carries no points; those
+grades still count as grades, they are just left out of the arithmetic.
+"""
+from functools import lru_cache
+from typing import Optional
+
+MAX_POINTS = 4.0
+# Courses carry no credit units in this schema, so every course weighs the same.
+COURSE_CREDITS = 3
+
+LETTER_POINTS = {
+    "A+": 4.0, "A": 4.0, "A-": 3.7,
+    "B+": 3.3, "B": 3.0, "B-": 2.7,
+    "C+": 2.3, "C": 2.0, "C-": 1.7,
+    "D+": 1.3, "D": 1.0, "D-": 0.7,
+    "F": 0.0,
+}
+
+
+@lru_cache(maxsize=1024)
+def grade_points(value: Optional[str]) -> Optional[float]:
+    """Points for a grade value, or None if it has none ("INC", "W", "", None)."""
+    if value is None:
+        return None
+    value = value.strip().upper()
+    if value in LETTER_POINTS:
+        return LETTER_POINTS[value]
+    try:
+        points = float(value)
+    except ValueError:
+        return None
+    # float() also accepts "nan" and "inf"; neither is a grade.
+    return points if 0.0 <= points <= MAX_POINTS else None
+
+
+def is_passing(points: Optional[float]) -> bool:
+    """Whether a grade with `points` earns the course's credits."""
+    return points is not None and points > 0
@@ -0,0 +1,50 @@
+"""Caller identity for gRPC methods.
+
+REST routes authenticate with `deps.get_current_user`; gRPC methods that need
+a user read the same JWT access token from the `authorization` metadata entry
+(`Bearer <token>`).
+"""
+from typing import Optional
+
+import grpc
+from jose import JWTError, jwt
+
+from . import config, crud
+
+
+def bearer_token(context) -> Optional[str]:
+    for key, value in context.invocation_metadata() or ():
+        if key == "authorization" and value.lower().startswith("bearer "):
+            return value[7:].strip()
+    return None
+
+
+def current_user(context, db):
+    """Return the user for the call's access token.
+
+    On failure sets UNAUTHENTICATED on `context` and returns None; the caller
+    should return an empty response.
+    """
+    token = bearer_token(context)
+    user = None
+    if token:
+        try:
+            sub = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM]).get("sub")
+            user = crud.get_user_by_id(db, int(sub)) if sub is not None else None
+        except (JWTError, ValueError):
+            user = None
+    if user is None:
+        context.set_code(grpc.StatusCode.UNAUTHENTICATED)
+        context.set_details("Could not validate credentials")
+    return user
+
+
+def require_role(context, db, role: str):
+    """Like `current_user`, but also sets PERMISSION_DENIED (and returns None)
+    unless the user has `role`."""
+    user = current_user(context, db)
+    if user is not None and user.role != role:
+        context.set_code(grpc.StatusCode.PERMISSION_DENIED)
+        context.set_details("Insufficient privileges")
+        return None
+    return user
@@ -0,0 +1,37 @@
+"""Helpers shared by the gRPC server interceptors.
+
+grpc's `ServerInterceptor` only hands us the method handler; to run code around
+the actual call we rebuild the handler with a wrapped behavior. Feature
+modules (metrics, SQL instrumentation, ...) define their interceptors with
+`wrap_rpc_handler` and `grpc_server.py` installs them in order, outermost
+first.
+"""
+import grpc
+
+
+def wrap_rpc_handler(handler, unary, stream):
+    """Return a copy of `handler` whose behavior is wrapped.
+
+    `unary(behavior)` wraps methods that return a single response (unary-unary
+    and stream-unary); `stream(behavior)` wraps response-streaming methods and
+    must return a generator function.
+    """
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(
+            unary(handler.unary_unary), handler.request_deserializer, handler.response_serializer)
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(
+            stream(handler.unary_stream), handler.request_deserializer, handler.response_serializer)
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(
+            unary(handler.stream_unary), handler.request_deserializer, handler.response_serializer)
+    return grpc.stream_stream_rpc_method_handler(
+        stream(handler.stream_stream), handler.request_deserializer, handler.response_serializer)
+
+
+def status_name(context, failed: bool) -> str:
+    """Name of the status code the servicer set (OK/UNKNOWN if it set none)."""
+    code = context.code() if hasattr(context, "code") else None
+    if code is None:
+        return "UNKNOWN" if failed else "OK"
+    return code.name
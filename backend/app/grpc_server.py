@@ -5,10 +5,18 @@ from .grpc_services import (
     grade_service_pb2_grpc,
     course_service_pb2_grpc,
     user_service_pb2_grpc,
+    admin_service_pb2_grpc,
 )
 from .grpc_services.grade_servicer import GradeServicer
 from .grpc_services.course_servicer import CourseServicer
 from .grpc_services.user_servicer import UserServicer
+from .grpc_services.admin_servicer import AdminServicer
+from .admission import AdmissionInterceptor
+from .metrics import MetricsInterceptor
+from .rate_limit import RateLimitInterceptor
+from .sql_instrumentation import QueryStatsInterceptor
+from .tracing import TracingInterceptor
+from . import config
 import logging
 import os
 
@@ -18,21 +26,39 @@ logger = logging.getLogger(__name__)
 os.environ['GRPC_DNS_RESOLVER'] = 'native'
 
 
+# Every service the server exposes, with its registration function.
+SERVICERS = [
+    (GradeServicer, grade_service_pb2_grpc.add_GradeServiceServicer_to_server),
+    (CourseServicer, course_service_pb2_grpc.add_CourseServiceServicer_to_server),
+    (UserServicer, user_service_pb2_grpc.add_UserServiceServicer_to_server),
+    (AdminServicer, admin_service_pb2_grpc.add_AdminServiceServicer_to_server),
+]
+
+
+def _interceptors():
+    """Server interceptors, outermost first. Metrics opens the per-call context
+    the others rely on."""
+    interceptors = [MetricsInterceptor(), TracingInterceptor(), RateLimitInterceptor(), AdmissionInterceptor()]
+    if config.DB_DEBUG_HEADERS:
+        interceptors.append(QueryStatsInterceptor())
+    return interceptors
+
+
 def start_grpc_server(port: int = 50051):
     """Start the gRPC server on the specified port"""
     try:
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+        # Watch streams each hold a thread for as long as they are open; threads
+        # are only started as calls need them.
+        threads = config.GRPC_MAX_WORKERS + config.GRPC_MAX_WATCHES
+        server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=threads),
+            interceptors=_interceptors(),
+            maximum_concurrent_rpcs=threads,
+        )
         
         # Register servicers
-        grade_service_pb2_grpc.add_GradeServiceServicer_to_server(
-            GradeServicer(), server
-        )
-        course_service_pb2_grpc.add_CourseServiceServicer_to_server(
-            CourseServicer(), server
-        )
-        user_service_pb2_grpc.add_UserServiceServicer_to_server(
-            UserServicer(), server
-        )
+        for servicer, add_to_server in SERVICERS:
+            add_to_server(servicer(), server)
         
         # Bind to port (use localhost for IPv4/IPv6 compatibility)
         server.add_insecure_port(f"0.0.0.0:{port}")
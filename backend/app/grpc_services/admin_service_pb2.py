@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: admin_service.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'admin_service.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13\x61\x64min_service.proto\x12\x0c\x61\x64minservice\"L\n\x0eProfileRequest\x12\x0f\n\x07seconds\x18\x01 \x01(\x01\x12\x13\n\x0binterval_ms\x18\x02 \x01(\x05\x12\x14\n\x0cinclude_idle\x18\x03 \x01(\x08\"`\n\x0fProfileResponse\x12\x11\n\tcollapsed\x18\x01 \x01(\t\x12\x0f\n\x07samples\x18\x02 \x01(\x05\x12\x18\n\x10\x64uration_seconds\x18\x03 \x01(\x01\x12\x0f\n\x07threads\x18\x04 \x01(\x05\".\n\x0e\x43hangesRequest\x12\r\n\x05since\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\"o\n\x0b\x43hangeEntry\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x0e\n\x06\x65ntity\x18\x02 \x01(\t\x12\x11\n\tentity_id\x18\x03 \x01(\x05\x12\n\n\x02op\x18\x04 \x01(\t\x12\x11\n\tdata_json\x18\x05 \x01(\t\x12\x12\n\ncreated_at\x18\x06 \x01(\x03\"_\n\x0f\x43hangesResponse\x12*\n\x07\x63hanges\x18\x01 \x03(\x0b\x32\x19.adminservice.ChangeEntry\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\t\x12\x10\n\x08has_more\x18\x03 \x01(\x08\x32\xa9\x01\n\x0c\x41\x64minService\x12M\n\x0e\x43\x61ptureProfile\x12\x1c.adminservice.ProfileRequest\x1a\x1d.adminservice.ProfileResponse\x12J\n\x0bListChanges\x12\x1c.adminservice.ChangesRequest\x1a\x1d.adminservice.ChangesResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'admin_service_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_PROFILEREQUEST']._serialized_start=37
+  _globals['_PROFILEREQUEST']._serialized_end=113
+  _globals['_PROFILERESPONSE']._serialized_start=115
+  _globals['_PROFILERESPONSE']._serialized_end=211
+  _globals['_CHANGESREQUEST']._serialized_start=213
+  _globals['_CHANGESREQUEST']._serialized_end=259
+  _globals['_CHANGEENTRY']._serialized_start=261
+  _globals['_CHANGEENTRY']._serialized_end=372
+  _globals['_CHANGESRESPONSE']._serialized_start=374
+  _globals['_CHANGESRESPONSE']._serialized_end=469
+  _globals['_ADMINSERVICE']._serialized_start=472
+  _globals['_ADMINSERVICE']._serialized_end=641
+# @@protoc_insertion_point(module_scope)
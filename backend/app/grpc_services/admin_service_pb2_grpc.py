@@ -0,0 +1,145 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from . import admin_service_pb2 as admin__service__pb2
+
+GRPC_GENERATED_VERSION = '1.76.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in admin_service_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class AdminServiceStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.CaptureProfile = channel.unary_unary(
+                '/adminservice.AdminService/CaptureProfile',
+                request_serializer=admin__service__pb2.ProfileRequest.SerializeToString,
+                response_deserializer=admin__service__pb2.ProfileResponse.FromString,
+                _registered_method=True)
+        self.ListChanges = channel.unary_unary(
+                '/adminservice.AdminService/ListChanges',
+                request_serializer=admin__service__pb2.ChangesRequest.SerializeToString,
+                response_deserializer=admin__service__pb2.ChangesResponse.FromString,
+                _registered_method=True)
+
+
+class AdminServiceServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def CaptureProfile(self, request, context):
+        """Sample every thread's stack for a while and return collapsed stacks.
+        course_audit_admin only: send "authorization: Bearer <access token>" metadata.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListChanges(self, request, context):
+        """Course, enrollment and grade changes after a cursor, as GET /api/changes.
+        course_audit_admin only. OUT_OF_RANGE when the changes after `since` were
+        already compacted: re-list, then start over with an empty `since`.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_AdminServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'CaptureProfile': grpc.unary_unary_rpc_method_handler(
+                    servicer.CaptureProfile,
+                    request_deserializer=admin__service__pb2.ProfileRequest.FromString,
+                    response_serializer=admin__service__pb2.ProfileResponse.SerializeToString,
+            ),
+            'ListChanges': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListChanges,
+                    request_deserializer=admin__service__pb2.ChangesRequest.FromString,
+                    response_serializer=admin__service__pb2.ChangesResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'adminservice.AdminService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('adminservice.AdminService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class AdminService(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def CaptureProfile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/adminservice.AdminService/CaptureProfile',
+            admin__service__pb2.ProfileRequest.SerializeToString,
+            admin__service__pb2.ProfileResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListChanges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/adminservice.AdminService/ListChanges',
+            admin__service__pb2.ChangesRequest.SerializeToString,
+            admin__service__pb2.ChangesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,80 @@
+"""gRPC Admin Service Implementation"""
+import json
+
+import grpc
+from . import admin_service_pb2, admin_service_pb2_grpc
+from .. import grpc_auth, outbox, profiler
+from ..pagination import InvalidCursor
+from ..database import SessionLocal
+from ..query_budget import query_budget
+
+
+class AdminServicer(admin_service_pb2_grpc.AdminServiceServicer):
+    """gRPC service for operational/diagnostic endpoints"""
+
+    @query_budget(statements=1, rows=1)
+    def CaptureProfile(self, request, context):
+        """Sample all threads and return collapsed stacks (course_audit_admin only)"""
+        db = SessionLocal()
+        try:
+            if grpc_auth.require_role(context, db, "course_audit_admin") is None:
+                return admin_service_pb2.ProfileResponse()
+        finally:
+            # Release the connection before the (long) capture.
+            db.close()
+
+        if request.seconds <= 0:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details("seconds must be positive")
+            return admin_service_pb2.ProfileResponse()
+        interval = request.interval_ms / 1000.0 if request.interval_ms > 0 else profiler.DEFAULT_INTERVAL
+        try:
+            profile = profiler.capture(request.seconds, interval, request.include_idle)
+        except profiler.ProfilerBusy as e:
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(str(e))
+            return admin_service_pb2.ProfileResponse()
+        return admin_service_pb2.ProfileResponse(
+            collapsed=profile.collapsed(),
+            samples=profile.samples,
+            duration_seconds=profile.duration,
+            threads=profile.threads,
+        )
+
+    @query_budget(statements=3, rows=102)
+    def ListChanges(self, request, context):
+        """Change log entries after a cursor (course_audit_admin only)"""
+        db = SessionLocal()
+        try:
+            if grpc_auth.require_role(context, db, "course_audit_admin") is None:
+                return admin_service_pb2.ChangesResponse()
+            changes, cursor, has_more = outbox.changes_since(db, request.since, request.limit)
+            return admin_service_pb2.ChangesResponse(
+                changes=[
+                    admin_service_pb2.ChangeEntry(
+                        id=c.id,
+                        entity=c.entity,
+                        entity_id=c.entity_id,
+                        op=c.op,
+                        data_json=json.dumps(c.data, separators=(",", ":")) if c.data is not None else "",
+                        created_at=int(c.created_at.timestamp()) if c.created_at else 0,
+                    )
+                    for c in changes
+                ],
+                cursor=cursor,
+                has_more=has_more,
+            )
+        except InvalidCursor as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return admin_service_pb2.ChangesResponse()
+        except outbox.CursorExpired as e:
+            context.set_code(grpc.StatusCode.OUT_OF_RANGE)
+            context.set_details(str(e))
+            return admin_service_pb2.ChangesResponse()
+        except outbox.Unsupported as e:
+            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+            context.set_details(str(e))
+            return admin_service_pb2.ChangesResponse()
+        finally:
+            db.close()
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x63ourse_service.proto\x12\rcourseservice\"\x07\n\x05\x45mpty\"\"\n\rCourseRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\"p\n\x0c\x43ourseRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\x12\n\ninstructor\x18\x04 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x05 \x01(\x05\x12\x12\n\ncreated_at\x18\x06 \x01(\x03\"N\n\x0f\x43oursesResponse\x12,\n\x07\x63ourses\x18\x01 \x03(\x0b\x32\x1b.courseservice.CourseRecord\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\"W\n\x13\x43ourseCreateRequest\x12\x0c\n\x04\x63ode\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x12\n\ninstructor\x18\x03 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x04 \x01(\x05\"c\n\x13\x43ourseUpdateRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\x12\n\ninstructor\x18\x04 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x05 \x01(\x05\"2\n\x0e\x44\x65leteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2\x8b\x03\n\rCourseService\x12\x43\n\x0bListCourses\x12\x14.courseservice.Empty\x1a\x1e.courseservice.CoursesResponse\x12\x46\n\tGetCourse\x12\x1c.courseservice.CourseRequest\x1a\x1b.courseservice.CourseRecord\x12O\n\x0c\x43reateCourse\x12\".courseservice.CourseCreateRequest\x1a\x1b.courseservice.CourseRecord\x12O\n\x0cUpdateCourse\x12\".courseservice.CourseUpdateRequest\x1a\x1b.courseservice.CourseRecord\x12K\n\x0c\x44\x65leteCourse\x12\x1c.courseservice.CourseRequest\x1a\x1d.courseservice.DeleteResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x63ourse_service.proto\x12\rcourseservice\"\x07\n\x05\x45mpty\"O\n\x12ListCoursesRequest\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\x12\x12\n\ninstructor\x18\x03 \x01(\t\"\"\n\rCourseRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\"p\n\x0c\x43ourseRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\x12\n\ninstructor\x18\x04 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x05 \x01(\x05\x12\x12\n\ncreated_at\x18\x06 \x01(\x03\"g\n\x0f\x43oursesResponse\x12,\n\x07\x63ourses\x18\x01 \x03(\x0b\x32\x1b.courseservice.CourseRecord\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12\x17\n\x0fnext_page_token\x18\x03 \x01(\t\"W\n\x13\x43ourseCreateRequest\x12\x0c\n\x04\x63ode\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x12\n\ninstructor\x18\x03 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x04 \x01(\x05\"c\n\x13\x43ourseUpdateRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\x12\n\ninstructor\x18\x04 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x05 \x01(\x05\"2\n\x0e\x44\x65leteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"c\n\x13\x43ourseRosterRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\x12\x11\n\tpage_size\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\x12\x12\n\nif_version\x18\x04 \x01(\t\"\xa5\x01\n\x0bRosterEntry\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\x12\x10\n\x08username\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x13\n\x0b\x65nrolled_at\x18\x04 \x01(\x03\x12\x10\n\x08grade_id\x18\x05 \x01(\x05\x12\x13\n\x0bgrade_value\x18\x06 \x01(\t\x12\x10\n\x08semester\x18\x07 \x01(\t\x12\x13\n\x0buploaded_at\x18\x08 \x01(\x03\"\x92\x01\n\x14\x43ourseRosterResponse\x12+\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x1a.courseservice.RosterEntry\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12\x17\n\x0fnext_page_token\x18\x03 \x01(\t\x12\x0f\n\x07version\x18\x04 \x01(\t\x12\x14\n\x0cnot_modified\x18\x05 \x01(\x08\";\n\x12\x43ourseStatsRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\x12\x12\n\nif_version\x18\x02 \x01(\t\"Q\n\x0bGradeBucket\x12\x13\n\x0bgrade_value\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12\x13\n\x06points\x18\x03 \x01(\x01H\x00\x88\x01\x01\x42\t\n\x07_points\"\xcd\x02\n\nGradeStats\x12\x10\n\x08semester\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12\x0e\n\x06graded\x18\x03 \x01(\x05\x12\x11\n\x04mean\x18\x04 \x01(\x01H\x00\x88\x01\x01\x12\x13\n\x06stddev\x18\x05 \x01(\x01H\x01\x88\x01\x01\x12\x10\n\x03min\x18\x06 \x01(\x01H\x02\x88\x01\x01\x12\x10\n\x03max\x18\x07 \x01(\x01H\x03\x88\x01\x01\x12\x10\n\x03p25\x18\x08 \x01(\x01H\x04\x88\x01\x01\x12\x13\n\x06median\x18\t \x01(\x01H\x05\x88\x01\x01\x12\x10\n\x03p75\x18\n \x01(\x01H\x06\x88\x01\x01\x12\x10\n\x03p90\x18\x0b \x01(\x01H\x07\x88\x01\x01\x12\x30\n\x0c\x64istribution\x18\x0c \x03(\x0b\x32\x1a.courseservice.GradeBucketB\x07\n\x05_meanB\t\n\x07_stddevB\x06\n\x04_minB\x06\n\x04_maxB\x06\n\x04_p25B\t\n\x07_medianB\x06\n\x04_p75B\x06\n\x04_p90\"\xa9\x01\n\x13\x43ourseStatsResponse\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\x12\x0f\n\x07version\x18\x02 \x01(\t\x12\x14\n\x0cnot_modified\x18\x03 \x01(\x08\x12*\n\x07overall\x18\x04 \x01(\x0b\x32\x19.courseservice.GradeStats\x12,\n\tsemesters\x18\x05 \x03(\x0b\x32\x19.courseservice.GradeStats\"+\n\x13WatchCoursesRequest\x12\x14\n\x0cresume_token\x18\x01 \x01(\t\"\xdc\x01\n\x0c\x43ourseChange\x12.\n\x04type\x18\x01 \x01(\x0e\x32 .courseservice.CourseChange.Type\x12+\n\x06\x63ourse\x18\x02 \x01(\x0b\x32\x1b.courseservice.CourseRecord\x12\x14\n\x0cresume_token\x18\x03 \x01(\t\"Y\n\x04Type\x12\x14\n\x10TYPE_UNSPECIFIED\x10\x00\x12\t\n\x05READY\x10\x01\x12\t\n\x05RESET\x10\x02\x12\x0b\n\x07\x43REATED\x10\x03\x12\x0b\n\x07UPDATED\x10\x04\x12\x0b\n\x07\x44\x45LETED\x10\x05\x32\xa6\x05\n\rCourseService\x12P\n\x0bListCourses\x12!.courseservice.ListCoursesRequest\x1a\x1e.courseservice.CoursesResponse\x12\x46\n\tGetCourse\x12\x1c.courseservice.CourseRequest\x1a\x1b.courseservice.CourseRecord\x12O\n\x0c\x43reateCourse\x12\".courseservice.CourseCreateRequest\x1a\x1b.courseservice.CourseRecord\x12O\n\x0cUpdateCourse\x12\".courseservice.CourseUpdateRequest\x1a\x1b.courseservice.CourseRecord\x12K\n\x0c\x44\x65leteCourse\x12\x1c.courseservice.CourseRequest\x1a\x1d.courseservice.DeleteResponse\x12Z\n\x0fGetCourseRoster\x12\".courseservice.CourseRosterRequest\x1a#.courseservice.CourseRosterResponse\x12W\n\x0eGetCourseStats\x12!.courseservice.CourseStatsRequest\x1a\".courseservice.CourseStatsResponse\x12W\n\x12WatchCourseChanges\x12\".courseservice.WatchCoursesRequest\x1a\x1b.courseservice.CourseChange0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,18 +33,40 @@ if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_EMPTY']._serialized_start=39
   _globals['_EMPTY']._serialized_end=46
-  _globals['_COURSEREQUEST']._serialized_start=48
-  _globals['_COURSEREQUEST']._serialized_end=82
-  _globals['_COURSERECORD']._serialized_start=84
-  _globals['_COURSERECORD']._serialized_end=196
-  _globals['_COURSESRESPONSE']._serialized_start=198
-  _globals['_COURSESRESPONSE']._serialized_end=276
-  _globals['_COURSECREATEREQUEST']._serialized_start=278
-  _globals['_COURSECREATEREQUEST']._serialized_end=365
-  _globals['_COURSEUPDATEREQUEST']._serialized_start=367
-  _globals['_COURSEUPDATEREQUEST']._serialized_end=466
-  _globals['_DELETERESPONSE']._serialized_start=468
-  _globals['_DELETERESPONSE']._serialized_end=518
-  _globals['_COURSESERVICE']._serialized_start=521
-  _globals['_COURSESERVICE']._serialized_end=916
+  _globals['_LISTCOURSESREQUEST']._serialized_start=48
+  _globals['_LISTCOURSESREQUEST']._serialized_end=127
+  _globals['_COURSEREQUEST']._serialized_start=129
+  _globals['_COURSEREQUEST']._serialized_end=163
+  _globals['_COURSERECORD']._serialized_start=165
+  _globals['_COURSERECORD']._serialized_end=277
+  _globals['_COURSESRESPONSE']._serialized_start=279
+  _globals['_COURSESRESPONSE']._serialized_end=382
+  _globals['_COURSECREATEREQUEST']._serialized_start=384
+  _globals['_COURSECREATEREQUEST']._serialized_end=471
+  _globals['_COURSEUPDATEREQUEST']._serialized_start=473
+  _globals['_COURSEUPDATEREQUEST']._serialized_end=572
+  _globals['_DELETERESPONSE']._serialized_start=574
+  _globals['_DELETERESPONSE']._serialized_end=624
+  _globals['_COURSEROSTERREQUEST']._serialized_start=626
+  _globals['_COURSEROSTERREQUEST']._serialized_end=725
+  _globals['_ROSTERENTRY']._serialized_start=728
+  _globals['_ROSTERENTRY']._serialized_end=893
+  _globals['_COURSEROSTERRESPONSE']._serialized_start=896
+  _globals['_COURSEROSTERRESPONSE']._serialized_end=1042
+  _globals['_COURSESTATSREQUEST']._serialized_start=1044
+  _globals['_COURSESTATSREQUEST']._serialized_end=1103
+  _globals['_GRADEBUCKET']._serialized_start=1105
+  _globals['_GRADEBUCKET']._serialized_end=1186
+  _globals['_GRADESTATS']._serialized_start=1189
+  _globals['_GRADESTATS']._serialized_end=1522
+  _globals['_COURSESTATSRESPONSE']._serialized_start=1525
+  _globals['_COURSESTATSRESPONSE']._serialized_end=1694
+  _globals['_WATCHCOURSESREQUEST']._serialized_start=1696
+  _globals['_WATCHCOURSESREQUEST']._serialized_end=1739
+  _globals['_COURSECHANGE']._serialized_start=1742
+  _globals['_COURSECHANGE']._serialized_end=1962
+  _globals['_COURSECHANGE_TYPE']._serialized_start=1873
+  _globals['_COURSECHANGE_TYPE']._serialized_end=1962
+  _globals['_COURSESERVICE']._serialized_start=1965
+  _globals['_COURSESERVICE']._serialized_end=2643
 # @@protoc_insertion_point(module_scope)
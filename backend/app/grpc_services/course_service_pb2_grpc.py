@@ -36,7 +36,7 @@ class CourseServiceStub(object):
         """
         self.ListCourses = channel.unary_unary(
                 '/courseservice.CourseService/ListCourses',
-                request_serializer=course__service__pb2.Empty.SerializeToString,
+                request_serializer=course__service__pb2.ListCoursesRequest.SerializeToString,
                 response_deserializer=course__service__pb2.CoursesResponse.FromString,
                 _registered_method=True)
         self.GetCourse = channel.unary_unary(
@@ -59,13 +59,28 @@ class CourseServiceStub(object):
                 request_serializer=course__service__pb2.CourseRequest.SerializeToString,
                 response_deserializer=course__service__pb2.DeleteResponse.FromString,
                 _registered_method=True)
+        self.GetCourseRoster = channel.unary_unary(
+                '/courseservice.CourseService/GetCourseRoster',
+                request_serializer=course__service__pb2.CourseRosterRequest.SerializeToString,
+                response_deserializer=course__service__pb2.CourseRosterResponse.FromString,
+                _registered_method=True)
+        self.GetCourseStats = channel.unary_unary(
+                '/courseservice.CourseService/GetCourseStats',
+                request_serializer=course__service__pb2.CourseStatsRequest.SerializeToString,
+                response_deserializer=course__service__pb2.CourseStatsResponse.FromString,
+                _registered_method=True)
+        self.WatchCourseChanges = channel.unary_stream(
+                '/courseservice.CourseService/WatchCourseChanges',
+                request_serializer=course__service__pb2.WatchCoursesRequest.SerializeToString,
+                response_deserializer=course__service__pb2.CourseChange.FromString,
+                _registered_method=True)
 
 
 class CourseServiceServicer(object):
     """Missing associated documentation comment in .proto file."""
 
     def ListCourses(self, request, context):
-        """List all courses
+        """List courses one keyset page at a time
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
@@ -99,12 +114,33 @@ class CourseServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetCourseRoster(self, request, context):
+        """Enrolled students with their current grade, keyset paged
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetCourseStats(self, request, context):
+        """Grade statistics, overall and per semester
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchCourseChanges(self, request, context):
+        """Course creates, updates and deletes as they happen
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CourseServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
             'ListCourses': grpc.unary_unary_rpc_method_handler(
                     servicer.ListCourses,
-                    request_deserializer=course__service__pb2.Empty.FromString,
+                    request_deserializer=course__service__pb2.ListCoursesRequest.FromString,
                     response_serializer=course__service__pb2.CoursesResponse.SerializeToString,
             ),
             'GetCourse': grpc.unary_unary_rpc_method_handler(
@@ -127,6 +163,21 @@ def add_CourseServiceServicer_to_server(servicer, server):
                     request_deserializer=course__service__pb2.CourseRequest.FromString,
                     response_serializer=course__service__pb2.DeleteResponse.SerializeToString,
             ),
+            'GetCourseRoster': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetCourseRoster,
+                    request_deserializer=course__service__pb2.CourseRosterRequest.FromString,
+                    response_serializer=course__service__pb2.CourseRosterResponse.SerializeToString,
+            ),
+            'GetCourseStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetCourseStats,
+                    request_deserializer=course__service__pb2.CourseStatsRequest.FromString,
+                    response_serializer=course__service__pb2.CourseStatsResponse.SerializeToString,
+            ),
+            'WatchCourseChanges': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchCourseChanges,
+                    request_deserializer=course__service__pb2.WatchCoursesRequest.FromString,
+                    response_serializer=course__service__pb2.CourseChange.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'courseservice.CourseService', rpc_method_handlers)
@@ -153,7 +204,7 @@ class CourseService(object):
             request,
             target,
             '/courseservice.CourseService/ListCourses',
-            course__service__pb2.Empty.SerializeToString,
+            course__service__pb2.ListCoursesRequest.SerializeToString,
             course__service__pb2.CoursesResponse.FromString,
             options,
             channel_credentials,
@@ -272,3 +323,84 @@ class CourseService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetCourseRoster(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/courseservice.CourseService/GetCourseRoster',
+            course__service__pb2.CourseRosterRequest.SerializeToString,
+            course__service__pb2.CourseRosterResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetCourseStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/courseservice.CourseService/GetCourseStats',
+            course__service__pb2.CourseStatsRequest.SerializeToString,
+            course__service__pb2.CourseStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchCourseChanges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/courseservice.CourseService/WatchCourseChanges',
+            course__service__pb2.WatchCoursesRequest.SerializeToString,
+            course__service__pb2.CourseChange.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,21 +1,31 @@
 """gRPC Course Service Implementation"""
 import grpc
+from datetime import datetime
 from . import course_service_pb2, course_service_pb2_grpc
 from ..crud import (
-    get_courses, get_course, create_course, update_course, delete_course
+    create_course, update_course, delete_course, get_course_version_tag
 )
-from .. import schemas
+from .. import schemas, read_models, course_stats, grpc_watch
+from ..events import COURSES_TOPIC, hub
+from ..pagination import InvalidCursor
 from ..database import SessionLocal
+from ..query_budget import query_budget
 
 
 class CourseServicer(course_service_pb2_grpc.CourseServiceServicer):
     """gRPC service for course operations"""
 
+    @query_budget(statements=1, rows=21)
     def ListCourses(self, request, context):
-        """List all courses"""
+        """List courses one keyset page at a time"""
         db = SessionLocal()
         try:
-            courses = get_courses(db)
+            courses, next_cursor = read_models.list_courses_page(
+                db,
+                limit=request.page_size,
+                cursor=request.page_token,
+                instructor=request.instructor or None,
+            )
             course_records = []
             for c in courses:
                 course_records.append(
@@ -28,7 +38,13 @@ class CourseServicer(course_service_pb2_grpc.CourseServiceServicer):
                         created_at=int(c.created_at.timestamp()) if c.created_at else 0,
                     )
                 )
-            return course_service_pb2.CoursesResponse(courses=course_records, count=len(course_records))
+            return course_service_pb2.CoursesResponse(
+                courses=course_records, count=len(course_records), next_page_token=next_cursor or ""
+            )
+        except InvalidCursor as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return course_service_pb2.CoursesResponse()
         except Exception as e:
             context.set_details(f"Error retrieving courses: {str(e)}")
             context.set_code(grpc.StatusCode.INTERNAL)
@@ -36,11 +52,12 @@ class CourseServicer(course_service_pb2_grpc.CourseServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=1, rows=1)
     def GetCourse(self, request, context):
         """Get a specific course by ID"""
         db = SessionLocal()
         try:
-            course = get_course(db, request.course_id)
+            course = read_models.get_course(db, request.course_id)
             if not course:
                 context.set_details("Course not found")
                 context.set_code(grpc.StatusCode.NOT_FOUND)
@@ -61,6 +78,7 @@ class CourseServicer(course_service_pb2_grpc.CourseServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=3, rows=1)
     def CreateCourse(self, request, context):
         """Create a new course"""
         db = SessionLocal()
@@ -87,6 +105,7 @@ class CourseServicer(course_service_pb2_grpc.CourseServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=4, rows=2)
     def UpdateCourse(self, request, context):
         """Update an existing course"""
         db = SessionLocal()
@@ -118,6 +137,7 @@ class CourseServicer(course_service_pb2_grpc.CourseServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=6, rows=1)
     def DeleteCourse(self, request, context):
         """Delete a course"""
         db = SessionLocal()
@@ -136,3 +156,118 @@ class CourseServicer(course_service_pb2_grpc.CourseServiceServicer):
             return course_service_pb2.DeleteResponse(success=False, message=str(e))
         finally:
             db.close()
+
+    @query_budget(statements=2, rows=22)
+    def GetCourseRoster(self, request, context):
+        """Enrolled students with their current grade"""
+        db = SessionLocal()
+        try:
+            tag = get_course_version_tag(db, request.course_id)
+            if tag is None:
+                context.set_details("Course not found")
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                return course_service_pb2.CourseRosterResponse()
+            if request.if_version and request.if_version == tag:
+                return course_service_pb2.CourseRosterResponse(version=tag, not_modified=True)
+
+            rows, next_cursor = read_models.course_roster_page(
+                db, request.course_id, limit=request.page_size, cursor=request.page_token
+            )
+            entries = [
+                course_service_pb2.RosterEntry(
+                    student_id=r.student_id,
+                    username=r.username,
+                    email=r.email or "",
+                    enrolled_at=int(r.enrolled_at.timestamp()) if r.enrolled_at else 0,
+                    grade_id=r.grade_id or 0,
+                    grade_value=r.grade_value or "",
+                    semester=r.semester or "",
+                    uploaded_at=int(r.uploaded_at.timestamp()) if r.uploaded_at else 0,
+                )
+                for r in rows
+            ]
+            return course_service_pb2.CourseRosterResponse(
+                entries=entries, count=len(entries), next_page_token=next_cursor or "", version=tag
+            )
+        except InvalidCursor as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return course_service_pb2.CourseRosterResponse()
+        except Exception as e:
+            context.set_details(f"Error retrieving roster: {str(e)}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return course_service_pb2.CourseRosterResponse()
+        finally:
+            db.close()
+
+    @query_budget(statements=2, rows=11)
+    def GetCourseStats(self, request, context):
+        """Grade statistics for a course, cached until its grades change"""
+        db = SessionLocal()
+        try:
+            version = course_stats.grades_version(db, request.course_id)
+            if version is None:
+                context.set_details("Course not found")
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                return course_service_pb2.CourseStatsResponse()
+            tag = course_stats.version_tag(request.course_id, version)
+            if request.if_version and request.if_version == tag:
+                return course_service_pb2.CourseStatsResponse(
+                    course_id=request.course_id, version=tag, not_modified=True
+                )
+
+            stats = course_stats.get_course_stats(db, request.course_id, version)
+            return course_service_pb2.CourseStatsResponse(
+                course_id=request.course_id,
+                version=tag,
+                overall=_grade_stats_message(stats["overall"]),
+                semesters=[_grade_stats_message(s) for s in stats["semesters"]],
+            )
+        except Exception as e:
+            context.set_details(f"Error retrieving course stats: {str(e)}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return course_service_pb2.CourseStatsResponse()
+        finally:
+            db.close()
+
+    @query_budget(statements=0, rows=0)
+    def WatchCourseChanges(self, request, context):
+        """Course creates, updates and deletes as they happen"""
+        return grpc_watch.watch(context, hub, [COURSES_TOPIC], request.resume_token, _course_change)
+
+
+_COURSE_CHANGE_TYPES = {
+    "ready": course_service_pb2.CourseChange.READY,
+    "reset": course_service_pb2.CourseChange.RESET,
+    "created": course_service_pb2.CourseChange.CREATED,
+    "updated": course_service_pb2.CourseChange.UPDATED,
+    "deleted": course_service_pb2.CourseChange.DELETED,
+}
+
+
+def _course_change(kind, data, token):
+    change = course_service_pb2.CourseChange(type=_COURSE_CHANGE_TYPES[kind], resume_token=token)
+    if kind == "deleted":
+        change.course.id = data["id"]
+    elif data is not None:
+        change.course.CopyFrom(course_service_pb2.CourseRecord(
+            id=data["id"],
+            code=data["code"],
+            name=data["name"],
+            instructor=data["instructor"] or "",
+            capacity=data["capacity"],
+            created_at=int(datetime.fromisoformat(data["created_at"]).timestamp()) if data["created_at"] else 0,
+        ))
+    return change
+
+
+def _grade_stats_message(stats: dict):
+    # Optional fields stay unset rather than 0 when there is nothing to report.
+    fields = {k: v for k, v in stats.items() if k != "distribution" and v is not None}
+    return course_service_pb2.GradeStats(
+        **fields,
+        distribution=[
+            course_service_pb2.GradeBucket(**{k: v for k, v in b.items() if v is not None})
+            for b in stats["distribution"]
+        ],
+    )
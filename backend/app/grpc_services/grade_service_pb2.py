@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13grade_service.proto\x12\x0cgradeservice\"&\n\x10GetGradesRequest\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\"\xa9\x01\n\x0bGradeRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x12\n\nstudent_id\x18\x02 \x01(\x05\x12\x11\n\tcourse_id\x18\x03 \x01(\x05\x12\x13\n\x0bgrade_value\x18\x04 \x01(\t\x12\x13\n\x0b\x63ourse_code\x18\x05 \x01(\t\x12\x13\n\x0b\x63ourse_name\x18\x06 \x01(\t\x12\x13\n\x0buploaded_at\x18\x07 \x01(\x03\x12\x13\n\x0buploaded_by\x18\x08 \x01(\x05\"J\n\x0eGradesResponse\x12)\n\x06grades\x18\x01 \x03(\x0b\x32\x19.gradeservice.GradeRecord\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\"h\n\x13UploadGradesRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\x12\x13\n\x0buploaded_by\x18\x02 \x01(\x05\x12)\n\x07\x65ntries\x18\x03 \x03(\x0b\x32\x18.gradeservice.GradeEntry\"5\n\nGradeEntry\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\x12\x13\n\x0bgrade_value\x18\x02 \x01(\t\"O\n\x14UploadGradesResponse\x12\x15\n\rcreated_count\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07message\x18\x03 \x01(\t\"/\n\x19GetGradesByStudentRequest\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\x32\x94\x02\n\x0cGradeService\x12P\n\x10GetStudentGrades\x12\x1e.gradeservice.GetGradesRequest\x1a\x1c.gradeservice.GradesResponse\x12U\n\x0cUploadGrades\x12!.gradeservice.UploadGradesRequest\x1a\".gradeservice.UploadGradesResponse\x12[\n\x13StreamStudentGrades\x12\'.gradeservice.GetGradesByStudentRequest\x1a\x19.gradeservice.GradeRecord0\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13grade_service.proto\x12\x0cgradeservice\"&\n\x10GetGradesRequest\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\"\xa9\x01\n\x0bGradeRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x12\n\nstudent_id\x18\x02 \x01(\x05\x12\x11\n\tcourse_id\x18\x03 \x01(\x05\x12\x13\n\x0bgrade_value\x18\x04 \x01(\t\x12\x13\n\x0b\x63ourse_code\x18\x05 \x01(\t\x12\x13\n\x0b\x63ourse_name\x18\x06 \x01(\t\x12\x13\n\x0buploaded_at\x18\x07 \x01(\x03\x12\x13\n\x0buploaded_by\x18\x08 \x01(\x05\"J\n\x0eGradesResponse\x12)\n\x06grades\x18\x01 \x03(\x0b\x32\x19.gradeservice.GradeRecord\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\"h\n\x13UploadGradesRequest\x12\x11\n\tcourse_id\x18\x01 \x01(\x05\x12\x13\n\x0buploaded_by\x18\x02 \x01(\x05\x12)\n\x07\x65ntries\x18\x03 \x03(\x0b\x32\x18.gradeservice.GradeEntry\"5\n\nGradeEntry\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\x12\x13\n\x0bgrade_value\x18\x02 \x01(\t\"O\n\x14UploadGradesResponse\x12\x15\n\rcreated_count\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07message\x18\x03 \x01(\t\"/\n\x19GetGradesByStudentRequest\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\">\n\x12WatchGradesRequest\x12\x12\n\nstudent_id\x18\x01 \x01(\x05\x12\x14\n\x0cresume_token\x18\x02 \x01(\t\"\xba\x01\n\x0bGradeChange\x12,\n\x04type\x18\x01 \x01(\x0e\x32\x1e.gradeservice.GradeChange.Type\x12(\n\x05grade\x18\x02 \x01(\x0b\x32\x19.gradeservice.GradeRecord\x12\x14\n\x0cresume_token\x18\x03 \x01(\t\"=\n\x04Type\x12\x14\n\x10TYPE_UNSPECIFIED\x10\x00\x12\t\n\x05READY\x10\x01\x12\t\n\x05RESET\x10\x02\x12\t\n\x05GRADE\x10\x03\x32\xe2\x02\n\x0cGradeService\x12P\n\x10GetStudentGrades\x12\x1e.gradeservice.GetGradesRequest\x1a\x1c.gradeservice.GradesResponse\x12U\n\x0cUploadGrades\x12!.gradeservice.UploadGradesRequest\x1a\".gradeservice.UploadGradesResponse\x12[\n\x13StreamStudentGrades\x12\'.gradeservice.GetGradesByStudentRequest\x1a\x19.gradeservice.GradeRecord0\x01\x12L\n\x0bWatchGrades\x12 .gradeservice.WatchGradesRequest\x1a\x19.gradeservice.GradeChange0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -45,6 +45,12 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_UPLOADGRADESRESPONSE']._serialized_end=565
   _globals['_GETGRADESBYSTUDENTREQUEST']._serialized_start=567
   _globals['_GETGRADESBYSTUDENTREQUEST']._serialized_end=614
-  _globals['_GRADESERVICE']._serialized_start=617
-  _globals['_GRADESERVICE']._serialized_end=893
+  _globals['_WATCHGRADESREQUEST']._serialized_start=616
+  _globals['_WATCHGRADESREQUEST']._serialized_end=678
+  _globals['_GRADECHANGE']._serialized_start=681
+  _globals['_GRADECHANGE']._serialized_end=867
+  _globals['_GRADECHANGE_TYPE']._serialized_start=806
+  _globals['_GRADECHANGE_TYPE']._serialized_end=867
+  _globals['_GRADESERVICE']._serialized_start=870
+  _globals['_GRADESERVICE']._serialized_end=1224
 # @@protoc_insertion_point(module_scope)
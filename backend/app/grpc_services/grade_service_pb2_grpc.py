@@ -49,6 +49,11 @@ class GradeServiceStub(object):
                 request_serializer=grade__service__pb2.GetGradesByStudentRequest.SerializeToString,
                 response_deserializer=grade__service__pb2.GradeRecord.FromString,
                 _registered_method=True)
+        self.WatchGrades = channel.unary_stream(
+                '/gradeservice.GradeService/WatchGrades',
+                request_serializer=grade__service__pb2.WatchGradesRequest.SerializeToString,
+                response_deserializer=grade__service__pb2.GradeChange.FromString,
+                _registered_method=True)
 
 
 class GradeServiceServicer(object):
@@ -75,6 +80,13 @@ class GradeServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def WatchGrades(self, request, context):
+        """New and changed grades as they are uploaded
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GradeServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -93,6 +105,11 @@ def add_GradeServiceServicer_to_server(servicer, server):
                     request_deserializer=grade__service__pb2.GetGradesByStudentRequest.FromString,
                     response_serializer=grade__service__pb2.GradeRecord.SerializeToString,
             ),
+            'WatchGrades': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchGrades,
+                    request_deserializer=grade__service__pb2.WatchGradesRequest.FromString,
+                    response_serializer=grade__service__pb2.GradeChange.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'gradeservice.GradeService', rpc_method_handlers)
@@ -184,3 +201,30 @@ class GradeService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def WatchGrades(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/gradeservice.GradeService/WatchGrades',
+            grade__service__pb2.WatchGradesRequest.SerializeToString,
+            grade__service__pb2.GradeChange.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,19 +1,23 @@
 """gRPC Grade Service Implementation"""
 import grpc
 from . import grade_service_pb2, grade_service_pb2_grpc
-from ..crud import get_grades_for_student, upload_grades
+from ..crud import upload_grades
+from .. import grpc_watch, read_models
+from ..events import GRADES_TOPIC, hub, student_grades_topic
 from ..database import SessionLocal
+from ..query_budget import query_budget
 from datetime import datetime
 
 
 class GradeServicer(grade_service_pb2_grpc.GradeServiceServicer):
     """gRPC service for grade operations"""
 
+    @query_budget(statements=1, rows=10)
     def GetStudentGrades(self, request, context):
         """Get all grades for a specific student"""
         db = SessionLocal()
         try:
-            grades = get_grades_for_student(db, student_id=request.student_id)
+            grades = read_models.grades_for_student(db, student_id=request.student_id)
             if not grades:
                 return grade_service_pb2.GradesResponse(grades=[], count=0)
             
@@ -25,8 +29,8 @@ class GradeServicer(grade_service_pb2_grpc.GradeServiceServicer):
                         student_id=g.student_id,
                         course_id=g.course_id,
                         grade_value=g.grade_value,
-                        course_code=g.course.code if g.course else "",
-                        course_name=g.course.name if g.course else "",
+                        course_code=g.course_code or "",
+                        course_name=g.course_name or "",
                         uploaded_at=int(g.uploaded_at.timestamp()) if g.uploaded_at else 0,
                         uploaded_by=g.uploaded_by or 0,
                     )
@@ -39,12 +43,15 @@ class GradeServicer(grade_service_pb2_grpc.GradeServiceServicer):
         finally:
             db.close()
 
+    # Two lookups per entry in crud.upload_grades, plus the students' grade groups
+    # for their summaries; this is for a 10-entry batch.
+    @query_budget(statements=32, rows=50)
     def UploadGrades(self, request, context):
         """Upload/create grades for a course"""
         db = SessionLocal()
         try:
             entries = [
-                {"studentId": str(e.student_id), "grade": e.grade_value}
+                {"student_id": e.student_id, "grade_value": e.grade_value}
                 for e in request.entries
             ]
             created = upload_grades(
@@ -68,19 +75,20 @@ class GradeServicer(grade_service_pb2_grpc.GradeServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=1, rows=10)
     def StreamStudentGrades(self, request, context):
         """Stream grades for a student (for large datasets)"""
         db = SessionLocal()
         try:
-            grades = get_grades_for_student(db, student_id=request.student_id)
+            grades = read_models.grades_for_student(db, student_id=request.student_id)
             for g in grades:
                 yield grade_service_pb2.GradeRecord(
                     id=g.id,
                     student_id=g.student_id,
                     course_id=g.course_id,
                     grade_value=g.grade_value,
-                    course_code=g.course.code if g.course else "",
-                    course_name=g.course.name if g.course else "",
+                    course_code=g.course_code or "",
+                    course_name=g.course_name or "",
                     uploaded_at=int(g.uploaded_at.timestamp()) if g.uploaded_at else 0,
                     uploaded_by=g.uploaded_by or 0,
                 )
@@ -89,3 +97,30 @@ class GradeServicer(grade_service_pb2_grpc.GradeServiceServicer):
             context.set_code(grpc.StatusCode.INTERNAL)
         finally:
             db.close()
+
+    @query_budget(statements=0, rows=0)
+    def WatchGrades(self, request, context):
+        """New and changed grades of one student, or of all (`student_id` 0)"""
+        topic = student_grades_topic(request.student_id) if request.student_id else GRADES_TOPIC
+        return grpc_watch.watch(context, hub, [topic], request.resume_token, _grade_change)
+
+
+_GRADE_CHANGE_TYPES = {
+    "ready": grade_service_pb2.GradeChange.READY,
+    "reset": grade_service_pb2.GradeChange.RESET,
+    "grade": grade_service_pb2.GradeChange.GRADE,
+}
+
+
+def _grade_change(kind, data, token):
+    change = grade_service_pb2.GradeChange(type=_GRADE_CHANGE_TYPES[kind], resume_token=token)
+    if data is not None:
+        change.grade.CopyFrom(grade_service_pb2.GradeRecord(
+            id=data["id"],
+            student_id=data["student_id"],
+            course_id=data["course_id"],
+            grade_value=data["grade_value"],
+            uploaded_at=int(datetime.fromisoformat(data["uploaded_at"]).timestamp()) if data["uploaded_at"] else 0,
+            uploaded_by=data["uploaded_by"] or 0,
+        ))
+    return change
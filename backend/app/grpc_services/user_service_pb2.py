@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12user_service.proto\x12\x0buserservice\"\x07\n\x05\x45mpty\"1\n\x0b\x41uthRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"f\n\x0c\x41uthResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12%\n\x04user\x18\x02 \x01(\x0b\x32\x17.userservice.UserRecord\x12\r\n\x05token\x18\x03 \x01(\t\x12\x0f\n\x07message\x18\x04 \x01(\t\"\x1e\n\x0bUserRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\"T\n\x11\x43reateUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x10\n\x08password\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\"[\n\nUserRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x10\n\x08username\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x12\n\ncreated_at\x18\x05 \x01(\x03\"F\n\rUsersResponse\x12&\n\x05users\x18\x01 \x03(\x0b\x32\x17.userservice.UserRecord\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x32\x98\x02\n\x0bUserService\x12G\n\x10\x41uthenticateUser\x12\x18.userservice.AuthRequest\x1a\x19.userservice.AuthResponse\x12<\n\x07GetUser\x12\x18.userservice.UserRequest\x1a\x17.userservice.UserRecord\x12;\n\tListUsers\x12\x12.userservice.Empty\x1a\x1a.userservice.UsersResponse\x12\x45\n\nCreateUser\x12\x1e.userservice.CreateUserRequest\x1a\x17.userservice.UserRecordb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12user_service.proto\x12\x0buserservice\"\x07\n\x05\x45mpty\"1\n\x0b\x41uthRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"f\n\x0c\x41uthResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12%\n\x04user\x18\x02 \x01(\x0b\x32\x17.userservice.UserRecord\x12\r\n\x05token\x18\x03 \x01(\t\x12\x0f\n\x07message\x18\x04 \x01(\t\"G\n\x10ListUsersRequest\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\x12\x0c\n\x04role\x18\x03 \x01(\t\"@\n\x12SearchUsersRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x0c\n\x04role\x18\x02 \x01(\t\x12\r\n\x05limit\x18\x03 \x01(\x05\"\x1e\n\x0bUserRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\"T\n\x11\x43reateUserRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x10\n\x08password\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\"[\n\nUserRecord\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x10\n\x08username\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x12\n\ncreated_at\x18\x05 \x01(\x03\"_\n\rUsersResponse\x12&\n\x05users\x18\x01 \x03(\x0b\x32\x17.userservice.UserRecord\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12\x17\n\x0fnext_page_token\x18\x03 \x01(\t2\xef\x02\n\x0bUserService\x12G\n\x10\x41uthenticateUser\x12\x18.userservice.AuthRequest\x1a\x19.userservice.AuthResponse\x12<\n\x07GetUser\x12\x18.userservice.UserRequest\x1a\x17.userservice.UserRecord\x12\x46\n\tListUsers\x12\x1d.userservice.ListUsersRequest\x1a\x1a.userservice.UsersResponse\x12J\n\x0bSearchUsers\x12\x1f.userservice.SearchUsersRequest\x1a\x1a.userservice.UsersResponse\x12\x45\n\nCreateUser\x12\x1e.userservice.CreateUserRequest\x1a\x17.userservice.UserRecordb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -37,14 +37,18 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_AUTHREQUEST']._serialized_end=93
   _globals['_AUTHRESPONSE']._serialized_start=95
   _globals['_AUTHRESPONSE']._serialized_end=197
-  _globals['_USERREQUEST']._serialized_start=199
-  _globals['_USERREQUEST']._serialized_end=229
-  _globals['_CREATEUSERREQUEST']._serialized_start=231
-  _globals['_CREATEUSERREQUEST']._serialized_end=315
-  _globals['_USERRECORD']._serialized_start=317
-  _globals['_USERRECORD']._serialized_end=408
-  _globals['_USERSRESPONSE']._serialized_start=410
-  _globals['_USERSRESPONSE']._serialized_end=480
-  _globals['_USERSERVICE']._serialized_start=483
-  _globals['_USERSERVICE']._serialized_end=763
+  _globals['_LISTUSERSREQUEST']._serialized_start=199
+  _globals['_LISTUSERSREQUEST']._serialized_end=270
+  _globals['_SEARCHUSERSREQUEST']._serialized_start=272
+  _globals['_SEARCHUSERSREQUEST']._serialized_end=336
+  _globals['_USERREQUEST']._serialized_start=338
+  _globals['_USERREQUEST']._serialized_end=368
+  _globals['_CREATEUSERREQUEST']._serialized_start=370
+  _globals['_CREATEUSERREQUEST']._serialized_end=454
+  _globals['_USERRECORD']._serialized_start=456
+  _globals['_USERRECORD']._serialized_end=547
+  _globals['_USERSRESPONSE']._serialized_start=549
+  _globals['_USERSRESPONSE']._serialized_end=644
+  _globals['_USERSERVICE']._serialized_start=647
+  _globals['_USERSERVICE']._serialized_end=1014
 # @@protoc_insertion_point(module_scope)
@@ -46,7 +46,12 @@ class UserServiceStub(object):
                 _registered_method=True)
         self.ListUsers = channel.unary_unary(
                 '/userservice.UserService/ListUsers',
-                request_serializer=user__service__pb2.Empty.SerializeToString,
+                request_serializer=user__service__pb2.ListUsersRequest.SerializeToString,
+                response_deserializer=user__service__pb2.UsersResponse.FromString,
+                _registered_method=True)
+        self.SearchUsers = channel.unary_unary(
+                '/userservice.UserService/SearchUsers',
+                request_serializer=user__service__pb2.SearchUsersRequest.SerializeToString,
                 response_deserializer=user__service__pb2.UsersResponse.FromString,
                 _registered_method=True)
         self.CreateUser = channel.unary_unary(
@@ -74,7 +79,14 @@ class UserServiceServicer(object):
         raise NotImplementedError('Method not implemented!')
 
     def ListUsers(self, request, context):
-        """List all users
+        """List users one keyset page at a time
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchUsers(self, request, context):
+        """Typeahead search by username prefix, then username/email substring
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
@@ -102,7 +114,12 @@ def add_UserServiceServicer_to_server(servicer, server):
             ),
             'ListUsers': grpc.unary_unary_rpc_method_handler(
                     servicer.ListUsers,
-                    request_deserializer=user__service__pb2.Empty.FromString,
+                    request_deserializer=user__service__pb2.ListUsersRequest.FromString,
+                    response_serializer=user__service__pb2.UsersResponse.SerializeToString,
+            ),
+            'SearchUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchUsers,
+                    request_deserializer=user__service__pb2.SearchUsersRequest.FromString,
                     response_serializer=user__service__pb2.UsersResponse.SerializeToString,
             ),
             'CreateUser': grpc.unary_unary_rpc_method_handler(
@@ -190,7 +207,34 @@ class UserService(object):
             request,
             target,
             '/userservice.UserService/ListUsers',
-            user__service__pb2.Empty.SerializeToString,
+            user__service__pb2.ListUsersRequest.SerializeToString,
+            user__service__pb2.UsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/userservice.UserService/SearchUsers',
+            user__service__pb2.SearchUsersRequest.SerializeToString,
             user__service__pb2.UsersResponse.FromString,
             options,
             channel_credentials,
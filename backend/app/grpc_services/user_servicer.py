@@ -2,15 +2,18 @@
 import grpc
 from . import user_service_pb2, user_service_pb2_grpc
 from ..crud import (
-    get_user_by_id, get_user_by_username, authenticate_user, create_user, get_all_users, create_access_token
+    authenticate_user, create_user, create_access_token
 )
-from .. import schemas
+from .. import schemas, search, read_models
+from ..pagination import InvalidCursor
 from ..database import SessionLocal
+from ..query_budget import query_budget
 
 
 class UserServicer(user_service_pb2_grpc.UserServiceServicer):
     """gRPC service for user operations"""
 
+    @query_budget(statements=3, rows=2)
     def AuthenticateUser(self, request, context):
         """Authenticate a user with username and password"""
         db = SessionLocal()
@@ -45,11 +48,12 @@ class UserServicer(user_service_pb2_grpc.UserServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=1, rows=1)
     def GetUser(self, request, context):
         """Get a specific user by ID"""
         db = SessionLocal()
         try:
-            user = get_user_by_id(db, request.user_id)
+            user = read_models.get_user(db, request.user_id)
             if not user:
                 context.set_details("User not found")
                 context.set_code(grpc.StatusCode.NOT_FOUND)
@@ -69,11 +73,17 @@ class UserServicer(user_service_pb2_grpc.UserServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=1, rows=21)
     def ListUsers(self, request, context):
-        """List all users"""
+        """List users one keyset page at a time"""
         db = SessionLocal()
         try:
-            users = get_all_users(db)
+            users, next_cursor = read_models.list_users_page(
+                db,
+                limit=request.page_size,
+                cursor=request.page_token,
+                role=request.role or None,
+            )
             user_records = []
             for u in users:
                 user_records.append(
@@ -85,7 +95,13 @@ class UserServicer(user_service_pb2_grpc.UserServiceServicer):
                         created_at=int(u.created_at.timestamp()) if u.created_at else 0,
                     )
                 )
-            return user_service_pb2.UsersResponse(users=user_records, count=len(user_records))
+            return user_service_pb2.UsersResponse(
+                users=user_records, count=len(user_records), next_page_token=next_cursor or ""
+            )
+        except InvalidCursor as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return user_service_pb2.UsersResponse()
         except Exception as e:
             context.set_details(f"Error retrieving users: {str(e)}")
             context.set_code(grpc.StatusCode.INTERNAL)
@@ -93,6 +109,31 @@ class UserServicer(user_service_pb2_grpc.UserServiceServicer):
         finally:
             db.close()
 
+    @query_budget(statements=3, rows=21)
+    def SearchUsers(self, request, context):
+        """Typeahead search over users"""
+        db = SessionLocal()
+        try:
+            users = search.search_users(db, request.query, role=request.role or None, limit=request.limit)
+            user_records = [
+                user_service_pb2.UserRecord(
+                    id=u.id,
+                    username=u.username,
+                    email=u.email or "",
+                    role=u.role,
+                    created_at=int(u.created_at.timestamp()) if u.created_at else 0,
+                )
+                for u in users
+            ]
+            return user_service_pb2.UsersResponse(users=user_records, count=len(user_records))
+        except Exception as e:
+            context.set_details(f"Error searching users: {str(e)}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return user_service_pb2.UsersResponse()
+        finally:
+            db.close()
+
+    @query_budget(statements=2, rows=1)
     def CreateUser(self, request, context):
         """Create a new user"""
         db = SessionLocal()
@@ -0,0 +1,113 @@
+"""Server-streaming watch RPCs over the in-process event hub (`events.py`).
+
+`WatchCourseChanges` and `WatchGrades` are the gRPC counterpart of the SSE
+grade stream: one hub subscription per call, fed by the write paths, so any
+number of watchers costs no database work. `watch` runs the stream:
+
+- the first message is READY (with the current resume token) for a new
+  watcher, or RESET when the token it sent is from another server lifetime or
+  its changes are no longer in the replay buffer; otherwise the missed changes
+  come first;
+- a watcher whose queue fills up (`EVENTS_QUEUE_SIZE`) is ended with ABORTED
+  and is expected to resume from its last token;
+- the subscription is closed as soon as the call ends, cancelled or not.
+
+The gRPC server is synchronous, so an open watch holds an executor thread
+(blocked, not polling). `grpc_server` sizes the executor for
+`GRPC_MAX_WATCHES` watches on top of `GRPC_MAX_WORKERS`, and `watch` refuses
+more than that with RESOURCE_EXHAUSTED, so watchers never take the threads
+unary calls need.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+import grpc
+
+from . import config, metrics
+from .events import Event, EventHub
+
+OPEN_WATCHES = metrics.gauge("grpc_open_watches", "Open gRPC watch streams.")
+REJECTED = metrics.counter("grpc_watches_rejected_total", "Watch calls refused at GRPC_MAX_WATCHES.")
+
+# How often an idle watch checks that its call is still active; cancellation
+# normally wakes it right away.
+_IDLE_CHECK_SECONDS = 30
+
+_open = 0
+_open_lock = threading.Lock()
+
+_MESSAGE_CACHE_SIZE = 1024
+_messages: "OrderedDict[tuple, object]" = OrderedDict()
+_messages_lock = threading.Lock()
+
+
+def _acquire_slot() -> bool:
+    global _open
+    with _open_lock:
+        if _open >= config.GRPC_MAX_WATCHES:
+            REJECTED.inc()
+            return False
+        _open += 1
+    OPEN_WATCHES.inc()
+    return True
+
+
+def _release_slot() -> None:
+    global _open
+    with _open_lock:
+        _open -= 1
+    OPEN_WATCHES.dec()
+
+
+def _event_message(message, hub: EventHub, event: Event):
+    # Every watcher of a topic sends the same message for an event: build it once.
+    key = (message, id(hub), event.seq)
+    with _messages_lock:
+        response = _messages.get(key)
+    if response is None:
+        response = message(event.kind, event.data, hub.token(event.seq))
+        with _messages_lock:
+            _messages[key] = response
+            if len(_messages) > _MESSAGE_CACHE_SIZE:
+                _messages.popitem(last=False)
+    return response
+
+
+def watch(context, hub: EventHub, topics: Iterable[str], resume_token: str,
+          message: Callable[[str, Optional[dict], str], object]):
+    """Generator of watch messages for `topics`, resuming after `resume_token`.
+
+    `message(kind, data, token)` builds one response: `kind` is "ready" or
+    "reset" (with `data` None) or the kind of a hub event.
+    """
+    if not _acquire_slot():
+        context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+        context.set_details("Too many open watches; retry later")
+        return
+    try:
+        sub, missed, start, position = hub.resume(topics, resume_token or None)
+        try:
+            if not context.add_callback(sub.close):  # wakes the thread when the call ends
+                return
+            if start != "resumed":
+                yield message(start, None, hub.token(position))
+            for e in missed:
+                yield _event_message(message, hub, e)
+            while True:
+                e = sub.get(timeout=_IDLE_CHECK_SECONDS)
+                if e is not None:
+                    yield _event_message(message, hub, e)
+                elif sub.overflowed:
+                    context.set_code(grpc.StatusCode.ABORTED)
+                    context.set_details("Watcher fell behind; resume from the last token received")
+                    return
+                elif sub.closed or not context.is_active():
+                    if context.is_active():  # closed by the server (shutdown)
+                        context.set_code(grpc.StatusCode.UNAVAILABLE)
+                        context.set_details("Server is shutting down; resume from the last token received")
+                    return
+        finally:
+            sub.close()
+    finally:
+        _release_slot()
@@ -1,9 +1,13 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from .database import init_db
-from .config import CORS_ORIGINS
-from .routers import auth, courses, grades, users, student_grades, student
+from .config import CORS_ORIGINS, DB_DEBUG_HEADERS, GRPC_PORT
+from .pagination import NEXT_CURSOR_HEADER
+from .routers import admin, auth, changes, courses, exports, grades, users, student_grades, student
 from .grpc_server import start_grpc_server
+from . import admission, events, metrics, outbox, rate_limit, tracing, write_queue
+from .sql_instrumentation import QueryStatsHeaderMiddleware, QUERIES_HEADER, DB_TIME_HEADER, ROWS_HEADER
 import threading
 import logging
 
@@ -11,13 +15,25 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="P4STDISCM2 Backend")
 
+# Inside CORS, so refusals carry CORS headers too; rate limits are checked
+# before a request takes an admission slot.
+app.add_middleware(admission.AdmissionMiddleware)
+app.add_middleware(rate_limit.RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", QUERIES_HEADER, DB_TIME_HEADER, ROWS_HEADER,
+                    tracing.TRACE_ID_HEADER, *rate_limit.HEADERS],
 )
+if DB_DEBUG_HEADERS:
+    app.add_middleware(QueryStatsHeaderMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
+# Added last so it wraps everything else (including CORS) and opens the
+# per-request context used for query attribution.
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Global gRPC server reference
 grpc_server = None
@@ -33,10 +49,12 @@ def on_startup():
     
     # Initialize database
     init_db()
+    outbox.start_compactor()
+    admission.size_threadpool()
     
     # Start gRPC server in a separate daemon thread
     try:
-        grpc_server = start_grpc_server(port=50051)
+        grpc_server = start_grpc_server(port=GRPC_PORT)
         grpc_thread = threading.Thread(target=lambda: grpc_server.wait_for_termination(), daemon=True)
         grpc_thread.start()
     except Exception as e:
@@ -50,6 +68,9 @@ app.include_router(grades.router)
 app.include_router(users.router)
 app.include_router(student.router)
 app.include_router(student_grades.router)
+app.include_router(admin.router)
+app.include_router(exports.router)
+app.include_router(changes.router)
 
 
 @app.get("/")
@@ -59,11 +80,17 @@ def root():
         "message": "P4STDISCM2 backend running",
         "services": {
             "rest": "Available on HTTP/1.1",
-            "grpc": "Available on port 50051 (HTTP/2)"
+            "grpc": f"Available on port {GRPC_PORT} (HTTP/2)"
         }
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint for REST, gRPC and DB pool metrics."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.on_event("shutdown")
 def on_shutdown():
     """Clean up resources on shutdown"""
@@ -71,3 +98,6 @@ def on_shutdown():
     if grpc_server:
         grpc_server.stop(0)
         logger.info("gRPC server stopped")
+    events.hub.close_all()
+    write_queue.shutdown()
+    tracing.flush()
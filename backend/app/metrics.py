@@ -0,0 +1,450 @@
+"""Prometheus-format metrics for REST, gRPC and the DB pool.
+
+No client library: the app only needs counters, gauges and histograms, and we
+want the hot path to stay cheap. Every metric child keeps one value shard per
+thread (created on first use through a `threading.local`), so recording is a
+plain in-place add on a list the current thread owns, with no lock. A scrape of
+`/metrics` sums the shards; it may miss an add that is happening concurrently,
+which is fine for monitoring. Worker pools replace their threads over time, so
+when a thread exits its shards are folded into each child's base values and
+dropped, and the shard count follows the live threads.
+
+Exposed series (all prefixed `p4_`):
+
+- `http_requests_total`, `http_request_errors_total`, `http_request_duration_seconds`,
+  `http_requests_in_flight`: REST, labelled by method, route template and status
+- `grpc_server_handled_total`, `grpc_server_errors_total`, `grpc_server_handling_seconds`,
+  `grpc_server_in_flight`: gRPC, labelled by full method name and status code
+- `db_queries_per_request`, `db_time_per_request_seconds`: SQL statements and time
+  attributed to each request/RPC (counted by `sql_instrumentation`)
+- `db_pool_*`: checkouts, checkout wait, connections created, and gauges for
+  size / checked out / overflow read from the pool at scrape time; hold time,
+  long holds and exhaustion come from `pool_monitor`
+"""
+import bisect
+import threading
+import time
+import weakref
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import grpc
+from sqlalchemy import event
+
+from . import request_context
+from .grpc_interceptors import wrap_rpc_handler, status_name
+
+PREFIX = "p4_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class _ThreadToken:
+    """Kept in a thread's `threading.local` next to its shard; collected when
+    the thread exits, which retires the shard."""
+    __slots__ = ("__weakref__",)
+
+
+class _Child:
+    """One labelled series. `width` values per thread shard, plus the values
+    of threads that have exited."""
+    __slots__ = ("_local", "_shards", "_base", "_lock", "_width")
+
+    def __init__(self, width: int = 1):
+        self._local = threading.local()
+        self._shards: Dict[int, list] = {}
+        self._base = [0] * width
+        self._lock = threading.Lock()
+        self._width = width
+
+    def _shard(self) -> list:
+        shard = getattr(self._local, "v", None)
+        if shard is None:
+            shard = [0] * self._width
+            token = _ThreadToken()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(token, self._retire, shard).atexit = False
+            self._local.token = token
+            self._local.v = shard
+        return shard
+
+    def _retire(self, shard: list) -> None:
+        with self._lock:
+            del self._shards[id(shard)]
+            for i, v in enumerate(shard):
+                self._base[i] += v
+
+    def _totals(self) -> list:
+        with self._lock:
+            totals = list(self._base)
+            shards = list(self._shards.values())
+        for shard in shards:
+            for i, v in enumerate(shard):
+                totals[i] += v
+        return totals
+
+
+class CounterChild(_Child):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1) -> None:
+        self._shard()[0] += amount
+
+    def value(self) -> float:
+        return self._totals()[0]
+
+
+class GaugeChild(CounterChild):
+    """Up/down gauge: per-thread deltas summed at scrape time."""
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self._shard()[0] -= amount
+
+
+class HistogramChild(_Child):
+    """Shard layout: [count per bucket..., +Inf count, sum]."""
+    __slots__ = ("_bounds",)
+
+    def __init__(self, bounds: Sequence[float]):
+        super().__init__(width=len(bounds) + 2)
+        self._bounds = bounds
+
+    def observe(self, value: float) -> None:
+        shard = self._shard()
+        shard[bisect.bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _Child] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self) -> _Child:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> _Child:
+        """Return the child for these label values (pass strings)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_str(self, values, extra: str = "") -> str:
+        pairs = ['%s="%s"' % (k, _escape(str(v))) for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _series(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._series():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{self._label_str(values)} {_fmt(child.value())}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return GaugeChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default.dec(amount)
+
+
+class GaugeFunc(_Metric):
+    """Gauge whose value is read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], float]):
+        self._fn = fn
+        super().__init__(name, documentation)
+
+    def _new_child(self):
+        return _Child()
+
+    def _render_child(self, values, child):
+        try:
+            value = self._fn()
+        except Exception:
+            return []
+        return [f"{self.name} {_fmt(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_child(self, values, child):
+        totals = child._totals()
+        lines, cumulative = [], 0
+        labels = self._label_str(values)
+        for bound, count in zip(self.buckets, totals):
+            cumulative += count
+            le = self._label_str(values, 'le="%s"' % _fmt(bound))
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        cumulative += totals[len(self.buckets)]
+        le = self._label_str(values, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{le} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_fmt(totals[-1])}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def gauge_func(name, documentation, fn) -> GaugeFunc:
+    return REGISTRY.register(GaugeFunc(name, documentation, fn))
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# REST
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_ERRORS = counter("http_request_errors_total", "HTTP responses with status >= 400.", ("method", "route", "status"))
+HTTP_LATENCY = histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+# gRPC
+GRPC_HANDLED = counter("grpc_server_handled_total", "RPCs completed by method and status code.", ("method", "code"))
+GRPC_ERRORS = counter("grpc_server_errors_total", "RPCs completed with a non-OK status.", ("method", "code"))
+GRPC_LATENCY = histogram("grpc_server_handling_seconds", "RPC latency (streams: until the last message).", ("method",))
+GRPC_IN_FLIGHT = gauge("grpc_server_in_flight", "RPCs currently being served.")
+
+# Per-request SQL
+DB_QUERIES_PER_REQUEST = histogram(
+    "db_queries_per_request", "SQL statements executed per request/RPC.", ("kind",), QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = histogram("db_time_per_request_seconds", "Time spent in SQL per request/RPC.", ("kind",))
+
+# Pool
+DB_POOL_CHECKOUTS = counter("db_pool_checkouts_total", "Connections checked out of the pool.")
+DB_POOL_CONNECTS = counter("db_pool_connections_created_total", "New DBAPI connections opened by the pool.")
+DB_POOL_WAIT = histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pool connection.",
+                         buckets=WAIT_BUCKETS)
+DB_POOL_CHECKOUT_ERRORS = counter("db_pool_checkout_errors_total",
+                                  "Failed checkouts (e.g. pool timeout) by exception type.", ("error",))
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def observe_request(stats: request_context.RequestStats) -> None:
+    DB_QUERIES_PER_REQUEST.labels(stats.kind).observe(stats.query_count)
+    DB_TIME_PER_REQUEST.labels(stats.kind).observe(stats.db_time)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware task/queue overhead).
+
+    Opens the `request_context` scope for the request, so it must be the
+    outermost middleware that cares about per-request attribution.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        stats, token = request_context.start("rest", f"{method} {scope['path']}")
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_name = getattr(route, "path", None) or UNMATCHED_ROUTE
+            stats.name = f"{method} {route_name}"
+            status = str(status_holder[0])
+            HTTP_REQUESTS.labels(method, route_name, status).inc()
+            if status_holder[0] >= 400:
+                HTTP_ERRORS.labels(method, route_name, status).inc()
+            HTTP_LATENCY.labels(method, route_name).observe(stats.elapsed())
+            observe_request(stats)
+            request_context.finish(token)
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """gRPC counterpart of `MetricsMiddleware`."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+
+        def record(stats, context, failed):
+            GRPC_IN_FLIGHT.dec()
+            code = status_name(context, failed)
+            GRPC_HANDLED.labels(method, code).inc()
+            if code != "OK":
+                GRPC_ERRORS.labels(method, code).inc()
+            GRPC_LATENCY.labels(method).observe(stats.elapsed())
+            observe_request(stats)
+
+        def unary(behavior):
+            def wrapper(request, context):
+                stats, token = request_context.start("grpc", method)
+                GRPC_IN_FLIGHT.inc()
+                failed = True
+                try:
+                    response = behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    record(stats, context, failed)
+                    request_context.finish(token)
+            return wrapper
+
+        def stream(behavior):
+            def wrapper(request, context):
+                stats, token = request_context.start("grpc", method)
+                GRPC_IN_FLIGHT.inc()
+                failed = True
+                try:
+                    yield from behavior(request, context)
+                    failed = False
+                finally:
+                    record(stats, context, failed)
+                    request_context.finish(token)
+            return wrapper
+
+        return wrap_rpc_handler(handler, unary, stream)
+
+
+def instrument_pool(engine) -> None:
+    """Attach checkout/connect instrumentation and scrape-time gauges to the engine's pool."""
+    pool = engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _connect(dbapi_conn, record):
+        DB_POOL_CONNECTS.inc()
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        DB_POOL_CHECKOUTS.inc()
+
+    # The pool has no "checkout requested" event, so time the call itself.
+    original_connect = pool.connect
+
+    def timed_connect():
+        t0 = time.perf_counter()
+        try:
+            return original_connect()
+        except Exception as e:
+            DB_POOL_CHECKOUT_ERRORS.labels(type(e).__name__).inc()
+            raise
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - t0)
+
+    pool.connect = timed_connect
+
+    gauge_func("db_pool_size", "Configured pool size.", _pool_attr(pool, "size"))
+    gauge_func("db_pool_checked_out", "Connections currently checked out.", _pool_attr(pool, "checkedout"))
+    gauge_func("db_pool_overflow", "Connections open beyond the pool size (negative: unused slots).",
+               _pool_attr(pool, "overflow"))
+    gauge_func("db_pool_idle", "Idle connections held in the pool.", _pool_attr(pool, "checkedin"))
+
+
+def _pool_attr(pool, name: str) -> Callable[[], float]:
+    def read():
+        return getattr(pool, name)()
+    return read
+
+
+def render() -> str:
+    return REGISTRY.render()
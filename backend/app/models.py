@@ -7,7 +7,7 @@ Note: Keeping models in a single file is fine for a small project. If the projec
 split models into domain modules (e.g., `models/users.py`, `models/courses.py`).
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Index, JSON, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -32,6 +32,13 @@ class User(Base):
     # `uploaded_grades` are grades uploaded/entered by this user (grader/uploader).
     uploaded_grades = relationship("Grade", back_populates="uploader", foreign_keys='Grade.uploaded_by')
 
+    # Keyset pagination filtered by role walks this index in id order; typeahead
+    # prefix search range-scans the lowercased usernames.
+    __table_args__ = (
+        Index("ix_users_role_id", "role", "id"),
+        Index("ix_users_username_lower", func.lower(username)),
+    )
+
 
 class Course(Base):
     __tablename__ = "courses"
@@ -45,6 +52,11 @@ class Course(Base):
     enrollments = relationship("Enrollment", back_populates="course")
     grades = relationship("Grade", back_populates="course")
 
+    __table_args__ = (
+        Index("ix_courses_instructor_id", "instructor", "id"),
+        Index("ix_courses_code_lower", func.lower(code)),
+    )
+
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
@@ -56,6 +68,9 @@ class Enrollment(Base):
     student = relationship("User", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
 
+    # Serves the roster (course_id, keyset on student_id) and the duplicate check.
+    __table_args__ = (Index("ix_enrollments_course_student", "course_id", "student_id"),)
+
 
 class Grade(Base):
     __tablename__ = "grades"
@@ -74,6 +89,62 @@ class Grade(Base):
     # Keep original uploaded_by column and expose relationship as `uploader`.
     uploader = relationship("User", back_populates="uploaded_grades", foreign_keys=[uploaded_by])
 
+    __table_args__ = (
+        Index("ix_grades_course_student", "course_id", "student_id"),
+        Index("ix_grades_student_id", "student_id"),
+    )
+
+
+class CourseVersion(Base):
+    """Per-course change counters used as cache validators (ETags).
+
+    `roster_version` is bumped whenever an enrollment in the course, or an
+    enrolled student's username or email, changes and `grades_version`
+    whenever one of its grades does, in the same transaction as the change
+    itself. A course with no row yet is at version 0/0.
+    """
+    __tablename__ = "course_versions"
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
+    roster_version = Column(Integer, default=0, nullable=False)
+    grades_version = Column(Integer, default=0, nullable=False)
+
+
+class StudentSummary(Base):
+    """Materialized transcript summary: one row per student with grades.
+
+    Derived entirely from `grades`. `student_summary.refresh` rewrites the rows
+    of the students an upload touched, in the upload's transaction, and
+    `python -m backend.scripts.rebuild_summaries` recomputes the whole table.
+    `semesters` holds the per-semester aggregates as a JSON list so a
+    transcript is a single-row read.
+    """
+    __tablename__ = "student_summaries"
+    student_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    gpa = Column(Float, nullable=True)  # None until a grade with points
+    courses = Column(Integer, default=0, nullable=False)
+    graded = Column(Integer, default=0, nullable=False)
+    credits_attempted = Column(Integer, default=0, nullable=False)
+    credits_earned = Column(Integer, default=0, nullable=False)
+    semesters = Column(JSON, nullable=False, default=list)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ChangeLogEntry(Base):
+    """Append-only change log (transactional outbox) for downstream mirrors.
+
+    Course, enrollment and grade writes add a row in the same transaction as
+    the change, so the log has exactly the committed changes, in commit order
+    of `id`. `data` is the entity after the change (None for deletes).
+    `outbox.compact` drops entries past the retention period.
+    """
+    __tablename__ = "change_log"
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(32), nullable=False)  # "course", "enrollment", "grade"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(16), nullable=False)  # "created", "updated", "deleted"
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 
 class RefreshToken(Base):
     """Simple refresh token table.
@@ -86,7 +157,7 @@ class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    token_hash = Column(String(256), nullable=False)
+    token_hash = Column(String(256), nullable=False, index=True)
     revoked = Column(Boolean, default=False)
     expires_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
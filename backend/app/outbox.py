@@ -0,0 +1,164 @@
+"""Transactional outbox: the change log behind `GET /api/changes`.
+
+Downstream systems mirror courses, enrollments and grades. Re-listing
+everything to find what changed is what this replaces:
+
+- `record` adds a `ChangeLogEntry` to the caller's session. The crud write
+  paths call it before their commit, so an entry exists exactly when its change
+  committed. There is no second write to get out of step with the first.
+- `changes_since` reads the log after a cursor (the repo's opaque keyset
+  cursor over `ChangeLogEntry.id`). Consumers keep the returned cursor and
+  ask again later. This relies on id order being commit order, so that
+  nothing can appear behind a cursor already handed out. SQLite runs one
+  writer at a time, so that holds there. PostgreSQL sequences hand out ids at
+  insert time, not commit time, so `record` first takes a transaction-scoped
+  advisory lock, held until commit or rollback. Transactions that log changes
+  queue on it, and each one takes its ids and commits before the next one
+  gets any. A transaction that commits late therefore also got its ids late,
+  after every id a cursor could already point past. On other databases
+  `changes_since` raises `Unsupported`.
+- `compact` deletes entries older than `CHANGE_LOG_RETENTION_HOURS`, in
+  batches. A cursor from before the oldest remaining entry raises
+  `CursorExpired`. Its consumer has to re-list and then follow the log again
+  from the start.
+
+Bootstrapping a mirror: list the entities, then read the log from the start
+(no cursor). Entries from before the listing repeat changes the mirror
+already has, so consumers apply them as upserts and deletes by `entity_id`.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import config, metrics, models, pagination
+
+logger = logging.getLogger(__name__)
+
+RECORDED = metrics.counter("change_log_entries_total", "Change log entries written, by entity.", ("entity",))
+COMPACTED = metrics.counter("change_log_compacted_total", "Change log entries removed by compaction.")
+
+COMPACT_BATCH = 5000
+
+Entry = models.ChangeLogEntry
+
+
+class CursorExpired(Exception):
+    """The entries after a cursor were already compacted away."""
+
+
+class Unsupported(Exception):
+    """The database does not commit change log ids in id order."""
+
+
+# Databases where ids are committed in id order (on PostgreSQL via `_serialize_ids`).
+_COMMIT_ORDERED = ("sqlite", "postgresql")
+# Any fixed key; the transactions writing the change log queue on it.
+_PG_LOCK_KEY = 0x70346368
+
+
+def _ids_in_commit_order(db: Session) -> bool:
+    return db.get_bind().dialect.name in _COMMIT_ORDERED
+
+
+def _serialize_ids(db: Session) -> None:
+    """On PostgreSQL, wait for the change log's advisory lock, held until this
+    transaction ends, before any entry of it gets an id."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(_PG_LOCK_KEY)))
+
+
+def record(db: Session, entity: str, op: str, entity_id: int, data: Optional[dict] = None) -> None:
+    """Add a change to the caller's transaction; it is logged if and when that commits."""
+    _serialize_ids(db)
+    db.add(Entry(entity=entity, op=op, entity_id=entity_id, data=data))
+    RECORDED.labels(entity).inc()
+
+
+def record_many(db: Session, entity: str, changes: Iterable[Tuple[str, int, Optional[dict]]]) -> None:
+    """`record` for several `(op, entity_id, data)` changes, as one executemany
+    in the caller's transaction (the ORM would insert them one by one)."""
+    rows = [{"entity": entity, "op": op, "entity_id": entity_id, "data": data} for op, entity_id, data in changes]
+    if rows:
+        _serialize_ids(db)
+        db.execute(insert(Entry), rows)
+        RECORDED.labels(entity).inc(len(rows))
+
+
+def changes_since(db: Session, cursor: Optional[str], limit: Optional[int]) -> Tuple[List[Entry], str, bool]:
+    """Up to `limit` entries after `cursor` (from the oldest without one).
+
+    Returns the entries, the cursor to continue from (the one given when
+    there is nothing new) and whether more entries are waiting. Raises
+    `pagination.InvalidCursor` for a cursor we did not issue and
+    `CursorExpired` for one from before the oldest retained entry, and
+    `Unsupported` on databases other than SQLite and PostgreSQL.
+    """
+    if not _ids_in_commit_order(db):
+        raise Unsupported("The change feed needs SQLite or PostgreSQL: ids on this database are not in commit order")
+    limit = pagination.clamp_limit(limit)
+    last_id = pagination.decode_cursor(cursor)
+    rows = db.execute(pagination.keyset_query(select(Entry), Entry.id, cursor, limit + 1)).scalars().all()
+    if last_id is not None and (not rows or rows[0].id != last_id + 1):
+        # A gap right after the cursor is either compaction or an id the
+        # database skipped; only the oldest id tells them apart.
+        oldest = db.execute(select(func.min(Entry.id))).scalar()
+        if oldest is not None and last_id < oldest - 1:
+            raise CursorExpired("Changes after this cursor were compacted; re-list and start over")
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = pagination.encode_cursor(rows[-1].id) if rows else (cursor or pagination.encode_cursor(0))
+    return rows, next_cursor, has_more
+
+
+def compact(db: Session, before: datetime = None, batch_size: int = COMPACT_BATCH) -> int:
+    """Delete entries created before `before` (default: the retention period
+    ago) in batches of `batch_size`, committing each, so writers are never
+    blocked for long. Returns how many were removed."""
+    if before is None:
+        before = datetime.utcnow() - timedelta(hours=config.CHANGE_LOG_RETENTION_HOURS)
+    # The newest entry always stays: it keeps ids from being reused and tells
+    # `changes_since` where the log starts.
+    newest = db.execute(select(func.max(Entry.id))).scalar()
+    removed = 0
+    while newest is not None:
+        ids = (select(Entry.id).where(Entry.created_at < before, Entry.id < newest)
+               .order_by(Entry.id).limit(batch_size))
+        deleted = db.execute(delete(Entry).where(Entry.id.in_(ids.scalar_subquery()))).rowcount
+        db.commit()
+        removed += deleted
+        if deleted < batch_size:
+            break
+    COMPACTED.inc(removed)
+    return removed
+
+
+_thread: Optional[threading.Thread] = None
+
+
+def _compact_periodically():
+    from .database import SessionLocal
+
+    while True:
+        db = SessionLocal()
+        try:
+            removed = compact(db)
+            if removed:
+                logger.info("Compacted %d change log entries", removed)
+        except Exception:
+            logger.exception("Change log compaction failed")
+        finally:
+            db.close()
+        time.sleep(config.CHANGE_LOG_COMPACT_INTERVAL_SECONDS)
+
+
+def start_compactor() -> None:
+    """Run `compact` every `CHANGE_LOG_COMPACT_INTERVAL_SECONDS` in a daemon thread."""
+    global _thread
+    if _thread is None and config.CHANGE_LOG_COMPACT_INTERVAL_SECONDS > 0:
+        _thread = threading.Thread(target=_compact_periodically, name="change-log-compactor", daemon=True)
+        _thread.start()
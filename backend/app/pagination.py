@@ -0,0 +1,80 @@
+"""Opaque-cursor keyset pagination helpers.
+
+List endpoints page through tables ordered by primary key. Instead of an
+`OFFSET` (which makes the database scan and discard every earlier row), each
+page remembers the last id it returned and the next page asks for rows with
+`id > last_id`. That predicate is answered straight from the primary-key index,
+so page 500 costs the same as page 1.
+
+The cursor handed to clients is opaque: a urlsafe-base64 JSON blob. Clients must
+treat it as a black box and pass it back unchanged (`cursor` on REST,
+`page_token` on gRPC).
+"""
+import base64
+import binascii
+import json
+from typing import Optional
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# REST list endpoints keep returning a bare JSON array (wire-compatible with
+# existing clients) and hand out the next cursor in this response header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue (or mangled one)."""
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Return a usable page size; 0/None mean "use the default"."""
+    if not limit or limit < 0:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Return the last-seen id encoded in `cursor`, or None for the first page."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = payload["id"]
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid pagination cursor")
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise InvalidCursor("Invalid pagination cursor")
+    return last_id
+
+
+def paginate(db, stmt, id_column, limit: Optional[int], cursor: Optional[str], key: str = "id"):
+    """Apply keyset pagination to a Core `select()` and return `(rows, next_cursor)`.
+
+    `stmt` is already filtered by the caller and must not carry its own ORDER
+    BY. `key` names the attribute of a result row holding the `id_column` value.
+    One extra row is fetched to know whether another page exists;
+    `next_cursor` is None on the last page.
+    """
+    limit = clamp_limit(limit)
+    rows = db.execute(keyset_query(stmt, id_column, cursor, limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(getattr(rows[-1], key))
+    return rows, None
+
+
+def keyset_query(stmt, id_column, cursor: Optional[str], limit: Optional[int] = None):
+    """`stmt` ordered by `id_column`, starting after `cursor`; every remaining
+    row unless `limit` is given. Raises `InvalidCursor` like `paginate`."""
+    last_id = decode_cursor(cursor)
+    if last_id is not None:
+        stmt = stmt.where(id_column > last_id)
+    stmt = stmt.order_by(id_column)
+    return stmt.limit(limit) if limit is not None else stmt
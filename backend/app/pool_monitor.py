@@ -0,0 +1,254 @@
+"""Connection-pool holder tracking, long-hold warnings and an exhaustion log.
+
+Routers open sessions through their own `get_db` and gRPC servicers call
+`SessionLocal()` by hand, so a missed `close()` or a session kept open across a
+slow call is easy to write and hard to see: the pool just drains until
+checkouts start timing out. `instrument_pool` attaches a `PoolMonitor` that:
+
+- records every checked-out connection with the request or RPC that took it
+  (`request_context`), the thread, when, and (with `POOL_CAPTURE_STACKS`) the
+  app frames that caused the checkout, so a leak points at a line of code;
+- warns once per connection held longer than `POOL_HOLD_WARN_SECONDS`, from a
+  background thread, so connections that are never returned are caught too;
+- logs pool exhaustion: a checkout that takes the last free connection and a
+  checkout that times out, each with the current holders, into a bounded event
+  log (`POOL_EVENT_LOG_SIZE`).
+
+`snapshot()` returns all of it for the admin "who holds connections" view
+(`GET /api/admin/pool`).
+"""
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, exc
+
+from . import config, metrics, request_context
+
+logger = logging.getLogger(__name__)
+
+LONG_HOLDS = metrics.counter(
+    "db_pool_long_holds_total", "Connections held longer than POOL_HOLD_WARN_SECONDS, by route.", ("route",)
+)
+EXHAUSTION = metrics.counter(
+    "db_pool_exhaustion_total", "Checkouts that found the pool full, by outcome (last_connection/timeout).",
+    ("outcome",),
+)
+HOLD_TIME = metrics.histogram("db_pool_hold_seconds", "How long connections stay checked out.")
+
+MAX_STACK_FRAMES = 8
+MAX_EVENT_HOLDERS = 10
+# Frames from these files are instrumentation wrappers, not the code holding the connection.
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_FILES = {os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+               for name in ("pool_monitor.py", "metrics.py", "tracing.py", "sql_instrumentation.py")}
+
+
+def _app_stack(frame) -> tuple:
+    """`(path, line, function)` of the innermost app frames, innermost first."""
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_FRAMES:
+        path = frame.f_code.co_filename
+        if path.startswith(_APP_ROOT) and path not in _SKIP_FILES:
+            frames.append((path, frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+    return tuple(frames)
+
+
+class Holder:
+    """One checked-out connection."""
+    __slots__ = ("id", "since", "thread", "request", "stack", "warned")
+
+    def __init__(self, holder_id: int, stack: tuple):
+        self.id = holder_id
+        self.since = time.monotonic()
+        self.thread = threading.current_thread().name
+        self.request = request_context.current()
+        self.stack = stack
+        self.warned = False
+
+    @property
+    def route(self) -> str:
+        # Read late: REST requests get their route template when they finish.
+        stats = self.request
+        return f"{stats.kind} {stats.name}" if stats is not None else "no request"
+
+    def held(self, now: float = None) -> float:
+        return (now or time.monotonic()) - self.since
+
+    def as_dict(self, now: float = None) -> dict:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "thread": self.thread,
+            "held_seconds": round(self.held(now), 3),
+            "stack": [f"{os.path.relpath(path, _APP_ROOT)}:{line} in {fn}" for path, line, fn in self.stack],
+        }
+
+
+class PoolMonitor:
+    def __init__(self, engine, hold_warn_seconds: float, capture_stacks: bool, event_log_size: int):
+        self.name = engine.url.render_as_string(hide_password=True)
+        self.pool = engine.pool
+        self.hold_warn_seconds = hold_warn_seconds
+        self.capture_stacks = capture_stacks
+        self.events = deque(maxlen=event_log_size)
+        self._holders: Dict[int, Holder] = {}  # id(connection record) -> holder
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._full = False  # at capacity; only the first checkout of a run is logged
+        # QueuePool only; other pools have no fixed capacity to exhaust.
+        size, overflow = getattr(self.pool, "size", None), getattr(self.pool, "_max_overflow", None)
+        self.capacity = size() + overflow if callable(size) and overflow is not None and overflow >= 0 else None
+
+    # Pool hooks
+
+    def on_checkout(self, dbapi_conn, record, proxy):
+        stack = _app_stack(sys._getframe(1)) if self.capture_stacks else ()
+        holder = Holder(next(self._ids), stack)
+        with self._lock:
+            self._holders[id(record)] = holder
+            in_use = len(self._holders)
+        if self.capacity is not None and in_use >= self.capacity:
+            EXHAUSTION.labels("last_connection").inc()
+            if not self._full:
+                self._full = True
+                self._record("last_connection", f"all {self.capacity} connections in use", holder.route)
+
+    def on_checkin(self, dbapi_conn, record):
+        with self._lock:
+            holder = self._holders.pop(id(record), None)
+            if self._full and len(self._holders) < (self.capacity or 0):
+                self._full = False
+        if holder is None:
+            return
+        held = holder.held()
+        HOLD_TIME.observe(held)
+        if holder.warned:
+            logger.warning("Connection #%d (%s) released after %.1fs", holder.id, holder.route, held)
+
+    def on_checkout_error(self, error: Exception, waited: float):
+        if isinstance(error, exc.TimeoutError):
+            EXHAUSTION.labels("timeout").inc()
+            stats = request_context.current()
+            route = f"{stats.kind} {stats.name}" if stats is not None else "no request"
+            self._record("timeout", f"checkout gave up after {waited:.1f}s: {error}", route)
+
+    # Monitoring
+
+    def holders(self) -> List[Holder]:
+        """Current holders, longest-held first."""
+        with self._lock:
+            holders = list(self._holders.values())
+        return sorted(holders, key=lambda h: h.since)
+
+    def check_long_holds(self) -> None:
+        now = time.monotonic()
+        for holder in self.holders():
+            if holder.held(now) < self.hold_warn_seconds:
+                break
+            if holder.warned:
+                continue
+            holder.warned = True
+            LONG_HOLDS.labels(holder.route).inc()
+            self._append_event("long_hold", f"held for {holder.held(now):.1f}s", holder.route, [holder], now)
+            logger.warning("Connection #%d held for %.1fs by %s (thread %s)%s", holder.id, holder.held(now),
+                           holder.route, holder.thread, _format_stack(holder.stack))
+
+    def _record(self, kind: str, detail: str, route: str):
+        holders = self.holders()
+        self._append_event(kind, detail, route, holders[:MAX_EVENT_HOLDERS])
+        lines = "".join(f"\n  #{h.id} {h.held():.2f}s {h.route} (thread {h.thread})"
+                        f"{_format_stack(h.stack, indent='    ')}" for h in holders[:MAX_EVENT_HOLDERS])
+        logger.warning("Pool %s (%s, %d held): %s. Holders:%s", kind, route, len(holders), detail, lines)
+
+    def _append_event(self, kind, detail, route, holders, now=None):
+        now = now or time.monotonic()
+        self.events.append({
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "kind": kind,
+            "detail": detail,
+            "route": route,
+            "held": len(self._holders),
+            "holders": [h.as_dict(now) for h in holders],
+        })
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        holders = self.holders()
+        pool = self.pool
+        stats = {name: getattr(pool, name)() for name in ("size", "checkedout", "overflow", "checkedin")
+                 if callable(getattr(pool, name, None))}
+        return {
+            "pool": self.name,
+            "class": type(pool).__name__,
+            "capacity": self.capacity,
+            **stats,
+            "hold_warn_seconds": self.hold_warn_seconds,
+            "holders": [h.as_dict(now) for h in holders],
+            "events": list(self.events),
+        }
+
+
+def _format_stack(stack, indent: str = "  ") -> str:
+    return "".join(f"\n{indent}at {os.path.relpath(path, _APP_ROOT)}:{line} in {fn}" for path, line, fn in stack)
+
+
+_monitors: List[PoolMonitor] = []
+_thread: Optional[threading.Thread] = None
+
+
+def _watch():
+    while True:
+        interval = min(5.0, max(0.5, min(m.hold_warn_seconds for m in _monitors) / 4))
+        time.sleep(interval)
+        for monitor in list(_monitors):
+            try:
+                monitor.check_long_holds()
+            except Exception:
+                logger.exception("pool monitor check failed")
+
+
+def instrument_pool(engine, hold_warn_seconds: float = None, capture_stacks: bool = None,
+                    event_log_size: int = None) -> PoolMonitor:
+    """Track holders of `engine`'s pool; settings default to `config.POOL_*`."""
+    global _thread
+    monitor = PoolMonitor(
+        engine,
+        config.POOL_HOLD_WARN_SECONDS if hold_warn_seconds is None else hold_warn_seconds,
+        config.POOL_CAPTURE_STACKS if capture_stacks is None else capture_stacks,
+        config.POOL_EVENT_LOG_SIZE if event_log_size is None else event_log_size,
+    )
+    pool = engine.pool
+    event.listen(pool, "checkout", monitor.on_checkout)
+    event.listen(pool, "checkin", monitor.on_checkin)
+    event.listen(pool, "detach", lambda dbapi_conn, record: monitor.on_checkin(dbapi_conn, record))
+
+    # Like `metrics.instrument_pool`: no event fires for a failed checkout.
+    original_connect = pool.connect
+
+    def watched_connect():
+        t0 = time.monotonic()
+        try:
+            return original_connect()
+        except Exception as e:
+            monitor.on_checkout_error(e, time.monotonic() - t0)
+            raise
+
+    pool.connect = watched_connect
+    _monitors.append(monitor)
+    if _thread is None:
+        _thread = threading.Thread(target=_watch, name="pool-monitor", daemon=True)
+        _thread.start()
+    return monitor
+
+
+def snapshot() -> dict:
+    """Every instrumented pool's state, holders and recent events."""
+    return {"pools": [m.snapshot() for m in _monitors]}
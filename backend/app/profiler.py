@@ -0,0 +1,129 @@
+"""On-demand sampling profiler for live diagnosis.
+
+`capture()` samples the Python stack of every thread in the process (uvicorn's
+event loop and threadpool, the gRPC executor, background exporters) every
+`interval` seconds via `sys._current_frames()`. Sampling from a side thread
+needs no tracing hooks, so the profiled code runs at full speed; the cost is the
+sampler itself, roughly a few microseconds per thread per sample.
+
+The result is in collapsed-stack format (`thread;outer;...;leaf count` per
+line), which flamegraph.pl, speedscope and inferno read directly.
+
+Threads parked in known blocking calls (waiting on a queue, a condition, a
+selector, a socket accept) are left out by default, so the output shows where
+CPU goes rather than which threads are idle; pass `include_idle=True` to keep
+them (e.g. to diagnose lock contention).
+
+Only one capture runs at a time; a second caller gets `ProfilerBusy`.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from . import config
+
+DEFAULT_INTERVAL = 0.01
+MIN_INTERVAL = 0.001
+
+# (file basename, function) of leaf frames that mean "blocked, not running".
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("thread.py", "_worker"),     # concurrent.futures worker waiting for work
+    ("_server.py", "_serve"),     # grpc server polling its completion queue
+}
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another capture is already running."""
+
+
+class Profile:
+    def __init__(self, stacks: Counter, samples: int, duration: float, threads: int):
+        self.stacks = stacks        # collapsed stack -> number of samples
+        self.samples = samples      # sampling rounds taken
+        self.duration = duration
+        self.threads = threads      # distinct threads seen with a non-idle stack
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text, heaviest stacks first."""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def _frame_label(code, cache: Dict) -> str:
+    label = cache.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        cache[code] = label
+    return label
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+
+def capture(seconds: float, interval: float = DEFAULT_INTERVAL, include_idle: bool = False) -> Profile:
+    """Sample all threads for `seconds` (capped at `config.PROFILER_MAX_SECONDS`).
+
+    Blocks the calling thread for the duration. Raises `ProfilerBusy` if a
+    capture is already in progress.
+    """
+    seconds = max(0.0, min(float(seconds), config.PROFILER_MAX_SECONDS))
+    interval = max(MIN_INTERVAL, float(interval))
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("a profile capture is already running")
+    try:
+        return _sample(seconds, interval, include_idle)
+    finally:
+        _lock.release()
+
+
+def _sample(seconds: float, interval: float, include_idle: bool) -> Profile:
+    me = threading.get_ident()
+    labels: Dict = {}
+    stacks: Counter = Counter()
+    seen = set()
+    samples = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    next_tick = start
+    names = {t.ident: t.name for t in threading.enumerate()}
+    while True:
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (not include_idle and _is_idle(frame)):
+                continue
+            parts = []
+            while frame is not None:
+                parts.append(_frame_label(frame.f_code, labels))
+                frame = frame.f_back
+            name = names.get(ident)
+            if name is None:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                name = names.get(ident, f"thread-{ident}")
+            parts.append(name)
+            stacks[";".join(reversed(parts))] += 1
+            seen.add(ident)
+        samples += 1
+        next_tick += interval
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if next_tick > now:
+            time.sleep(min(next_tick, deadline) - now)
+        else:
+            next_tick = now  # fell behind; don't try to catch up with a burst
+    return Profile(stacks, samples, time.perf_counter() - start, len(seen))
+
+
+def is_running() -> bool:
+    return _lock.locked()
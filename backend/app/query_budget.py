@@ -0,0 +1,64 @@
+"""Per-endpoint query budgets.
+
+Most performance regressions in this app are extra SQL: a lazy relationship
+touched while serializing, a lookup moved into a loop. Each REST route and gRPC
+method declares how many statements it may run and how many rows it may fetch
+per call, next to its definition:
+
+    @router.get("/courses/{course_id}/roster", ...)
+    @query_budget(statements=4, rows=51)
+    def get_course_roster(...):
+
+The decorator only records the budget on the function; nothing is enforced at
+runtime. `backend/scripts/check_query_budgets.py` calls every route and method
+against a seeded database, compares the `request_context` stats of each call
+with its budget, and fails with the offending statements when one goes over.
+
+Budgets are for the checker's dataset and fixed requests (page sizes, batch
+sizes), so a raised budget in a diff is the thing to review.
+"""
+from typing import List, NamedTuple, Optional
+
+from .request_context import RequestStats
+
+
+class QueryBudget(NamedTuple):
+    statements: int
+    rows: Optional[int] = None  # None: rows are not checked
+
+
+def query_budget(statements: int, rows: Optional[int] = None):
+    """Attach a `QueryBudget` to a route function or servicer method."""
+    budget = QueryBudget(statements, rows)
+
+    def decorate(fn):
+        fn.query_budget = budget
+        return fn
+    return decorate
+
+
+def budget_of(fn) -> Optional[QueryBudget]:
+    return getattr(fn, "query_budget", None)
+
+
+def violations(stats: RequestStats, budget: QueryBudget) -> List[str]:
+    """Ways `stats` went over `budget`; empty when within it."""
+    problems = []
+    if stats.query_count > budget.statements:
+        problems.append(f"{stats.query_count} statements > budget {budget.statements}")
+    if budget.rows is not None and stats.rows_loaded > budget.rows:
+        problems.append(f"{stats.rows_loaded} rows loaded > budget {budget.rows}")
+    return problems
+
+
+def statement_report(stats: RequestStats, max_width: int = 160) -> List[str]:
+    """One line per statement shape: executions, rows fetched, SQL; busiest first."""
+    shapes = sorted(stats.statement_shapes.items(),
+                    key=lambda kv: (kv[1], stats.statement_rows.get(kv[0], 0)), reverse=True)
+    lines = []
+    for shape, n in shapes:
+        # Keep both ends: the WHERE clause is what tells similar SELECTs apart.
+        half = (max_width - 5) // 2
+        sql = shape if len(shape) <= max_width else f"{shape[:half]} ... {shape[-half:]}"
+        lines.append(f"{n:>4}x {stats.statement_rows.get(shape, 0):>6} rows  {sql}")
+    return lines
@@ -0,0 +1,406 @@
+"""Token-bucket rate limiting for REST (`RateLimitMiddleware`) and gRPC
+(`RateLimitInterceptor`).
+
+Each rule is a bucket per caller that holds up to `limit` tokens and refills
+at `limit / period`; a request takes one token or is refused. So "5/minute"
+allows a burst of 5 and then one request every 12 seconds. The rules, from
+config:
+
+- `RATE_LIMIT_ROUTES`: one bucket per caller on each listed route, given as
+  `METHOD /route/template` or a full gRPC method name, with its own
+  `=N/period` or `RATE_LIMIT`. The default covers the two login calls, where
+  every attempt costs a password hash. The caller is the user of a valid
+  bearer token, otherwise the client IP;
+- `RATE_LIMIT_PER_IP` / `RATE_LIMIT_PER_USER`: one bucket per client IP /
+  authenticated user across all routes (off by default).
+
+Refusals are 429 with `Retry-After` on REST and RESOURCE_EXHAUSTED with a
+`retry-after` trailer on gRPC. Limited responses carry `RateLimit-Limit`,
+`RateLimit-Remaining` and `RateLimit-Reset` (seconds until the bucket is full
+again) for the rule closest to refusing, and `RateLimit-Policy` for all of
+them; on gRPC these are lowercase initial metadata.
+
+Buckets live in process memory (`MemoryStore`), so with several workers each
+enforces its own limit. `RATE_LIMIT_STORE=redis` shares them through
+`RATE_LIMIT_REDIS_URL` instead (needs the optional `redis` package); if Redis
+cannot be reached, requests are let through and the error is counted.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import grpc
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from . import config, metrics
+from .grpc_interceptors import wrap_rpc_handler
+
+logger = logging.getLogger(__name__)
+
+LIMITED = metrics.counter("rate_limited_total", "Requests refused by a rate limit rule.", ("rule",))
+STORE_ERRORS = metrics.counter("rate_limit_store_errors_total",
+                               "Rate limit checks skipped because the bucket store failed.")
+
+LIMIT_HEADER = "RateLimit-Limit"
+REMAINING_HEADER = "RateLimit-Remaining"
+RESET_HEADER = "RateLimit-Reset"
+POLICY_HEADER = "RateLimit-Policy"
+HEADERS = (LIMIT_HEADER, REMAINING_HEADER, RESET_HEADER, POLICY_HEADER, "Retry-After")
+
+_UNITS = {"s": 1, "sec": 1, "second": 1, "m": 60, "min": 60, "minute": 60, "h": 3600, "hour": 3600,
+          "d": 86400, "day": 86400}
+_RATE = re.compile(r"^\s*(\d+)\s*/\s*(\d+(?:\.\d+)?)?\s*([a-z]+?)s?\s*$")
+
+
+class Rate(NamedTuple):
+    limit: int       # bucket size: the burst allowed
+    period: float    # seconds to refill an empty bucket
+
+    @property
+    def per_second(self) -> float:
+        return self.limit / self.period
+
+    def policy(self) -> str:
+        return f"{self.limit};w={self.period:g}"
+
+
+def parse_rate(text: str) -> Optional[Rate]:
+    """`"5/minute"`, `"100/10 seconds"`, `"1000/h"` and so on; None for ""."""
+    if not text or not text.strip():
+        return None
+    match = _RATE.match(text.lower())
+    if not match or match.group(3) not in _UNITS or int(match.group(1)) < 1:
+        raise ValueError(f"Invalid rate limit {text!r}; expected e.g. '5/minute' or '100/10 seconds'")
+    return Rate(int(match.group(1)), float(match.group(2) or 1) * _UNITS[match.group(3)])
+
+
+class Rule(NamedTuple):
+    name: str
+    rate: Rate
+    key: str                  # "ip", "user" or "client" (user, else ip)
+    route: Optional[str]      # REST "METHOD /template" or gRPC method; None: every route
+
+
+def rules_from_config() -> List[Rule]:
+    rules = []
+    for entry in filter(None, (e.strip() for e in config.RATE_LIMIT_ROUTES.split(","))):
+        route, _, rate = entry.partition("=")
+        rules.append(Rule(route.strip(), parse_rate(rate or config.RATE_LIMIT), "client", route.strip()))
+    for name, rate in (("ip", config.RATE_LIMIT_PER_IP), ("user", config.RATE_LIMIT_PER_USER)):
+        if parse_rate(rate):
+            rules.append(Rule(name, parse_rate(rate), name, None))
+    return rules
+
+
+class Decision(NamedTuple):
+    rule: Rule
+    allowed: bool
+    tokens: float   # left after this request
+
+    @property
+    def remaining(self) -> int:
+        return int(self.tokens)
+
+    @property
+    def reset(self) -> int:
+        return math.ceil((self.rule.rate.limit - self.tokens) / self.rule.rate.per_second)
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil((1 - self.tokens) / self.rule.rate.per_second))
+
+
+class MemoryStore:
+    """Buckets in this process, at most `max_keys` (least recently used go first:
+    an evicted bucket comes back full)."""
+    local = True
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def take(self, key: str, rate: Rate) -> Tuple[bool, float]:
+        """Take a token from `key`'s bucket; returns `(allowed, tokens left)`."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(rate.limit), now]
+                if len(self._buckets) > self._max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(rate.limit, bucket[0] + (now - bucket[1]) * rate.per_second)
+                bucket[1] = now
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+            return allowed, bucket[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Refill and take in one step on the Redis server, using its clock so workers
+# on different hosts agree. Buckets expire once they would be full again.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * per_second)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / per_second * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisStore:
+    """Buckets shared by every worker through Redis (optional `redis` package)."""
+    local = False
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_STORE=redis needs the redis package installed") from None
+        self._client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+        self._prefix = prefix
+
+    def take(self, key: str, rate: Rate) -> Tuple[bool, float]:
+        allowed, tokens = self._take(keys=[self._prefix + key], args=[rate.limit, rate.per_second])
+        return bool(allowed), float(tokens)
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+
+def store_from_config():
+    if config.RATE_LIMIT_STORE == "redis":
+        return RedisStore(config.RATE_LIMIT_REDIS_URL)
+    if config.RATE_LIMIT_STORE not in ("", "memory"):
+        logger.warning("Unknown RATE_LIMIT_STORE %r; using memory", config.RATE_LIMIT_STORE)
+    return MemoryStore(config.RATE_LIMIT_MAX_KEYS)
+
+
+class Limiter:
+    """Applies `rules` with buckets kept in `store`."""
+
+    def __init__(self, rules: List[Rule], store):
+        self.rules = rules
+        self.store = store
+        self.needs_user = any(rule.key != "ip" for rule in rules)
+
+    def routed_rules(self) -> Dict[str, Rule]:
+        return {rule.route: rule for rule in self.rules if rule.route is not None}
+
+    def check(self, rules: List[Rule], ip: Optional[str], user: Optional[str]) -> List[Decision]:
+        """Take a token from each rule's bucket for this caller, stopping at the
+        first refusal (the last decision then). Store errors let the request through."""
+        decisions = []
+        for rule in rules:
+            if rule.key == "ip" or (rule.key == "client" and user is None):
+                if ip is None:
+                    continue
+                caller = f"ip:{ip}"
+            elif user is None:
+                continue
+            else:
+                caller = f"user:{user}"
+            try:
+                allowed, tokens = self.store.take(f"{rule.name}|{caller}", rule.rate)
+            except Exception as e:
+                STORE_ERRORS.inc()
+                logger.warning("Rate limit store failed (%s); not limiting", e)
+                return decisions
+            decisions.append(Decision(rule, allowed, tokens))
+            if not allowed:
+                LIMITED.labels(rule.name).inc()
+                break
+        return decisions
+
+
+def headers(decisions: List[Decision]) -> Dict[str, str]:
+    """RateLimit-* headers (and Retry-After on a refusal) for the decisions."""
+    if not decisions:
+        return {}
+    closest = decisions[-1] if not decisions[-1].allowed else min(decisions, key=lambda d: (d.tokens, -d.reset))
+    values = {
+        LIMIT_HEADER: str(closest.rule.rate.limit),
+        REMAINING_HEADER: str(closest.remaining),
+        RESET_HEADER: str(closest.reset),
+        POLICY_HEADER: ", ".join(d.rule.rate.policy() for d in decisions),
+    }
+    if not closest.allowed:
+        values["Retry-After"] = str(closest.retry_after)
+    return values
+
+
+def user_from_token(token: Optional[str]) -> Optional[str]:
+    """Subject of a valid access token, without a database lookup."""
+    if not token:
+        return None
+    try:
+        sub = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+    return str(sub) if sub is not None else None
+
+
+def _forwarded_ip(value: Optional[str]) -> Optional[str]:
+    # The address our proxy appended: the last one.
+    if value:
+        return value.split(",")[-1].strip() or None
+    return None
+
+
+limiter: Limiter = None
+
+
+def configure(rules: List[Rule] = None, store=None) -> Limiter:
+    """(Re)build the limiter, from config for whatever is not given."""
+    global limiter
+    limiter = Limiter(rules_from_config() if rules is None else rules,
+                      store if store is not None else store_from_config())
+    return limiter
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying `limiter` to REST requests.
+
+    Install inside CORS, so refusals still carry CORS headers. Route rules
+    match the request path against their template the way the router does.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+        self._routes_for = None
+
+    def _route_rules(self, scope) -> list:
+        if self._routes_for is not limiter:
+            routes = []
+            for name, rule in limiter.routed_rules().items():
+                method, _, path = name.partition(" ")
+                if path:  # gRPC methods have no "METHOD " part
+                    routes.append((method.upper(), compile_path(path)[0], rule))
+            self._routes, self._routes_for = routes, limiter
+        return [rule for method, regex, rule in self._routes
+                if method == scope["method"] and regex.match(scope["path"])]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not limiter.rules:
+            await self.app(scope, receive, send)
+            return
+        rules = self._route_rules(scope) + [rule for rule in limiter.rules if rule.route is None]
+        if not rules:
+            await self.app(scope, receive, send)
+            return
+        request_headers = {k: v for k, v in scope["headers"] if k in (b"authorization", b"x-forwarded-for")}
+        ip = scope["client"][0] if scope.get("client") else None
+        if config.RATE_LIMIT_FORWARDED_FOR:
+            ip = _forwarded_ip(request_headers.get(b"x-forwarded-for", b"").decode("latin-1")) or ip
+        user = None
+        if limiter.needs_user:
+            scheme, _, token = request_headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+            user = user_from_token(token.strip()) if scheme.lower() == "bearer" else None
+        if limiter.store.local:
+            decisions = limiter.check(rules, ip, user)
+        else:
+            decisions = await run_in_threadpool(limiter.check, rules, ip, user)
+        values = headers(decisions)
+        if decisions and not decisions[-1].allowed:
+            response = JSONResponse(
+                {"detail": f"Rate limit exceeded; retry in {values['Retry-After']} seconds"},
+                status_code=429, headers=values,
+            )
+            await response(scope, receive, send)
+            return
+        if not values:
+            await self.app(scope, receive, send)
+            return
+        extra = [(k.lower().encode(), v.encode()) for k, v in values.items()]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _peer_ip(peer: str) -> Optional[str]:
+    """`ipv4:1.2.3.4:5678` -> `1.2.3.4`, `ipv6:[::1]:5678` -> `::1`."""
+    kind, _, address = (peer or "").partition(":")
+    if kind == "ipv4":
+        return address.rsplit(":", 1)[0]
+    if kind == "ipv6":
+        return address.rsplit(":", 1)[0].strip("[]")
+    return peer or None
+
+
+class RateLimitInterceptor(grpc.ServerInterceptor):
+    """gRPC counterpart of `RateLimitMiddleware`. Install after the metrics and
+    tracing interceptors, so refused calls are still counted and traced."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or not limiter.rules:
+            return handler
+        method = handler_call_details.method
+        rules = [rule for rule in limiter.rules if rule.route in (None, method)]
+        if not rules:
+            return handler
+
+        def admit(context):
+            metadata = dict(context.invocation_metadata() or ())
+            ip = _peer_ip(context.peer())
+            if config.RATE_LIMIT_FORWARDED_FOR:
+                ip = _forwarded_ip(metadata.get("x-forwarded-for")) or ip
+            user = None
+            if limiter.needs_user:
+                scheme, _, token = metadata.get("authorization", "").partition(" ")
+                user = user_from_token(token.strip()) if scheme.lower() == "bearer" else None
+            decisions = limiter.check(rules, ip, user)
+            values = [(k.lower(), v) for k, v in headers(decisions).items()]
+            if decisions and not decisions[-1].allowed:
+                context.set_trailing_metadata(values)
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Rate limit exceeded; retry later")
+            if values:
+                context.send_initial_metadata(values)
+
+        def unary(behavior):
+            def wrapper(request, context):
+                admit(context)
+                return behavior(request, context)
+            return wrapper
+
+        def stream(behavior):
+            def wrapper(request, context):
+                admit(context)
+                yield from behavior(request, context)
+            return wrapper
+
+        return wrap_rpc_handler(handler, unary, stream)
+
+
+configure()
@@ -0,0 +1,146 @@
+"""Read-only queries that skip ORM entity loading.
+
+`crud.py` returns full ORM objects, which is what the write paths need: they
+mutate and commit them. Read-only endpoints only serialize a handful of
+columns, yet loading entities pays for every column (including
+`password_hash` and the lockout fields), an identity-map entry and attribute
+instrumentation per row, plus lazy loads for relationships such as
+`Grade.course`.
+
+Everything here is a column-projected Core `select()` returning SQLAlchemy
+`Row`s: lightweight named tuples with attribute access, so the Pydantic schemas
+(`orm_mode`) and the gRPC record builders consume them unchanged.
+
+See `backend/benchmarks/bench_read_path.py` for the ORM vs. projection numbers.
+"""
+from typing import Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from . import models, pagination
+
+User, Course, Enrollment, Grade = models.User, models.Course, models.Enrollment, models.Grade
+
+# Public user fields; never add password_hash or lockout state here.
+USER_COLUMNS = (User.id, User.username, User.email, User.role, User.created_at)
+COURSE_COLUMNS = (Course.id, Course.code, Course.name, Course.instructor, Course.capacity, Course.created_at)
+GRADE_COLUMNS = (
+    Grade.id, Grade.student_id, Grade.course_id, Grade.grade_value, Grade.semester,
+    Grade.uploaded_by, Grade.uploaded_at,
+)
+
+_users = select(*USER_COLUMNS)
+_courses = select(*COURSE_COLUMNS)
+
+
+# Users
+def get_user(db: Session, user_id: int):
+    return db.execute(_users.where(User.id == user_id)).first()
+
+
+def get_users_by_ids(db: Session, ids):
+    return db.execute(_users.where(User.id.in_(ids))).all()
+
+
+def list_users_page(db: Session, limit: int = None, cursor: str = None, role: str = None):
+    """Return `(users, next_cursor)` for one keyset page ordered by id.
+
+    Raises `pagination.InvalidCursor` for a cursor we did not issue.
+    """
+    return pagination.paginate(db, users_query(role), User.id, limit, cursor)
+
+
+def users_query(role: str = None):
+    """The select behind `list_users_page`, unpaged and unordered."""
+    return _users.where(User.role == role) if role else _users
+
+
+def users_with_username_prefix(db: Session, prefix: str, end: str, limit: int, role: str = None):
+    """Users whose lowercased username is in [lower(prefix), lower(end)),
+    from ix_users_username_lower."""
+    username = func.lower(User.username)
+    stmt = _users.where(username >= func.lower(prefix), username < func.lower(end))
+    if role:
+        # `role || ''` keeps the planner off ix_users_role_id: "student" covers
+        # most of the table, so the username range is always the better index.
+        stmt = stmt.where((User.role + "") == role)
+    return db.execute(stmt.order_by(username).limit(limit)).all()
+
+
+# Courses
+def get_course(db: Session, course_id: int):
+    return db.execute(_courses.where(Course.id == course_id)).first()
+
+
+def get_courses_by_ids(db: Session, ids):
+    return db.execute(_courses.where(Course.id.in_(ids))).all()
+
+
+def list_courses_page(db: Session, limit: int = None, cursor: str = None, instructor: str = None):
+    """Return `(courses, next_cursor)` for one keyset page ordered by id."""
+    return pagination.paginate(db, courses_query(instructor), Course.id, limit, cursor)
+
+
+def courses_query(instructor: str = None):
+    """The select behind `list_courses_page`, unpaged and unordered."""
+    return _courses.where(Course.instructor == instructor) if instructor else _courses
+
+
+def courses_with_code_prefix(db: Session, prefix: str, end: str, limit: int):
+    """Like `users_with_username_prefix`, on ix_courses_code_lower."""
+    code = func.lower(Course.code)
+    stmt = _courses.where(code >= func.lower(prefix), code < func.lower(end))
+    return db.execute(stmt.order_by(code).limit(limit)).all()
+
+
+# Grades
+def grades_for_student(db: Session, student_id: int):
+    """A student's grades with the course code/name joined in (no lazy loads)."""
+    return db.execute(grades_for_student_query(student_id)).all()
+
+
+def grades_for_student_query(student_id: int):
+    return (
+        select(*GRADE_COLUMNS, Course.code.label("course_code"), Course.name.label("course_name"))
+        .outerjoin(Course, Course.id == Grade.course_id)
+        .where(Grade.student_id == student_id)
+        .order_by(Grade.id)
+    )
+
+
+def course_roster_page(db: Session, course_id: int, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Return `(rows, next_cursor)`: enrolled students with their grade in this
+    course (grade columns are None if not graded yet), keyset-paged by student id.
+
+    One query: enrollments -> users, left join grades on (course_id, student_id).
+    """
+    return pagination.paginate(db, course_roster_query(course_id), Enrollment.student_id, limit, cursor,
+                               key="student_id")
+
+
+def course_roster_query(course_id: int):
+    """The roster select behind `course_roster_page`, unpaged and unordered."""
+    return (
+        select(
+            Enrollment.student_id.label("student_id"),
+            User.username,
+            User.email,
+            Enrollment.enrolled_at,
+            Grade.id.label("grade_id"),
+            Grade.grade_value,
+            Grade.semester,
+            Grade.uploaded_at,
+        )
+        .join(User, User.id == Enrollment.student_id)
+        .outerjoin(Grade, and_(Grade.course_id == Enrollment.course_id, Grade.student_id == Enrollment.student_id))
+        .where(Enrollment.course_id == course_id)
+    )
+
+
+def grades_query(course_id: Optional[int] = None):
+    """Every grade (or one course's), with the course code, in id order."""
+    stmt = select(*GRADE_COLUMNS, Course.code.label("course_code")).outerjoin(Course, Course.id == Grade.course_id)
+    if course_id is not None:
+        stmt = stmt.where(Grade.course_id == course_id)
+    return stmt.order_by(Grade.id)
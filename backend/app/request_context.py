@@ -0,0 +1,68 @@
+"""Per-request (REST) / per-call (gRPC) state for the observability hooks.
+
+The outermost middleware and gRPC interceptor open a `RequestStats` for each
+request and store it in a context variable. Code further down (SQLAlchemy
+event hooks, crud functions) finds it with `current()` and adds to it without
+having it passed around explicitly.
+
+Context variables follow the request into the threadpool that runs FastAPI's
+sync endpoints and dependencies (Starlette copies the context), and each gRPC
+call runs start to finish on one executor thread, so attribution is correct for
+both transports.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    """Mutable counters for one request or RPC."""
+    __slots__ = ("kind", "name", "started", "query_count", "db_time", "statement_shapes", "rows_loaded",
+                 "statement_rows")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind          # "rest" or "grpc"
+        self.name = name          # route template / full RPC method name
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0        # seconds spent executing SQL
+        self.statement_shapes: Dict[str, int] = {}  # normalized SQL -> executions
+        # Only counted while `sql_instrumentation` row counting is on.
+        self.rows_loaded = 0
+        self.statement_rows: Dict[str, int] = {}    # normalized SQL -> rows fetched
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+_finish_hooks: List[Callable[[RequestStats], None]] = []
+
+
+def on_finish(hook: Callable[[RequestStats], None]) -> None:
+    """Register `hook(stats)` to run whenever a request scope closes."""
+    _finish_hooks.append(hook)
+
+
+def current() -> Optional[RequestStats]:
+    """Return the stats of the request being handled, or None outside one."""
+    return _current.get()
+
+
+def start(kind: str, name: str):
+    """Open a request scope; returns `(stats, token)`. Pass the token to `finish`."""
+    stats = RequestStats(kind, name)
+    return stats, _current.set(stats)
+
+
+def finish(token) -> None:
+    stats = _current.get()
+    _current.reset(token)
+    for hook in _finish_hooks:
+        try:
+            hook(stats)
+        except Exception:
+            logger.exception("request finish hook failed")
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from .. import config, pool_monitor, profiler
+from ..deps import get_db, require_role
+from ..query_budget import query_budget
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/profile", response_class=PlainTextResponse,
+            dependencies=[Depends(require_role("course_audit_admin"))])
+@query_budget(statements=1, rows=1)
+def capture_profile(
+    seconds: float = Query(10.0, gt=0, le=config.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(profiler.DEFAULT_INTERVAL * 1000, ge=1, le=1000),
+    include_idle: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Sample every thread's stack for `seconds` and return collapsed stacks
+    (`thread;frame;...;leaf count` per line) for flamegraph.pl or speedscope.
+
+    Restricted to `course_audit_admin`. Returns 409 while another capture runs.
+    """
+    # The auth check left this request's session holding a pooled connection;
+    # don't pin it for the whole capture.
+    db.close()
+    try:
+        profile = profiler.capture(seconds, interval_ms / 1000.0, include_idle)
+    except profiler.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(profile.collapsed(), headers={
+        "X-Profile-Samples": str(profile.samples),
+        "X-Profile-Duration": f"{profile.duration:.3f}",
+        "X-Profile-Threads": str(profile.threads),
+    })
+
+
+@router.get("/pool", dependencies=[Depends(require_role("course_audit_admin"))])
+@query_budget(statements=1, rows=1)
+def pool_status():
+    """Who holds DB connections right now: per pool, its occupancy, every
+    checked-out connection with route, thread, age and checkout stack, and the
+    recent long-hold / exhaustion events. Restricted to `course_audit_admin`.
+
+    The auth check's own connection shows up as a holder while this runs.
+    """
+    return pool_monitor.snapshot()
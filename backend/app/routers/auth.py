@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from .. import crud, schemas
 from ..database import SessionLocal
+from ..query_budget import query_budget
 from ..deps import get_db
 from .. import config
 from datetime import timedelta
@@ -21,6 +22,7 @@ def get_db():
 
 
 @router.post("/login", response_model=schemas.Token)
+@query_budget(statements=7, rows=6)
 def login(form_data: OAuth2PasswordRequestForm = Depends(), response: Response = None, db: Session = Depends(get_db)):
     """Authenticate user, return access token in body and set HttpOnly refresh cookie.
 
@@ -55,6 +57,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), response: Response =
 
 
 @router.post("/refresh", response_model=schemas.Token)
+@query_budget(statements=2, rows=2)
 def refresh_token(refresh_token: typing.Optional[str] = Cookie(None), response: Response = None, db: Session = Depends(get_db)):
     """Read refresh token from HttpOnly cookie, verify, and issue a new access token.
 
@@ -71,6 +74,7 @@ def refresh_token(refresh_token: typing.Optional[str] = Cookie(None), response:
 
 
 @router.post("/logout")
+@query_budget(statements=2, rows=1)
 def logout(refresh_token: typing.Optional[str] = Cookie(None), response: Response = None, db: Session = Depends(get_db)):
     """Revoke the refresh token and clear cookie."""
     if refresh_token:
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from .. import outbox, pagination, schemas
+from ..deps import get_db, require_role
+from ..query_budget import query_budget
+
+router = APIRouter(prefix="/api/changes", tags=["changes"])
+
+
+@router.get("", response_model=schemas.ChangesPage, dependencies=[Depends(require_role("course_audit_admin"))])
+@query_budget(statements=3, rows=102)
+def list_changes(
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Course, enrollment and grade changes after the `since` cursor, oldest
+    first, for mirroring them downstream (`course_audit_admin` only).
+
+    Keep the returned `cursor` and pass it as `since` next time; while
+    `has_more` is true there is another page right away. Without `since` the
+    log is read from its oldest retained entry. 410 when the changes after
+    `since` were already compacted: re-list, then start over without `since`.
+    501 when the database is neither SQLite nor PostgreSQL (see `outbox`).
+    """
+    try:
+        changes, cursor, has_more = outbox.changes_since(db, since, limit)
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except outbox.CursorExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except outbox.Unsupported as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return {"changes": changes, "cursor": cursor, "has_more": has_more}
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
+from typing import List, Optional
+from .. import crud, schemas, pagination, search, read_models, streaming
 from ..database import SessionLocal
+from ..query_budget import query_budget
 from ..deps import get_current_user, require_role, get_db
 
 router = APIRouter(prefix="/api/courses", tags=["courses"])
@@ -17,19 +18,56 @@ def get_db():
         db.close()
 
 
-@router.get("/", response_model=List[schemas.CourseRead])
-def list_courses(db: Session = Depends(get_db)):
-    return crud.get_courses(db)
+@router.get("/", response_model=List[schemas.CourseRead], responses={200: {"content": {streaming.NDJSON_MEDIA_TYPE: {}}}})
+@query_budget(statements=1, rows=21)
+def list_courses(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    instructor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """List courses one page at a time; the next cursor is in `X-Next-Cursor`.
+
+    With `Accept: application/x-ndjson` the courses after `cursor` (all of
+    them, or `limit`) are streamed one `CourseRead` object per line instead.
+    """
+    try:
+        if streaming.accepts_ndjson(accept):
+            stmt = pagination.keyset_query(read_models.courses_query(instructor), read_models.Course.id, cursor, limit)
+            db.close()  # the stream reads on its own session
+            return streaming.ndjson_response(stmt, schemas.CourseRead, headers={"Vary": "Accept"})
+        courses, next_cursor = read_models.list_courses_page(db, limit=limit, cursor=cursor, instructor=instructor)
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Vary"] = "Accept"
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return courses
+
+
+@router.get("/search", response_model=List[schemas.CourseRead])
+@query_budget(statements=3, rows=21)
+def search_courses(
+    q: str = Query(..., min_length=1, max_length=128),
+    limit: int = Query(search.DEFAULT_LIMIT, ge=1, le=search.MAX_LIMIT),
+    db: Session = Depends(get_db),
+):
+    """Typeahead search over course code (prefix first) and name."""
+    return search.search_courses(db, q, limit=limit)
 
 
 @router.post("/", response_model=schemas.CourseRead, status_code=status.HTTP_201_CREATED,
              dependencies=[Depends(require_role("course_audit_admin"))])
+@query_budget(statements=4, rows=2)
 def create_course(course_in: schemas.CourseCreate, db: Session = Depends(get_db)):
     """Create a new course. Restricted to `course_audit_admin` role."""
     return crud.create_course(db, course_in)
 
 
 @router.put("/{course_id}", response_model=schemas.CourseRead, dependencies=[Depends(require_role("course_audit_admin"))])
+@query_budget(statements=5, rows=3)
 def update_course(course_id: int, course_in: schemas.CourseCreate, db: Session = Depends(get_db)):
     """Update an existing course. Restricted to `course_audit_admin`."""
     updated = crud.update_course(db, course_id, course_in.dict())
@@ -39,6 +77,7 @@ def update_course(course_id: int, course_in: schemas.CourseCreate, db: Session =
 
 
 @router.delete("/{course_id}", dependencies=[Depends(require_role("course_audit_admin"))])
+@query_budget(statements=7, rows=2)
 def delete_course(course_id: int, db: Session = Depends(get_db)):
     """Delete a course. Restricted to `course_audit_admin`."""
     ok = crud.delete_course(db, course_id)
@@ -0,0 +1,52 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from .. import read_models, streaming
+from ..deps import get_db, require_role
+from ..query_budget import query_budget
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+
+ExportFormat = Literal["csv", "ndjson", "parquet", "arrow"]
+
+
+def _export(stmt, fmt: str, filename: str, db: Session) -> streaming.RowStreamResponse:
+    # The export reads on its own session for as long as the download takes;
+    # don't also pin the connection the auth check used.
+    db.close()
+    return streaming.RowStreamResponse(
+        streaming.encode(stmt, fmt), media_type=streaming.MEDIA_TYPES[fmt], filename=f"{filename}.{fmt}"
+    )
+
+
+def _require_course(db: Session, course_id: int):
+    if read_models.get_course(db, course_id) is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+
+@router.get("/courses/{course_id}/roster", dependencies=[Depends(require_role("faculty", "course_audit_admin"))])
+# One streamed statement; rows are the whole roster, so the budget is the checker's largest course.
+@query_budget(statements=3, rows=42)
+def export_course_roster(course_id: int, format: ExportFormat = "csv", db: Session = Depends(get_db)):
+    """Every student enrolled in the course with their grade, streamed as CSV,
+    NDJSON, Parquet or an Arrow stream (`format`)."""
+    _require_course(db, course_id)
+    stmt = read_models.course_roster_query(course_id).order_by(read_models.Enrollment.student_id)
+    return _export(stmt, format, f"course-{course_id}-roster", db)
+
+
+@router.get("/courses/{course_id}/grades", dependencies=[Depends(require_role("faculty", "course_audit_admin"))])
+@query_budget(statements=3, rows=42)
+def export_course_grades(course_id: int, format: ExportFormat = "csv", db: Session = Depends(get_db)):
+    """The course's grades, streamed in `format`."""
+    _require_course(db, course_id)
+    return _export(read_models.grades_query(course_id), format, f"course-{course_id}-grades", db)
+
+
+@router.get("/grades", dependencies=[Depends(require_role("course_audit_admin"))])
+@query_budget(statements=2, rows=1240)
+def export_grades(format: ExportFormat = "csv", db: Session = Depends(get_db)):
+    """The full grade table, streamed in `format` (`course_audit_admin` only)."""
+    return _export(read_models.grades_query(), format, "grades", db)
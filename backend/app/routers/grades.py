@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
+from typing import List, Optional
+from .. import crud, schemas, pagination, read_models, course_stats
 from ..database import SessionLocal
+from ..query_budget import query_budget
 from ..deps import get_current_user, require_role
 
 router = APIRouter(prefix="/api/faculty", tags=["grades"])
@@ -17,6 +18,9 @@ def get_db():
 
 
 @router.post("/courses/{course_id}/grades", dependencies=[Depends(require_role("faculty"))])
+# crud.upload_grades does two lookups per entry, then reads the grade groups of the
+# batch's students for their summaries; this is for a 10-entry batch.
+@query_budget(statements=33, rows=51)
 def upload_grades(course_id: int, payload: schemas.GradeUpload, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     """Faculty-only endpoint to upload grades for a course.
 
@@ -26,11 +30,70 @@ def upload_grades(course_id: int, payload: schemas.GradeUpload, db: Session = De
     return {"created": len(created)}
 
 
-@router.get("/me/grades", tags=["grades"])  # note: path under /api/faculty for this scaffold
+@router.get("/courses/{course_id}/roster", response_model=List[schemas.RosterEntry],
+            dependencies=[Depends(require_role("faculty"))])
+@query_budget(statements=3, rows=23)
+def get_course_roster(
+    course_id: int,
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Students enrolled in a course, each with their current grade (faculty only).
+
+    The `ETag` changes whenever the course's enrollments or grades change; send it
+    back in `If-None-Match` to get a bodyless 304 while nothing has changed.
+    """
+    tag = crud.get_course_version_tag(db, course_id)
+    if tag is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    etag = f'W/"{tag}"'
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    try:
+        rows, next_cursor = read_models.course_roster_page(db, course_id, limit=limit, cursor=cursor)
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
+@router.get("/courses/{course_id}/stats", response_model=schemas.CourseStats,
+            dependencies=[Depends(require_role("faculty", "course_audit_admin"))])
+@query_budget(statements=3, rows=12)
+def get_course_stats(
+    course_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Grade statistics for a course, overall and per semester.
+
+    Results are cached until a grade in the course changes; the `ETag` follows
+    the same version, so `If-None-Match` gets a 304 without touching the grades.
+    """
+    version = course_stats.grades_version(db, course_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    etag = f'W/"{course_stats.version_tag(course_id, version)}"'
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    stats = course_stats.get_course_stats(db, course_id, version)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return stats
+
+
+@router.get("/me/grades", response_model=List[schemas.GradeRead], tags=["grades"])  # note: path under /api/faculty for this scaffold
+@query_budget(statements=2, rows=11)
 def get_my_grades(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     """Get grades for the authenticated user.
 
     The frontend will call `/api/faculty/me/grades` with the user's access token.
     """
-    grades = crud.get_grades_for_student(db, student_id=current_user.id)
-    return grades
+    return read_models.grades_for_student(db, student_id=current_user.id)
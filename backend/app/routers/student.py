@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from sqlalchemy.orm import Session
+from typing import Optional
 
-from .. import crud, schemas, models
+from .. import crud, schemas, models, pagination, read_models, streaming
 from ..database import SessionLocal
+from ..query_budget import query_budget
 from ..deps import get_current_user, require_role
 
 router = APIRouter(prefix="/api/student", tags=["student"])
@@ -14,11 +16,32 @@ def get_db():
     finally:
         db.close()
 
-@router.get("/courses", response_model=list[schemas.CourseRead])
-def list_courses(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_courses(db)
+@router.get("/courses", response_model=list[schemas.CourseRead], responses={200: {"content": {streaming.NDJSON_MEDIA_TYPE: {}}}})
+@query_budget(statements=2, rows=22)
+def list_courses(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    instructor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    try:
+        if streaming.accepts_ndjson(accept):
+            stmt = pagination.keyset_query(read_models.courses_query(instructor), read_models.Course.id, cursor, limit)
+            streaming.close_sessions(db, current_user)  # the stream reads on its own session
+            return streaming.ndjson_response(stmt, schemas.CourseRead, headers={"Vary": "Accept"})
+        courses, next_cursor = read_models.list_courses_page(db, limit=limit, cursor=cursor, instructor=instructor)
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Vary"] = "Accept"
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return courses
 
 @router.post("/courses/{course_id}/enroll")
+@query_budget(statements=7, rows=2)
 def enroll_in_course(
     course_id: int,
     db: Session = Depends(get_db),
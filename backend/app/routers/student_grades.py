@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Request, Response
+from typing import Optional
 from sqlalchemy.orm import Session
 
-from .. import crud, schemas, models
+from .. import schemas, models, read_models, sse, streaming, student_summary
+from ..events import hub, student_grades_topic
 from ..database import SessionLocal
+from ..query_budget import query_budget
 from ..deps import get_current_user
 
 router = APIRouter(prefix="/api/student", tags=["student-grades"])
@@ -14,10 +17,56 @@ def get_db():
     finally:
         db.close()
 
-@router.get("/me/grades", response_model=list[schemas.GradeRead])
+@router.get("/me/grades", response_model=list[schemas.GradeRead], responses={200: {"content": {streaming.NDJSON_MEDIA_TYPE: {}}}})
+@query_budget(statements=2, rows=11)
 def get_student_grades(
+    response: Response,
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Return grades for the authenticated student."""
-    return crud.get_grades_for_student(db, student_id=current_user.id)
+    """Return grades for the authenticated student.
+
+    With `Accept: application/x-ndjson` they are streamed one `GradeRead` object per line.
+    """
+    if streaming.accepts_ndjson(accept):
+        student_id = current_user.id
+        streaming.close_sessions(db, current_user)  # the stream reads on its own session
+        return streaming.ndjson_response(read_models.grades_for_student_query(student_id), schemas.GradeRead,
+                                         headers={"Vary": "Accept"})
+    response.headers["Vary"] = "Accept"
+    return read_models.grades_for_student(db, student_id=current_user.id)
+
+
+@router.get("/me/grades/events", response_class=sse.EventStreamResponse,
+            responses={200: {"content": {sse.MEDIA_TYPE: {}}}})
+@query_budget(statements=1, rows=1)
+def grade_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Server-sent events: a `grade` event (a `GradeRead` object) whenever one of
+    the authenticated student's grades is published or changed.
+
+    Reconnect with `Last-Event-ID` to receive what was missed; a `reset` event
+    means that is not possible and the grades should be refetched from
+    `/api/student/me/grades`. 503 when this worker has `SSE_MAX_CONNECTIONS`
+    streams open.
+    """
+    topic = student_grades_topic(current_user.id)
+    streaming.close_sessions(current_user)  # don't hold a connection for the life of the stream
+    return sse.EventStreamResponse(request, hub, [topic], last_event_id)
+
+
+@router.get("/me/transcript", response_model=schemas.Transcript)
+@query_budget(statements=2, rows=2)
+def get_student_transcript(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """GPA, credits and per-semester totals for the authenticated student.
+
+    Reads the student's row in `student_summaries`, kept up to date by grade uploads.
+    """
+    return student_summary.get_transcript(db, current_user.id)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
+from typing import List, Optional
+from .. import crud, schemas, pagination, search, read_models, streaming
 from ..database import SessionLocal
+from ..query_budget import query_budget
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -15,14 +16,56 @@ def get_db():
         db.close()
 
 
-@router.get("/", response_model=List[schemas.UserRead])
-def list_users(db: Session = Depends(get_db)):
-    """List all users (for faculty to select students during grade upload)."""
-    users = crud.get_all_users(db)
+@router.get("/", response_model=List[schemas.UserRead], responses={200: {"content": {streaming.NDJSON_MEDIA_TYPE: {}}}})
+@query_budget(statements=1, rows=21)
+def list_users(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """List users one page at a time (for faculty to select students during grade upload).
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next
+    page; the header is absent on the last page. `limit` defaults to
+    `pagination.DEFAULT_PAGE_SIZE`.
+
+    With `Accept: application/x-ndjson` the users after `cursor` (all of them,
+    or `limit`) are streamed one `UserRead` object per line instead.
+    """
+    try:
+        if streaming.accepts_ndjson(accept):
+            stmt = pagination.keyset_query(read_models.users_query(role), read_models.User.id, cursor, limit)
+            db.close()  # the stream reads on its own session
+            return streaming.ndjson_response(stmt, schemas.UserRead, headers={"Vary": "Accept"})
+        users, next_cursor = read_models.list_users_page(db, limit=limit, cursor=cursor, role=role)
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Vary"] = "Accept"
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
     return users
 
 
+@router.get("/search", response_model=List[schemas.UserRead])
+@query_budget(statements=3, rows=21)
+def search_users(
+    q: str = Query(..., min_length=1, max_length=128),
+    role: Optional[str] = None,
+    limit: int = Query(search.DEFAULT_LIMIT, ge=1, le=search.MAX_LIMIT),
+    db: Session = Depends(get_db),
+):
+    """Typeahead search: usernames starting with `q` first, then substring matches.
+
+    Use `role=student` for the faculty grade-entry picker.
+    """
+    return search.search_users(db, q, role=role, limit=limit)
+
+
 @router.post("/", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
+@query_budget(statements=3, rows=1)
 def create_user(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     existing = db.query.__self__.query if False else None
     # Basic duplicate check
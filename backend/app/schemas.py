@@ -73,3 +73,86 @@ class GradeRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class RosterEntry(BaseModel):
+    """One enrolled student and their grade in the course (None until graded)."""
+    student_id: int
+    username: str
+    email: Optional[str] = None
+    enrolled_at: Optional[datetime] = None
+    grade_id: Optional[int] = None
+    grade_value: Optional[str] = None
+    semester: Optional[str] = None
+    uploaded_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class GradeBucket(BaseModel):
+    grade_value: str
+    count: int
+    points: Optional[float] = None  # None for values without grade points (INC, W, ...)
+
+
+class GradeStats(BaseModel):
+    """Statistics over a set of grades; numbers cover only grades with points."""
+    semester: Optional[str] = None
+    count: int
+    graded: int
+    mean: Optional[float] = None
+    stddev: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    p25: Optional[float] = None
+    median: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+    distribution: List[GradeBucket] = []
+
+
+class CourseStats(BaseModel):
+    course_id: int
+    version: int
+    overall: GradeStats
+    semesters: List[GradeStats]
+
+
+class TranscriptTotals(BaseModel):
+    """GPA over grades with points, weighted by credits; None until there is one."""
+    gpa: Optional[float] = None
+    courses: int
+    graded: int
+    credits_attempted: int
+    credits_earned: int
+
+
+class TranscriptSemester(TranscriptTotals):
+    semester: Optional[str] = None
+
+
+class Transcript(TranscriptTotals):
+    student_id: int
+    semesters: List[TranscriptSemester] = []
+    updated_at: Optional[datetime] = None
+
+
+class Change(BaseModel):
+    """A change log entry; `data` is the entity after the change, None for deletes."""
+    id: int
+    entity: str
+    entity_id: int
+    op: str
+    data: Optional[dict] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class ChangesPage(BaseModel):
+    changes: List[Change]
+    # Pass as `since` next time; unchanged when there was nothing new.
+    cursor: str
+    has_more: bool
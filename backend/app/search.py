@@ -0,0 +1,192 @@
+"""Typeahead search over users and courses.
+
+On SQLite we keep FTS5 tables with the `trigram` tokenizer next to `users` and
+`courses` (external-content tables, so the text is not stored twice). Triggers
+keep them in step with every INSERT/UPDATE/DELETE, so nothing in `crud.py` has
+to remember to reindex.
+
+A search runs in two bounded phases so latency does not grow with table size:
+
+1. prefix matches, answered by a range scan on the `lower(username)` /
+   `lower(code)` index and returned in index order;
+2. if the page is not full and the query is at least three characters (one
+   trigram), substring matches from the FTS index, capped at a small multiple
+   of `limit` and ranked in Python by where the match starts and how short the
+   value is.
+
+Both phases ignore case (the trigram tokenizer folds case too), so "cs" and
+"CS" find the same courses.
+
+We deliberately do not ORDER BY `bm25()`: ranking would have to score every
+match, and a query like "stu" matches most of the `users` table.
+
+Other databases (e.g. PostgreSQL in production) fall back to case-insensitive
+`LIKE` for phase 2; add a `pg_trgm` GIN index there if it becomes hot.
+"""
+import logging
+from typing import List, Optional
+
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.orm import Session
+
+from . import models, read_models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Substring candidates fetched per requested result before ranking.
+CANDIDATE_FACTOR = 4
+# Sorts after every valid UTF-8 string, so [q, q + _PREFIX_END) is "starts with q".
+_PREFIX_END = "\U0010ffff"
+
+# table -> (fts table, indexed columns)
+_FTS_SPECS = {
+    "users": ("users_fts", ("username", "email")),
+    "courses": ("courses_fts", ("code", "name")),
+}
+# FTS tables successfully installed on this process's engine(s).
+_fts_ready = set()
+
+
+def _fts_ddl(table: str, fts: str, columns) -> List[str]:
+    cols = ", ".join(columns)
+    new_vals = ", ".join(f"coalesce(new.{c}, '')" for c in columns)
+    old_vals = ", ".join(f"coalesce(old.{c}, '')" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+    ]
+
+
+def install_search_index(engine) -> None:
+    """Create the FTS tables and triggers if missing (SQLite only).
+
+    A newly created index is backfilled from the base table. Called from
+    `database.init_db`; safe to call repeatedly.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    for table, (fts, columns) in _FTS_SPECS.items():
+        try:
+            with engine.begin() as conn:
+                exists = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+                ).first()
+                statements = _fts_ddl(table, fts, columns)
+                if exists:
+                    statements = statements[1:]
+                for stmt in statements:
+                    conn.exec_driver_sql(stmt)
+                if not exists:
+                    conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            _fts_ready.add(fts)
+        except Exception as e:  # e.g. SQLite older than 3.34 has no trigram tokenizer
+            logger.warning("Search index %s unavailable, falling back to LIKE: %s", fts, e)
+
+
+def _clamp(limit: Optional[int]) -> int:
+    if not limit or limit < 0:
+        return DEFAULT_LIMIT
+    return min(limit, MAX_LIMIT)
+
+
+def _match_expr(q: str) -> str:
+    # A quoted FTS5 string is a phrase; with the trigram tokenizer that means
+    # "contains q as a substring", with no query-syntax surprises.
+    return '"' + q.replace('"', '""') + '"'
+
+
+def _rank(rows, q: str, *attrs):
+    """Order substring matches by earliest match position, then shortest value."""
+    needle = q.lower()
+
+    def key(row):
+        best = None
+        for attr in attrs:
+            value = (getattr(row, attr) or "").lower()
+            pos = value.find(needle)
+            if pos >= 0 and (best is None or (pos, len(value)) < best):
+                best = (pos, len(value))
+        return best or (1 << 30, 0)
+
+    return sorted(rows, key=key)
+
+
+def _substring_ids(db: Session, fts: str, q: str, n: int, role: Optional[str] = None) -> List[int]:
+    sql = f"SELECT {fts}.rowid FROM {fts}"
+    params = {"m": _match_expr(q), "n": n}
+    if role:
+        # CROSS JOIN pins the FTS table as the outer loop; otherwise SQLite may
+        # walk every user with that role and probe the index once per row.
+        sql += f" CROSS JOIN users ON users.id = {fts}.rowid"
+    sql += f" WHERE {fts} MATCH :m"
+    if role:
+        sql += " AND users.role = :role"
+        params["role"] = role
+    sql += " LIMIT :n"
+    return [r[0] for r in db.execute(text(sql), params)]
+
+
+def search_users(db: Session, q: str, role: Optional[str] = None, limit: int = DEFAULT_LIMIT):
+    """Return up to `limit` user rows whose username starts with or contains `q`
+    (email is matched as a substring too), optionally restricted to `role`."""
+    q = (q or "").strip()
+    if not q:
+        return []
+    limit = _clamp(limit)
+    User = models.User
+
+    results = read_models.users_with_username_prefix(db, q, q + _PREFIX_END, limit, role)
+    if len(results) >= limit or len(q) < 3:
+        return results
+
+    seen = {u.id for u in results}
+    wanted = (limit - len(results)) * CANDIDATE_FACTOR + len(seen)
+    if "users_fts" in _fts_ready:
+        ids = [i for i in _substring_ids(db, "users_fts", q, wanted, role) if i not in seen]
+        candidates = read_models.get_users_by_ids(db, ids) if ids else []
+    else:
+        needle = q.lower()
+        stmt = select(*read_models.USER_COLUMNS).where(or_(
+            func.lower(User.username).contains(needle, autoescape=True),
+            func.lower(User.email).contains(needle, autoescape=True),
+        ))
+        if role:
+            stmt = stmt.where(User.role == role)
+        candidates = [u for u in db.execute(stmt.limit(wanted)) if u.id not in seen]
+    return results + _rank(candidates, q, "username", "email")[: limit - len(results)]
+
+
+def search_courses(db: Session, q: str, limit: int = DEFAULT_LIMIT):
+    """Return up to `limit` course rows whose code starts with `q`, then courses
+    whose code or name contains it."""
+    q = (q or "").strip()
+    if not q:
+        return []
+    limit = _clamp(limit)
+    Course = models.Course
+
+    results = read_models.courses_with_code_prefix(db, q, q + _PREFIX_END, limit)
+    if len(results) >= limit or len(q) < 3:
+        return results
+
+    seen = {c.id for c in results}
+    wanted = (limit - len(results)) * CANDIDATE_FACTOR + len(seen)
+    if "courses_fts" in _fts_ready:
+        ids = [i for i in _substring_ids(db, "courses_fts", q, wanted) if i not in seen]
+        candidates = read_models.get_courses_by_ids(db, ids) if ids else []
+    else:
+        needle = q.lower()
+        stmt = select(*read_models.COURSE_COLUMNS).where(or_(
+            func.lower(Course.code).contains(needle, autoescape=True),
+            func.lower(Course.name).contains(needle, autoescape=True),
+        ))
+        candidates = [c for c in db.execute(stmt.limit(wanted)) if c.id not in seen]
+    return results + _rank(candidates, q, "code", "name")[: limit - len(results)]
@@ -0,0 +1,270 @@
+"""SQL statement instrumentation: per-request counts, N+1 detection, slow-query log.
+
+Engine events attribute every statement to the request or RPC being handled
+(`request_context.current()`):
+
+- statement count and DB time, which feed the `/metrics` histograms and, with
+  `config.DB_DEBUG_HEADERS`, the `X-DB-Queries` / `X-DB-Time` response headers
+  (`x-db-queries` / `x-db-time` trailing metadata on gRPC);
+- executions per statement *shape* (the SQL text with IN-lists and numeric
+  literals collapsed). When a shape runs `config.N_PLUS_ONE_THRESHOLD` times or
+  more in one request we log it as a likely N+1 when the request finishes;
+- statements slower than `config.SLOW_QUERY_MS` are logged with their
+  parameters (redacted for credential tables) and, if `SLOW_QUERY_EXPLAIN` is
+  on, the database's query plan;
+- with row counting on (`set_row_counting`, implied by `DB_DEBUG_HEADERS`),
+  rows fetched per request and per statement shape, reported in `X-DB-Rows`
+  and checked by the query budgets (`query_budget.py`). Counting wraps each
+  result cursor, so it is off by default.
+
+Statements outside any request (startup, scripts) are only checked for
+slowness.
+"""
+import logging
+import re
+import time
+from functools import lru_cache
+
+import grpc
+from sqlalchemy import event
+
+from . import config, metrics, request_context
+from .grpc_interceptors import wrap_rpc_handler
+
+logger = logging.getLogger(__name__)
+
+QUERIES_HEADER = "X-DB-Queries"
+DB_TIME_HEADER = "X-DB-Time"
+ROWS_HEADER = "X-DB-Rows"
+
+N_PLUS_ONE = metrics.counter(
+    "db_n_plus_one_total", "Requests where one statement shape repeated past the N+1 threshold.", ("route",)
+)
+SLOW_QUERIES = metrics.counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.")
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)"
+_IN_LIST = re.compile(r"\(\s*" + _PLACEHOLDER + r"(?:\s*,\s*" + _PLACEHOLDER + r")+\s*\)")
+_NUMBER = re.compile(r"(?<![\w.$:])\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("select", "with", "update", "delete")
+_SENSITIVE_COLUMNS = ("password_hash", "token_hash")
+_MAX_PARAM_CHARS = 500
+
+_count_rows = config.DB_DEBUG_HEADERS
+
+
+def set_row_counting(enabled: bool) -> None:
+    """Turn per-request row counting on or off for all instrumented engines."""
+    global _count_rows
+    _count_rows = enabled
+
+
+class _RowCountingCursor:
+    """DBAPI cursor proxy that adds fetched rows to the request's stats."""
+    __slots__ = ("_cursor", "_stats", "_shape")
+
+    def __init__(self, cursor, stats, shape):
+        self._cursor = cursor
+        self._stats = stats
+        self._shape = shape
+
+    def _add(self, n):
+        if n:
+            self._stats.rows_loaded += n
+            self._stats.statement_rows[self._shape] = self._stats.statement_rows.get(self._shape, 0) + n
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._add(row is not None)
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._add(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._add(len(rows))
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """Normalize SQL so executions that differ only in values compare equal."""
+    shape = _WHITESPACE.sub(" ", statement.strip())
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _NUMBER.sub("N", shape)
+
+
+def _format_params(statement: str, parameters) -> str:
+    if any(col in statement for col in _SENSITIVE_COLUMNS):
+        return "<redacted>"
+    text = repr(parameters)
+    return text if len(text) <= _MAX_PARAM_CHARS else text[:_MAX_PARAM_CHARS] + "...(truncated)"
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    """Return the query plan as text, using the raw DBAPI connection so the
+    EXPLAIN itself does not go through (and re-trigger) these hooks."""
+    if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+        return ""
+    sqlite = conn.dialect.name == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        # Elsewhere (PostgreSQL) a failed statement aborts the whole transaction:
+        # run the EXPLAIN in a savepoint so the request's own work survives it.
+        if not sqlite:
+            cursor.execute("SAVEPOINT p4_explain")
+        cursor.execute(prefix + statement, parameters)
+        plan = "\n".join("    " + " | ".join(str(c) for c in row) for row in cursor.fetchall())
+        if not sqlite:
+            cursor.execute("RELEASE SAVEPOINT p4_explain")
+        return plan
+    except Exception as e:
+        if not sqlite:
+            try:
+                cursor.execute("ROLLBACK TO SAVEPOINT p4_explain")
+                cursor.execute("RELEASE SAVEPOINT p4_explain")
+            except Exception:
+                pass  # no savepoint (e.g. autocommit): nothing to undo
+        return f"    (EXPLAIN failed: {e})"
+    finally:
+        cursor.close()
+
+
+def _log_slow(conn, statement, parameters, elapsed, executemany):
+    SLOW_QUERIES.inc()
+    stats = request_context.current()
+    where = f"{stats.kind} {stats.name}" if stats else "no request"
+    plan = ""
+    if config.SLOW_QUERY_EXPLAIN and not executemany:
+        plan = _explain(conn, statement, parameters)
+    logger.warning(
+        "Slow query (%.1f ms, %s): %s\n  params: %s%s",
+        elapsed * 1000.0, where, _WHITESPACE.sub(" ", statement.strip()),
+        _format_params(statement, parameters),
+        f"\n  plan:\n{plan}" if plan else "",
+    )
+
+
+def _report_n_plus_one(stats) -> None:
+    if stats is None or not stats.statement_shapes:
+        return
+    threshold = config.N_PLUS_ONE_THRESHOLD
+    repeated = [(n, shape) for shape, n in stats.statement_shapes.items() if n >= threshold]
+    if not repeated:
+        return
+    N_PLUS_ONE.labels(stats.name).inc()
+    for n, shape in sorted(repeated, reverse=True):
+        logger.warning(
+            "Possible N+1 in %s %s: statement ran %d times (%d statements total): %s",
+            stats.kind, stats.name, n, stats.query_count, shape,
+        )
+
+
+def instrument_engine(engine) -> None:
+    """Attach the statement hooks to `engine`. Call once per engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = request_context.current()
+        if stats is not None:
+            stats.query_count += 1
+            stats.db_time += elapsed
+            shape = statement_shape(statement)
+            stats.statement_shapes[shape] = stats.statement_shapes.get(shape, 0) + 1
+            if _count_rows and context is not None and cursor.description is not None:
+                # The result object is built from `context.cursor` after this
+                # hook returns, so its fetches go through the proxy.
+                context.cursor = _RowCountingCursor(cursor, stats, shape)
+        if elapsed * 1000.0 >= config.SLOW_QUERY_MS:
+            _log_slow(conn, statement, parameters, elapsed, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get("query_start") if conn is not None else None
+        if starts:
+            starts.pop()
+
+
+request_context.on_finish(_report_n_plus_one)
+
+
+def _debug_values(stats):
+    return str(stats.query_count), f"{stats.db_time * 1000.0:.2f}ms", str(stats.rows_loaded)
+
+
+class QueryStatsHeaderMiddleware:
+    """Adds `X-DB-Queries` / `X-DB-Time` / `X-DB-Rows` to responses. Must run inside
+    `metrics.MetricsMiddleware`, which opens the request scope.
+
+    For streaming responses the headers reflect the work done before the first
+    byte was sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = request_context.current()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and stats is not None:
+                queries, db_time, rows = _debug_values(stats)
+                headers = list(message.get("headers", []))
+                headers.append((QUERIES_HEADER.lower().encode(), queries.encode()))
+                headers.append((DB_TIME_HEADER.lower().encode(), db_time.encode()))
+                headers.append((ROWS_HEADER.lower().encode(), rows.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class QueryStatsInterceptor(grpc.ServerInterceptor):
+    """gRPC counterpart: sets `x-db-queries` / `x-db-time` / `x-db-rows` trailing metadata.
+    Install after `metrics.MetricsInterceptor`."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        def trailers(context):
+            stats = request_context.current()
+            if stats is not None:
+                queries, db_time, rows = _debug_values(stats)
+                context.set_trailing_metadata(
+                    (("x-db-queries", queries), ("x-db-time", db_time), ("x-db-rows", rows)))
+
+        def unary(behavior):
+            def wrapper(request, context):
+                try:
+                    return behavior(request, context)
+                finally:
+                    trailers(context)
+            return wrapper
+
+        def stream(behavior):
+            def wrapper(request, context):
+                try:
+                    yield from behavior(request, context)
+                finally:
+                    trailers(context)
+            return wrapper
+
+        return wrap_rpc_handler(handler, unary, stream)
@@ -0,0 +1,112 @@
+"""Server-sent events over the in-process hub (`events.py`).
+
+`event_stream` turns a hub subscription into a `text/event-stream` body:
+
+- `retry:` first, then the events of the subscribed topics as they are
+  published, each with `id:` set to its resume token;
+- a reconnecting client sends the last id it saw as `Last-Event-ID` and gets
+  what it missed from the hub's replay buffer first. When that is no longer
+  complete (or the id is from before a restart) it gets one `reset` event
+  instead and should refetch the resource over REST;
+- a fresh connection starts with a `ready` event whose id is the hub's current
+  position, so even a client that has seen no event yet can resume;
+- a comment line every `SSE_HEARTBEAT_SECONDS` keeps proxies from timing the
+  connection out and notices dead clients;
+- a subscriber that falls `EVENTS_QUEUE_SIZE` events behind is disconnected;
+  its client reconnects and replays.
+
+Open streams hold no DB connection and no threadpool thread, only a coroutine,
+but each is a subscription and a socket, so `EventStreamResponse` caps them
+per worker at `SSE_MAX_CONNECTIONS` (503 with `Retry-After` beyond that).
+"""
+import asyncio
+import json
+import threading
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Request
+from starlette.responses import StreamingResponse
+
+from . import config, metrics
+from .events import Event, EventHub
+
+MEDIA_TYPE = "text/event-stream"
+HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+OPEN_STREAMS = metrics.gauge("sse_open_streams", "Open server-sent event streams.")
+REJECTED = metrics.counter("sse_rejected_total", "SSE connections refused at SSE_MAX_CONNECTIONS.")
+
+_open = 0
+_open_lock = threading.Lock()
+
+
+def _acquire_slot() -> None:
+    global _open
+    with _open_lock:
+        if _open >= config.SSE_MAX_CONNECTIONS:
+            REJECTED.inc()
+            raise HTTPException(status_code=503, detail="Too many open event streams",
+                                headers={"Retry-After": str(max(1, config.SSE_RETRY_MS // 1000))})
+        _open += 1
+    OPEN_STREAMS.inc()
+
+
+def _release_slot() -> None:
+    global _open
+    with _open_lock:
+        _open -= 1
+    OPEN_STREAMS.dec()
+
+
+def format_event(data: dict, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _format(hub: EventHub, e: Event) -> str:
+    return format_event(e.data, e.kind, hub.token(e.seq))
+
+
+async def event_stream(request: Request, hub: EventHub, topics: Iterable[str], last_event_id: Optional[str]):
+    """Async generator of SSE frames for `topics`; see the module docstring."""
+    sub, missed, start, position = hub.resume(topics, last_event_id, loop=asyncio.get_running_loop())
+    try:
+        yield f"retry: {config.SSE_RETRY_MS}\n\n"
+        if start != "resumed":
+            yield format_event({}, start, hub.token(position))
+        for e in missed:
+            yield _format(hub, e)
+        while True:
+            e = await sub.get_async(timeout=config.SSE_HEARTBEAT_SECONDS)
+            if e is not None:
+                yield _format(hub, e)
+            elif sub.closed:  # overflowed or shutting down: make the client reconnect and replay
+                return
+            elif await request.is_disconnected():
+                return
+            else:
+                yield ": ping\n\n"
+    finally:
+        sub.close()
+
+
+class EventStreamResponse(StreamingResponse):
+    """`event_stream` as a response, holding one of the worker's stream slots
+    from construction (503 if none is free) until the response ends."""
+
+    def __init__(self, request: Request, hub: EventHub, topics: Iterable[str], last_event_id: Optional[str] = None):
+        _acquire_slot()
+        super().__init__(event_stream(request, hub, topics, last_event_id), media_type=MEDIA_TYPE, headers=HEADERS)
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Unsubscribes right away, also when the client went away mid-stream.
+            await self.body_iterator.aclose()
+            _release_slot()
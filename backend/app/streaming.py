@@ -0,0 +1,258 @@
+"""Streaming response bodies straight from a DB cursor.
+
+JSON list endpoints build the whole result in memory before sending a byte.
+For exports and large lists that is a non-starter, so these helpers move rows from the database to
+the socket one batch at a time:
+
+- `fetch_batches` runs a select on its own session with `yield_per`, so rows
+  come off the cursor `batch_size` at a time instead of being fetched up front;
+- `csv_chunks`, `ndjson_chunks` and `arrow_chunks` (Parquet or the Arrow IPC
+  stream format, with the optional `pyarrow`) encode each batch into one chunk;
+  `ndjson_chunks` can serialize each row with the endpoint's response schema,
+  which is how list endpoints answer `Accept: application/x-ndjson`
+  (`accepts_ndjson`, `ndjson_response`);
+- `RowStreamResponse` sends the chunks with chunked transfer encoding. The next
+  batch is only fetched after the previous chunk was handed to the server, so a
+  slow client slows the cursor down rather than filling memory, and the chunk
+  iterator is closed as soon as the response ends, including when the client
+  disconnects midway, which releases the cursor and its pooled connection.
+
+Memory stays at about one batch whatever the size of the result.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Sequence, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, object_session
+from starlette.concurrency import iterate_in_threadpool
+from starlette.responses import StreamingResponse
+
+from . import config
+from .database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": NDJSON_MEDIA_TYPE,
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+FORMATS = tuple(MEDIA_TYPES)
+
+
+def fetch_batches(stmt, batch_size: int = None) -> Iterator[list]:
+    """Run `stmt` on a dedicated session and yield its rows in lists of up to
+    `batch_size` (default `config.EXPORT_BATCH_ROWS`).
+
+    The session lives as long as the iteration: close the generator (or let it
+    finish) to release the connection.
+    """
+    batch_size = batch_size or config.EXPORT_BATCH_ROWS
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(columns: Sequence[str], batches: Iterator[list]) -> Iterator[bytes]:
+    """A header line, then one chunk of CSV lines per batch."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(columns)
+    try:
+        for batch in batches:
+            writer.writerows([_csv_value(v) for v in row] for row in batch)
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():  # header only: no rows
+            yield buf.getvalue().encode()
+    finally:
+        batches.close()
+
+
+def ndjson_chunks(batches: Iterator[list], schema: Optional[Type[BaseModel]] = None) -> Iterator[bytes]:
+    """One JSON object per row and line, one chunk per batch.
+
+    Rows become `{column: value}`, or with `schema` exactly the object the
+    JSON endpoints serialize for that row. Datetimes are ISO 8601 either way.
+    """
+    if schema is not None:
+        def line(row):
+            return schema.model_validate(row, from_attributes=True).model_dump_json()
+    else:
+        dumps = json.JSONEncoder(default=_json_default, separators=(",", ":")).encode
+
+        def line(row):
+            return dumps(row._asdict())
+    try:
+        for batch in batches:
+            yield "".join(line(row) + "\n" for row in batch).encode()
+    finally:
+        batches.close()
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last `take()`."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _arrow_type(pa, column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pa.string()
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def arrow_chunks(stmt, batches: Iterator[list], fmt: str) -> Iterator[bytes]:
+    """Parquet (one row group per batch) or an Arrow IPC stream (one record
+    batch per batch), typed from `stmt`'s selected columns."""
+    pa = require_pyarrow()
+    schema = pa.schema([(c.key, _arrow_type(pa, c)) for c in stmt.selected_columns])
+    sink = _Sink()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+    finally:
+        batches.close()
+
+
+def require_pyarrow():
+    """Import `pyarrow`, or 501 if it is not installed (it is optional)."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Parquet and Arrow output need pyarrow installed on the server")
+    return pyarrow
+
+
+def encode(stmt, fmt: str, batches: Iterator[list] = None) -> Iterator[bytes]:
+    """Chunks of `stmt`'s rows in `fmt` (one of `FORMATS`)."""
+    if fmt in ("parquet", "arrow"):
+        require_pyarrow()  # before the response starts, so the error is a status code
+    batches = batches if batches is not None else fetch_batches(stmt)
+    if fmt == "csv":
+        return csv_chunks([c.key for c in stmt.selected_columns], batches)
+    if fmt == "ndjson":
+        return ndjson_chunks(batches)
+    return arrow_chunks(stmt, batches, fmt)
+
+
+def accepts_ndjson(accept: Optional[str]) -> bool:
+    """Whether an `Accept` header asks for NDJSON over plain JSON.
+
+    NDJSON has to be named explicitly, with a quality at least that of
+    `application/json`; wildcards keep the JSON default.
+    """
+    if not accept:
+        return False
+    quality = {}
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        quality[media_type.lower()] = max(q, quality.get(media_type.lower(), 0.0))
+    ndjson = quality.get(NDJSON_MEDIA_TYPE, 0.0)
+    return ndjson > 0 and ndjson >= quality.get("application/json", 0.0)
+
+
+def close_sessions(*items) -> None:
+    """Close request sessions, given directly or through an object loaded in
+    one (such as `current_user`), before a long stream starts, so they don't
+    hold pooled connections until it ends."""
+    for item in items:
+        db = item if isinstance(item, Session) else object_session(item)
+        if db is not None:
+            db.close()
+
+
+def ndjson_response(stmt, schema: Type[BaseModel], headers=None) -> "RowStreamResponse":
+    """Stream `stmt`'s rows as NDJSON, one `schema` object per line."""
+    return RowStreamResponse(ndjson_chunks(fetch_batches(stmt), schema), media_type=NDJSON_MEDIA_TYPE,
+                             headers=headers)
+
+
+class RowStreamResponse(StreamingResponse):
+    """`StreamingResponse` over a blocking chunk iterator such as `encode(...)`.
+
+    Each chunk is produced in the threadpool; the iterator is closed when the
+    response ends for any reason, so its cursor does not outlive a disconnect.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], media_type: str, filename: Optional[str] = None, headers=None):
+        self._chunks = chunks
+        headers = dict(headers or {})
+        if filename:
+            headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        super().__init__(iterate_in_threadpool(chunks), media_type=media_type, headers=headers)
+
+    async def stream_response(self, send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            self._chunks.close()
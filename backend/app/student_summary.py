@@ -0,0 +1,156 @@
+"""Materialized per-student transcript summaries (`models.StudentSummary`).
+
+A transcript used to mean reading all of a student's grades, joining their
+courses and converting every grade string on each request. Instead the
+summary (GPA, credits, per-semester aggregates) is written when grades change:
+
+- `refresh(db, student_ids)` recomputes the given students from their grades
+  and replaces their rows. `crud.upload_grades` calls it after flushing the
+  grade writes and before committing, so a summary never disagrees with the
+  grades it was computed from.
+- `rebuild(db)` recomputes every row, for backfilling an existing database or
+  after grades were written around `crud` (bulk loads, manual SQL). See
+  `backend/scripts/rebuild_summaries.py`.
+- `get_transcript(db, student_id)` reads the one row.
+
+Concurrent refreshes of one student are serialized on the student's `users`
+row, so the last one to commit always saw the other's grades.
+
+Each student's grades are aggregated in SQL into `(semester, grade_value,
+count)` groups, so a refresh costs one indexed GROUP BY however many students
+an upload touches. Points come from `grading.grade_points`; every course is
+worth `grading.COURSE_CREDITS`, since courses carry no units.
+"""
+import itertools
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import models, tracing
+from .grading import COURSE_CREDITS, grade_points, is_passing
+
+Grade, StudentSummary, User = models.Grade, models.StudentSummary, models.User
+
+BATCH_SIZE = 2000
+
+SUMMARY_COLUMNS = (
+    StudentSummary.student_id, StudentSummary.gpa, StudentSummary.courses, StudentSummary.graded,
+    StudentSummary.credits_attempted, StudentSummary.credits_earned, StudentSummary.semesters,
+    StudentSummary.updated_at,
+)
+
+_groups = select(Grade.student_id, Grade.semester, Grade.grade_value, func.count()).group_by(
+    Grade.student_id, Grade.semester, Grade.grade_value
+)
+
+
+class _Totals:
+    __slots__ = ("courses", "graded", "points", "attempted", "earned")
+
+    def __init__(self):
+        self.courses = self.graded = self.attempted = self.earned = 0
+        self.points = 0.0
+
+    def add(self, value: str, n: int):
+        points = grade_points(value)
+        self.courses += n
+        if points is not None:
+            self.graded += n
+            self.points += points * COURSE_CREDITS * n
+            self.attempted += COURSE_CREDITS * n
+            if is_passing(points):
+                self.earned += COURSE_CREDITS * n
+
+    def as_dict(self) -> dict:
+        return {
+            "gpa": round(self.points / self.attempted, 4) if self.attempted else None,
+            "courses": self.courses,
+            "graded": self.graded,
+            "credits_attempted": self.attempted,
+            "credits_earned": self.earned,
+        }
+
+
+def summarize(student_id: int, groups: Iterable[Tuple[Optional[str], str, int]], now: datetime = None) -> dict:
+    """A `student_summaries` row from one student's `(semester, grade_value, count)` groups."""
+    overall = _Totals()
+    semesters: Dict[Optional[str], _Totals] = {}
+    for semester, value, n in groups:
+        overall.add(value, n)
+        semesters.setdefault(semester, _Totals()).add(value, n)
+    return {
+        "student_id": student_id,
+        **overall.as_dict(),
+        # Unnamed semesters last.
+        "semesters": [{"semester": s, **semesters[s].as_dict()}
+                      for s in sorted(semesters, key=lambda s: (s is None, s or ""))],
+        "updated_at": now or datetime.utcnow(),
+    }
+
+
+def _by_student(rows, now: datetime):
+    """Summary rows from `_groups` rows ordered by student."""
+    for student_id, groups in itertools.groupby(rows, key=lambda r: r[0]):
+        yield summarize(student_id, ((semester, value, n) for _, semester, value, n in groups), now)
+
+
+@tracing.traced()
+def refresh(db: Session, student_ids: Iterable[int]) -> None:
+    """Recompute the summaries of `student_ids` from their grades.
+
+    Runs in the caller's transaction and does not commit. Grade changes must be
+    flushed first; students with no grades left lose their row.
+
+    Off SQLite (which has one writer anyway) the students' rows are locked
+    first, in id order, with FOR NO KEY UPDATE, which does not block the
+    foreign-key checks of grade inserts. Without it, two concurrent uploads for
+    one student under READ COMMITTED would each aggregate without the other's
+    uncommitted grade, and the later commit would drop the earlier upload's
+    grades from the summary. Once the lock is granted, the aggregate sees
+    every grade committed before it.
+    """
+    student_ids = sorted(set(student_ids))
+    if not student_ids:
+        return
+    if db.get_bind().dialect.name != "sqlite":
+        db.execute(select(User.id).where(User.id.in_(student_ids)).order_by(User.id)
+                   .with_for_update(key_share=True))
+    rows = db.execute(_groups.where(Grade.student_id.in_(student_ids)).order_by(Grade.student_id)).all()
+    summaries = list(_by_student(rows, datetime.utcnow()))
+    db.execute(delete(StudentSummary).where(StudentSummary.student_id.in_(student_ids)))
+    if summaries:
+        db.execute(insert(StudentSummary), summaries)
+
+
+def rebuild(db: Session, batch_size: int = BATCH_SIZE, log=None) -> int:
+    """Replace every summary with one computed from `grades`; return the row count.
+
+    Runs in the caller's transaction and does not commit, so readers see the
+    old table until the caller does.
+    """
+    db.execute(delete(StudentSummary))
+    result = db.execute(_groups.order_by(Grade.student_id).execution_options(yield_per=batch_size * 8))
+    pending, total = [], 0
+    for summary in _by_student(result, datetime.utcnow()):
+        pending.append(summary)
+        if len(pending) == batch_size:
+            db.execute(insert(StudentSummary), pending)
+            total += len(pending)
+            pending = []
+            if log:
+                log(f"  {total} summaries")
+    if pending:
+        db.execute(insert(StudentSummary), pending)
+        total += len(pending)
+    return total
+
+
+@tracing.traced()
+def get_transcript(db: Session, student_id: int) -> dict:
+    """The student's summary; all zeros (and no GPA) for a student without grades."""
+    row = db.execute(select(*SUMMARY_COLUMNS).where(StudentSummary.student_id == student_id)).first()
+    if row is None:
+        return summarize(student_id, ()) | {"updated_at": None}
+    return row._asdict()
@@ -0,0 +1,605 @@
+"""Request tracing across REST, gRPC, crud and SQL.
+
+A small in-process tracer (no OpenTelemetry dependency) producing spans in the
+OTLP data model:
+
+- `TracingMiddleware` / `TracingInterceptor` open a server span per request or
+  RPC, continuing the caller's trace when it sends a W3C `traceparent` header
+  (HTTP) or metadata entry (gRPC). `TracingClientInterceptor` and
+  `outgoing_headers()` send it onward, so a REST handler calling a gRPC service
+  (or a load generator calling either) shows up as one trace.
+- `@traced()` wraps dependencies and crud functions; `start_span()` marks any
+  other block.
+- `instrument_engine` / `instrument_sessions` add a span per pool checkout, SQL
+  statement and session commit.
+
+The active span lives in a context variable, which follows the request into
+FastAPI's threadpool like `request_context` does.
+
+Tracing is off unless `config.TRACE_EXPORT` is set: `"file"` appends OTLP/JSON
+batches to `TRACE_FILE` (one JSON document per line), `"otlp"` POSTs them to an
+OTLP/HTTP collector at `TRACE_OTLP_ENDPOINT` (`backend/scripts/trace_collector.py`
+is a stand-in). `TRACE_SAMPLE_RATE` is the fraction of new traces recorded;
+a sampled/unsampled decision arriving in `traceparent` is always honoured.
+Spans are exported from a background thread; when its queue is full new spans
+are dropped and counted rather than blocking requests.
+"""
+import atexit
+import functools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from typing import List, NamedTuple, Optional
+
+import grpc
+from sqlalchemy import event
+
+from . import config, metrics
+from .grpc_interceptors import status_name, wrap_rpc_handler
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+TRACE_ID_HEADER = "X-Trace-Id"
+
+# OTLP SpanKind values
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+# OTLP StatusCode values
+STATUS_OK, STATUS_ERROR = 1, 2
+
+SPANS_EXPORTED = metrics.counter("trace_spans_exported_total", "Spans handed to the trace exporter.")
+SPANS_DROPPED = metrics.counter(
+    "trace_spans_dropped_total", "Spans dropped because the export queue was full or the export failed.")
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_MAX_STATEMENT_CHARS = 1000
+
+
+class SpanContext(NamedTuple):
+    """The parts of a span a child or remote service needs."""
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "status_message", "sampled")
+
+    def __init__(self, name: str, kind: int, parent, sampled: bool, attributes=None):
+        self.trace_id = parent.trace_id if parent is not None else "%032x" % random.getrandbits(128)
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = 0
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.attributes["exception.type"] = type(exc).__name__
+        self.set_error(str(exc)[:500])
+
+    def end(self) -> None:
+        if self.end_ns:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled and _processor is not None:
+            _processor.submit(self)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+class _NoopSpan:
+    """Stands in when tracing is off or the trace is not sampled."""
+    sampled = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_processor = None
+_sample_rate = 1.0
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def enabled() -> bool:
+    return _processor is not None
+
+
+# ---------------------------------------------------------------------------
+# Propagation
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C `traceparent` value; None if absent or malformed."""
+    if not value:
+        return None
+    m = _TRACEPARENT_RE.match(value.strip().lower())
+    if not m or m.group(1) == "0" * 32 or m.group(2) == "0" * 16:
+        return None
+    return SpanContext(m.group(1), m.group(2), bool(int(m.group(3), 16) & 1))
+
+
+def outgoing_headers() -> dict:
+    """`{"traceparent": ...}` for the active span, to send on outgoing HTTP calls."""
+    span = _current_span.get()
+    return {TRACEPARENT: span.traceparent()} if span is not None else {}
+
+
+def outgoing_metadata(metadata=None) -> list:
+    """gRPC metadata with the active span's `traceparent` appended."""
+    md = list(metadata or ())
+    span = _current_span.get()
+    if span is not None:
+        md.append((TRACEPARENT, span.traceparent()))
+    return md
+
+
+# ---------------------------------------------------------------------------
+# Spans
+
+class _SpanScope:
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Optional[Span]):
+        self.span = span
+        self._token = None
+
+    def __enter__(self):
+        if self.span is None:
+            return _NOOP_SPAN
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is None:
+            return False
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.span.record_exception(exc)
+        self.span.end()
+        return False
+
+
+_NOOP_SCOPE = _SpanScope(None)
+_CURRENT = object()
+
+
+def start_span(name: str, kind: int = INTERNAL, attributes=None, parent=_CURRENT):
+    """Context manager for a span that becomes the active span while open.
+
+    `parent` defaults to the active span; pass a `SpanContext` (or None) to
+    start from a remote parent (or a new trace). Exceptions propagating out of
+    the block mark the span as failed. Yields a no-op span when tracing is off
+    or the trace is not sampled.
+    """
+    if _processor is None:
+        return _NOOP_SCOPE
+    if parent is _CURRENT:
+        parent = _current_span.get()
+    if parent is None:
+        sampled = _sample_rate >= 1.0 or random.random() < _sample_rate
+    elif not parent.sampled and isinstance(parent, Span):
+        # Already inside an unsampled local trace; nothing below it is recorded.
+        return _NOOP_SCOPE
+    else:
+        sampled = parent.sampled
+    # Unsampled roots still get a (non-exported) span so children skip cheaply
+    # and the decision is propagated downstream.
+    return _SpanScope(Span(name, kind, parent, sampled, attributes))
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the function inside a span named `name` (default
+    `module.function`)."""
+    def decorate(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _processor is None:
+                return fn(*args, **kwargs)
+            with start_span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _child_span(name: str, attributes=None, kind: int = CLIENT) -> Optional[Span]:
+    """An un-scoped child of the active span (for event hooks that cannot use
+    `with`), or None if there is nothing to record."""
+    if _processor is None:
+        return None
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        return None
+    return Span(name, kind, parent, True, attributes)
+
+
+# ---------------------------------------------------------------------------
+# SQLAlchemy
+
+def instrument_engine(engine) -> None:
+    """Trace pool checkouts and SQL statements on `engine`."""
+    system = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        span = _child_span("db.query", {
+            "db.system": system,
+            "db.statement": statement[:_MAX_STATEMENT_CHARS],
+            "db.executemany": bool(executemany),
+        })
+        if span is not None:
+            conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            span = spans.pop()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+    pool = engine.pool
+    original_connect = pool.connect
+
+    def traced_connect():
+        span = _child_span("db.pool.checkout", kind=INTERNAL)
+        if span is None:
+            return original_connect()
+        try:
+            return original_connect()
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end()
+
+    pool.connect = traced_connect
+
+
+def instrument_sessions(session_factory) -> None:
+    """Trace `Session.commit()` (flush plus COMMIT) for sessions from `session_factory`."""
+
+    @event.listens_for(session_factory, "before_commit")
+    def _before_commit(session):
+        span = _child_span("db.commit")
+        if span is not None:
+            session.info["trace_commit"] = span
+
+    def _end(session, error=None):
+        span = session.info.pop("trace_commit", None)
+        if span is not None:
+            if error:
+                span.set_error(error)
+            span.end()
+
+    @event.listens_for(session_factory, "after_commit")
+    def _after_commit(session):
+        _end(session)
+
+    @event.listens_for(session_factory, "after_soft_rollback")
+    def _after_rollback(session, previous_transaction):
+        _end(session, "rolled back")
+
+
+# ---------------------------------------------------------------------------
+# REST / gRPC entry points
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the server span for each HTTP request.
+
+    Install inside `metrics.MetricsMiddleware`. Sampled responses carry the
+    trace id in `X-Trace-Id`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _processor is None:
+            await self.app(scope, receive, send)
+            return
+        parent = None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        method = scope.get("method", "")
+        with start_span(f"{method} {scope.get('path', '')}", SERVER, {"http.method": method},
+                        parent=parent) as span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    span.set_attribute("http.status_code", status)
+                    if status >= 500:
+                        span.set_error(f"HTTP {status}")
+                    if span.sampled:
+                        headers = list(message.get("headers", []))
+                        headers.append((TRACE_ID_HEADER.lower().encode(), span.trace_id.encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if span.sampled:
+                    route = scope.get("route")
+                    template = getattr(route, "path", None) or "<unmatched>"
+                    span.name = f"{method} {template}"
+                    span.set_attribute("http.route", template)
+
+
+class TracingInterceptor(grpc.ServerInterceptor):
+    """gRPC counterpart of `TracingMiddleware`; the span covers the servicer
+    method. Install after `metrics.MetricsInterceptor`."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or _processor is None:
+            return handler
+        method = handler_call_details.method
+        parent = None
+        for key, value in handler_call_details.invocation_metadata or ():
+            if key == TRACEPARENT:
+                parent = parse_traceparent(value)
+                break
+        attributes = {"rpc.system": "grpc", "rpc.method": method}
+
+        def finish(span, context, failed):
+            code = status_name(context, failed)
+            span.set_attribute("rpc.grpc.status_code", code)
+            if code != "OK":
+                span.set_error(code)
+
+        def unary(behavior):
+            def wrapper(request, context):
+                with start_span(method, SERVER, attributes, parent=parent) as span:
+                    failed = True
+                    try:
+                        response = behavior(request, context)
+                        failed = False
+                        return response
+                    finally:
+                        finish(span, context, failed)
+            return wrapper
+
+        def stream(behavior):
+            def wrapper(request, context):
+                with start_span(method, SERVER, attributes, parent=parent) as span:
+                    failed = True
+                    try:
+                        yield from behavior(request, context)
+                        failed = False
+                    finally:
+                        finish(span, context, failed)
+            return wrapper
+
+        return wrap_rpc_handler(handler, unary, stream)
+
+
+class _ClientCallDetails(NamedTuple):
+    method: str
+    timeout: Optional[float]
+    metadata: Optional[list]
+    credentials: object
+    wait_for_ready: Optional[bool]
+    compression: object
+
+
+class TracingClientInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """Client interceptor that opens a client span per call and sends its
+    `traceparent`:
+
+        channel = grpc.intercept_channel(grpc.insecure_channel(addr), TracingClientInterceptor())
+    """
+
+    def _call(self, continuation, details, request):
+        with start_span(details.method, CLIENT, {"rpc.system": "grpc", "rpc.method": details.method}):
+            new_details = _ClientCallDetails(
+                details.method, details.timeout, outgoing_metadata(details.metadata),
+                details.credentials, getattr(details, "wait_for_ready", None),
+                getattr(details, "compression", None),
+            )
+            return continuation(new_details, request)
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        return self._call(continuation, client_call_details, request)
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        return self._call(continuation, client_call_details, request)
+
+
+# ---------------------------------------------------------------------------
+# Export
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> dict:
+    out = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+        "status": {"code": span.status or STATUS_OK},
+    }
+    if span.parent_id:
+        out["parentSpanId"] = span.parent_id
+    if span.status_message:
+        out["status"]["message"] = span.status_message
+    return out
+
+
+def otlp_payload(spans: List[Span]) -> dict:
+    """An OTLP/JSON `ExportTraceServiceRequest` for `spans`."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [
+            {"key": "service.name", "value": {"stringValue": config.TRACE_SERVICE_NAME}},
+        ]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": [_otlp_span(s) for s in spans]}],
+    }]}
+
+
+class FileExporter:
+    """Appends one OTLP/JSON document per batch to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(otlp_payload(spans), separators=(",", ":")) + "\n")
+
+
+class OtlpHttpExporter:
+    """POSTs OTLP/JSON batches to an OTLP/HTTP endpoint (`.../v1/traces`)."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        body = json.dumps(otlp_payload(spans), separators=(",", ":")).encode()
+        req = urllib.request.Request(
+            self.endpoint, data=body, method="POST", headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class _BatchProcessor:
+    """Queues finished spans and exports them in batches from a daemon thread."""
+
+    def __init__(self, exporter, max_queue: int = 20000, batch_size: int = 512, interval: float = 2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue" = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            SPANS_DROPPED.inc()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Export everything queued so far; False if that took longer than `timeout`."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _export(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+            SPANS_EXPORTED.inc(len(batch))
+        except Exception as e:
+            SPANS_DROPPED.inc(len(batch))
+            logger.warning("Trace export of %d spans failed: %s", len(batch), e)
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if isinstance(item, threading.Event):
+                self._export(batch)
+                batch = []
+                item.set()
+                continue
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.interval
+
+
+def configure(exporter=None, sample_rate: float = 1.0) -> None:
+    """Install `exporter` (anything with `export(spans)`), or turn tracing off
+    with None. Called at import from config; benchmarks and scripts may call it
+    again."""
+    global _processor, _sample_rate
+    if _processor is not None:
+        _processor.flush()
+    _sample_rate = max(0.0, min(1.0, sample_rate))
+    _processor = _BatchProcessor(exporter) if exporter is not None else None
+
+
+def flush(timeout: float = 5.0) -> bool:
+    return _processor.flush(timeout) if _processor is not None else True
+
+
+def _exporter_from_config():
+    kind = config.TRACE_EXPORT
+    if not kind:
+        return None
+    if kind == "file":
+        return FileExporter(config.TRACE_FILE)
+    if kind == "otlp":
+        return OtlpHttpExporter(config.TRACE_OTLP_ENDPOINT)
+    logger.warning("Unknown TRACE_EXPORT %r; tracing disabled", kind)
+    return None
+
+
+configure(_exporter_from_config(), config.TRACE_SAMPLE_RATE)
+atexit.register(flush)
@@ -0,0 +1,208 @@
+"""Single-writer queue with group commit for small SQLite writes (`WRITE_QUEUE`).
+
+SQLite takes one writer at a time. Concurrent requests that each commit a tiny
+transaction (an enrollment, a refresh token, a failed-login count) wait on each
+other's lock, run into "database is locked" once the busy timeout runs out,
+and pay one journal sync per row. With `WRITE_QUEUE` on, the crud functions
+marked `@serialized` are handed to one writer thread instead:
+
+- the writer takes everything queued while it was busy (up to
+  `WRITE_QUEUE_MAX_BATCH`, after waiting up to `WRITE_QUEUE_MAX_WAIT_MS` for
+  more) and runs it in one transaction on its own connection, opened with
+  `BEGIN IMMEDIATE`, so it never has to upgrade a read lock;
+- each call gets a session of its own on that transaction, nested in a
+  SAVEPOINT: its `commit()` releases the savepoint and an exception rolls back
+  only its own work, which is raised to its caller. Everyone else in the batch
+  still commits;
+- one COMMIT then makes the whole batch durable, and each caller gets its own
+  return value. If that COMMIT fails, every caller in the batch gets its error.
+
+The caller's thread blocks until its batch commits. Its session is not used:
+the function runs on the writer's session with the caller's context
+(request attribution and tracing follow it). What it returns is detached but
+keeps the attributes it loaded. Only mark functions whose effects are all in
+the database: anything done after their `commit()`, such as publishing an
+event, would happen before the batch is durable.
+"""
+import contextvars
+import functools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+
+from . import config, metrics, sql_instrumentation, tracing
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = metrics.histogram("write_queue_batch_size", "Queued writes committed together.",
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+WAIT = metrics.histogram("write_queue_wait_seconds", "Time from queueing a write to its batch committing.")
+FAILED_COMMITS = metrics.counter("write_queue_failed_commits_total", "Batches whose COMMIT failed.")
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "context", "future", "queued")
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.context = contextvars.copy_context()
+        self.future = Future()
+        self.queued = time.perf_counter()
+
+
+def writer_engine(url: str):
+    """An engine for the writer: on SQLite, transactions start with BEGIN
+    IMMEDIATE and SAVEPOINTs work (pysqlite's own transaction handling is off)."""
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_conn, record):
+            dbapi_conn.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+    sql_instrumentation.instrument_engine(engine)
+    tracing.instrument_engine(engine)
+    return engine
+
+
+class WriteQueue:
+    """The writer thread and its queue. Started on the first `submit`."""
+
+    def __init__(self, url: str, max_batch: int = 64, max_wait: float = 0.0):
+        from .database import SessionLocal
+
+        self.engine = writer_engine(url)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._sessions = SessionLocal
+        self._jobs: "queue.SimpleQueue[Optional[_Job]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Run `fn(session, *args, **kwargs)` in the next batch and return its
+        result (or raise its exception) once that batch has committed."""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                    self._thread.start()
+        job = _Job(fn, args, kwargs)
+        self._jobs.put(job)
+        return job.future.result()
+
+    def on_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def close(self) -> None:
+        """Commit what is queued, then stop the writer."""
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+        self.engine.dispose()
+
+    def _next_batch(self):
+        job = self._jobs.get()
+        if job is None:
+            return None
+        batch = [job]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                timeout = deadline - time.perf_counter()
+                job = self._jobs.get(timeout=timeout) if timeout > 0 else self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._jobs.put(None)  # stop after this batch
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        conn = self.engine.connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                try:
+                    self._commit(conn, batch)
+                except Exception:
+                    logger.exception("Write queue batch failed")
+                    conn.invalidate()
+                    conn.close()
+                    conn = self.engine.connect()
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        outcomes = []
+        try:
+            with conn.begin():
+                for job in batch:
+                    outcomes.append(job.context.run(self._call, conn, job))
+        except Exception as e:
+            FAILED_COMMITS.inc()
+            outcomes += [(False, None)] * (len(batch) - len(outcomes))
+            for job, (failed, value) in zip(batch, outcomes):
+                job.future.set_exception(value if failed else e)
+            raise
+        BATCH_SIZE.observe(len(batch))
+        now = time.perf_counter()
+        for job, (failed, value) in zip(batch, outcomes):
+            WAIT.observe(now - job.queued)
+            if failed:
+                job.future.set_exception(value)
+            else:
+                job.future.set_result(value)
+
+    def _call(self, conn, job):
+        db = self._sessions(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        try:
+            return False, job.fn(db, *job.args, **job.kwargs)
+        except Exception as e:
+            return True, e
+        finally:
+            db.close()  # rolls back whatever the call did not commit
+
+
+_queue: Optional[WriteQueue] = None
+
+
+def configure(write_queue: Optional[WriteQueue] = None) -> Optional[WriteQueue]:
+    """Use `write_queue` (None: direct writes), closing the previous one."""
+    global _queue
+    previous, _queue = _queue, write_queue
+    if previous is not None:
+        previous.close()
+    return _queue
+
+
+def shutdown() -> None:
+    configure(None)
+
+
+def serialized(fn):
+    """Route `fn(db, ...)` through the write queue when there is one; it then
+    runs on the writer's session instead of `db`."""
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        write_queue = _queue
+        if write_queue is None or write_queue.on_writer_thread():
+            return fn(db, *args, **kwargs)
+        return write_queue.submit(fn, *args, **kwargs)
+    return wrapper
+
+
+if config.WRITE_QUEUE:
+    configure(WriteQueue(config.DATABASE_URL, config.WRITE_QUEUE_MAX_BATCH, config.WRITE_QUEUE_MAX_WAIT_MS / 1000))
@@ -0,0 +1 @@
+# Micro and macro benchmarks for the backend (run as `python -m backend.benchmarks.<name>`)
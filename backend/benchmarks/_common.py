@@ -0,0 +1,261 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks never touch `backend/dev.db`: each run builds its own throwaway
+SQLite file with the app's schema, indexes and search tables, and seeds it with
+Core bulk inserts (a fixed pre-computed password hash, not one argon2 call per
+row).
+"""
+import gc
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[2]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+import sqlalchemy  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.app import models  # noqa: E402
+from backend.app.database import Base  # noqa: E402
+from backend.app.search import install_search_index  # noqa: E402
+
+# argon2 hash of "password"; seeded users can log in with it.
+FIXED_PASSWORD_HASH = (
+    "$argon2id$v=19$m=65536,t=3,p=4$9N5bC2Hs/f8/xxjj3BsjxA$"
+    "WMCInhwXanAU+MZVE4crkTsZMsM7hREqAvFnn6pdveI"
+)
+CHUNK = 5000
+
+
+def make_engine(path: str = None):
+    """Create a fresh SQLite database with the full app schema; return `(engine, Session)`."""
+    if path is None:
+        path = str(Path(tempfile.mkdtemp(prefix="p4bench-")) / "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    install_search_index(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed_users(engine, n: int, seed: int = 0, student_ratio: float = 0.9):
+    """Insert `n` users with realistic-ish usernames; most are students."""
+    rng = random.Random(seed)
+    first = ["ana", "ben", "carlo", "dana", "eli", "faye", "gio", "hana", "ivan", "jo", "kai", "lea", "migs", "nina"]
+    last = ["santos", "reyes", "cruz", "bautista", "garcia", "tan", "lim", "chua", "dela_cruz", "mendoza"]
+    rows = []
+    with engine.begin() as conn:
+        for i in range(1, n + 1):
+            name = f"{rng.choice(first)}.{rng.choice(last)}{i}"
+            role = "student" if rng.random() < student_ratio else rng.choice(["faculty", "course_audit_admin"])
+            rows.append({
+                "username": name,
+                "email": f"{name}@example.edu",
+                "password_hash": FIXED_PASSWORD_HASH,
+                "role": role,
+                "is_active": True,
+                "failed_login_attempts": 0,
+            })
+            if len(rows) >= CHUNK:
+                conn.execute(insert(models.User), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(models.User), rows)
+
+
+def seed_courses(engine, n: int, seed: int = 0):
+    rng = random.Random(seed)
+    depts = ["CS", "MATH", "PHYS", "CHEM", "BIO", "ENG", "HIST", "ECON", "PHIL", "STDISCM"]
+    topics = ["Introduction to", "Advanced", "Topics in", "Seminar on", "Foundations of"]
+    subjects = ["Programming", "Distributed Systems", "Algorithms", "Calculus", "Databases", "Networks"]
+    rows = [{
+        "code": f"{rng.choice(depts)}{i:05d}",
+        "name": f"{rng.choice(topics)} {rng.choice(subjects)}",
+        "instructor": f"Dr. {rng.choice(['Smith', 'Lopez', 'Yu', 'Ramos', 'Ong'])}",
+        "capacity": rng.choice([30, 40, 50, 120]),
+    } for i in range(1, n + 1)]
+    with engine.begin() as conn:
+        for start in range(0, len(rows), CHUNK):
+            conn.execute(insert(models.Course), rows[start:start + CHUNK])
+
+
+GRADE_VALUES = ["4.0", "3.5", "3.0", "2.5", "2.0", "1.5", "1.0", "0.0"]
+
+
+def seed_enrollments_and_grades(engine, n: int, graded_ratio: float = 1.0, seed: int = 0):
+    """Enroll `n` distinct (student, course) pairs and grade `graded_ratio` of them.
+
+    Students are the users with role "student"; needs `seed_users`/`seed_courses` first.
+    """
+    rng = random.Random(seed)
+    with engine.connect() as conn:
+        students = [r[0] for r in conn.exec_driver_sql("SELECT id FROM users WHERE role = 'student'")]
+        courses = [r[0] for r in conn.exec_driver_sql("SELECT id FROM courses")]
+        uploaders = [r[0] for r in conn.exec_driver_sql("SELECT id FROM users WHERE role = 'faculty' LIMIT 100")]
+    if len(students) * len(courses) < n:
+        raise ValueError("not enough students x courses for the requested enrollments")
+    pairs = set()
+    while len(pairs) < n:
+        pairs.add((rng.choice(students), rng.choice(courses)))
+    enrollments, grades = [], []
+    with engine.begin() as conn:
+        for student_id, course_id in pairs:
+            enrollments.append({"student_id": student_id, "course_id": course_id})
+            if rng.random() < graded_ratio:
+                grades.append({
+                    "student_id": student_id,
+                    "course_id": course_id,
+                    "grade_value": rng.choice(GRADE_VALUES),
+                    "semester": rng.choice(["2025-T1", "2025-T2", "2025-T3"]),
+                    "uploaded_by": rng.choice(uploaders) if uploaders else None,
+                })
+            if len(enrollments) >= CHUNK:
+                conn.execute(insert(models.Enrollment), enrollments)
+                enrollments = []
+            if len(grades) >= CHUNK:
+                conn.execute(insert(models.Grade), grades)
+                grades = []
+        if enrollments:
+            conn.execute(insert(models.Enrollment), enrollments)
+        if grades:
+            conn.execute(insert(models.Grade), grades)
+
+
+def measure(fn, iterations: int, warmup: int = 20):
+    """Call `fn` repeatedly and return latency stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return summarize(samples)
+
+
+def percentile(sorted_samples, pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    k = min(len(sorted_samples) - 1, max(0, int(round(pct / 100.0 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[k]
+
+
+def summarize(samples):
+    s = sorted(samples)
+    return {
+        "n": len(s),
+        "mean_ms": statistics.fmean(s) if s else 0.0,
+        "p50_ms": percentile(s, 50),
+        "p95_ms": percentile(s, 95),
+        "p99_ms": percentile(s, 99),
+        "max_ms": s[-1] if s else 0.0,
+    }
+
+
+def print_table(rows, title: str = None):
+    """Print `[(name, stats), ...]` as an aligned table."""
+    if title:
+        print(f"\n{title}")
+    print(f"  {'case':<40} {'n':>7} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, st in rows:
+        print(
+            f"  {name:<40} {st['n']:>7} {st['mean_ms']:>8.3f}ms {st['p50_ms']:>8.3f}ms "
+            f"{st['p95_ms']:>8.3f}ms {st['p99_ms']:>8.3f}ms {st['max_ms']:>8.3f}ms"
+        )
+
+
+def measure_allocations(fn, iterations: int):
+    """Run `fn` under tracemalloc and return per-call heap figures in KiB:
+    the peak above the starting point and what was still allocated afterwards."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024.0)
+            retained.append((current - before) / 1024.0)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kib": statistics.fmean(peaks) if peaks else 0.0,
+        "alloc_retained_kib": statistics.fmean(retained) if retained else 0.0,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=repo_root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_baseline(path, benchmark: str, params: dict, results: dict, extra: dict = None) -> None:
+    """Write `results` (`{case: stats}`) plus run metadata as a JSON baseline.
+
+    `extra` adds further top-level keys (e.g. a timeline) that `compare_baseline` ignores.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = {
+        "benchmark": benchmark,
+        "params": params,
+        "meta": {
+            "git_commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": results,
+        **(extra or {}),
+    }
+    path.write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n")
+    print(f"\nSaved baseline to {path}")
+
+
+def compare_baseline(path, results: dict, threshold: float = 0.10,
+                     metrics=("p50_ms", "p95_ms", "alloc_peak_kib")) -> bool:
+    """Print current vs. baseline for each case and metric; return True if any
+    metric got worse by more than `threshold` (a fraction)."""
+    doc = json.loads(Path(path).read_text())
+    base = doc["results"]
+    print(f"\nCompared with {path} (commit {doc['meta'].get('git_commit')}, {doc['meta'].get('created_at')}):")
+    print(f"  {'case':<28} {'metric':<16} {'baseline':>12} {'current':>12} {'change':>9}")
+    regressed = False
+    for case, stats in results.items():
+        if case not in base:
+            print(f"  {case:<28} (not in baseline)")
+            continue
+        for metric in metrics:
+            old, new = base[case].get(metric), stats.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change > threshold:
+                flag, regressed = "  REGRESSION", True
+            print(f"  {case:<28} {metric:<16} {old:>12.3f} {new:>12.3f} {change:>+8.1%}{flag}")
+    return regressed
@@ -0,0 +1,263 @@
+"""Helpers for the load harnesses: run the real app in a subprocess and drive it.
+
+`AppServer` starts `uvicorn backend.app.main:app` (which also starts the gRPC
+server) against a given database on free ports, and reports the server
+process's CPU time from /proc where available. `RestClient` is a keep-alive
+HTTP/1.1 client, one per worker thread. `ByteCountingProxy` sits between a
+client and the server to count bytes on the wire; it is only used in a separate
+measuring pass so it does not distort latency.
+"""
+import http.client
+import json
+import os
+import select
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Optional
+
+from ._common import repo_root
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+NO_RATE_LIMITS = {"RATE_LIMIT_ROUTES": "", "RATE_LIMIT_PER_IP": "", "RATE_LIMIT_PER_USER": ""}
+
+
+class AppServer:
+    """The backend running in a child process: REST on `http_port`, gRPC on `grpc_port`.
+
+    Rate limiting is off unless `env` turns it back on: every simulated client
+    connects from 127.0.0.1, so the default login limit would refuse almost
+    every login.
+    """
+
+    def __init__(self, database_url: str, env: Optional[dict] = None, log_path=None,
+                 startup_timeout: float = 60.0):
+        self.http_port = free_port()
+        self.grpc_port = free_port()
+        self.database_url = database_url
+        self.env = env or {}
+        self.startup_timeout = startup_timeout
+        # Server output (including slow-query / N+1 warnings) goes here rather
+        # than interleaving with the report; None inherits the terminal.
+        self.log_path = log_path
+        self.proc = None
+        self._log = None
+
+    @property
+    def grpc_target(self) -> str:
+        return f"127.0.0.1:{self.grpc_port}"
+
+    def start(self):
+        env = {**os.environ, **NO_RATE_LIMITS, **self.env, "DATABASE_URL": self.database_url, "GRPC_PORT": str(self.grpc_port)}
+        if self.log_path:
+            self._log = open(self.log_path, "ab")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1",
+             "--port", str(self.http_port), "--log-level", "warning"],
+            cwd=repo_root, env=env, stdout=self._log, stderr=subprocess.STDOUT if self._log else None,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"server exited during startup (code {self.proc.returncode})")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.http_port, timeout=1)
+                conn.request("GET", "/")
+                if conn.getresponse().status == 200:
+                    conn.close()
+                    if self._grpc_ready():
+                        return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError("server did not become ready in time")
+
+    def _grpc_ready(self) -> bool:
+        with socket.socket() as s:
+            return s.connect_ex(("127.0.0.1", self.grpc_port)) == 0
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        if self._log:
+            self._log.close()
+            self._log = None
+
+    def cpu_seconds(self) -> Optional[float]:
+        """User+system CPU time of the server process so far (Linux only)."""
+        try:
+            with open(f"/proc/{self.proc.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class RestClient:
+    """Minimal keep-alive HTTP/1.1 client; not thread-safe (use one per thread)."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1", timeout: float = 30.0):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.conn = None
+        self.cookies = {}
+
+    def request(self, method: str, path: str, json_body=None, form=None, headers=None):
+        """Return `(status, body_bytes, response_headers)`; retries once on a dropped connection."""
+        hdrs = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            hdrs["Content-Type"] = "application/json"
+        elif form is not None:
+            body = urllib.parse.urlencode(form).encode()
+            hdrs["Content-Type"] = "application/x-www-form-urlencoded"
+        if self.cookies:
+            hdrs["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        for attempt in (0, 1):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=hdrs)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                for value in resp.headers.get_all("set-cookie") or ():
+                    name, _, rest = value.partition("=")
+                    self.cookies[name.strip()] = rest.split(";", 1)[0]
+                return resp.status, data, resp.headers
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if attempt:
+                    raise
+        raise AssertionError("unreachable")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class ByteCountingProxy:
+    """TCP proxy on an ephemeral port that forwards to `target_port` and counts
+    bytes in each direction, HTTP headers and HTTP/2 framing included."""
+
+    def __init__(self, target_port: int, host: str = "127.0.0.1"):
+        self.target = (host, target_port)
+        self.sent = 0       # client -> server
+        self.received = 0   # server -> client
+        self._lock = threading.Lock()
+        self._listener = socket.socket()
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((host, 0))
+        self._listener.listen(64)
+        self.port = self._listener.getsockname()[1]
+        self._closed = False
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.sent = self.received = 0
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(self.target)
+            for s in (client, upstream):
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._pump, args=(client, upstream), daemon=True).start()
+
+    def _pump(self, client, upstream):
+        socks = [client, upstream]
+        try:
+            while True:
+                readable, _, _ = select.select(socks, [], [], 1.0)
+                if self._closed:
+                    return
+                for s in readable:
+                    data = s.recv(65536)
+                    if not data:
+                        return
+                    if s is client:
+                        upstream.sendall(data)
+                        with self._lock:
+                            self.sent += len(data)
+                    else:
+                        client.sendall(data)
+                        with self._lock:
+                            self.received += len(data)
+        except OSError:
+            pass
+        finally:
+            client.close()
+            upstream.close()
+
+    def close(self):
+        self._closed = True
+        self._listener.close()
+
+
+def run_workers(op_factory, concurrency: int, duration: float):
+    """Run `concurrency` threads for `duration` seconds.
+
+    `op_factory(worker_index)` returns a callable performing one request and
+    returning True on success. Returns `(latencies_ms, errors, elapsed_seconds)`
+    over all workers.
+    """
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    window = [0.0, 0.0]  # start, stop
+
+    def open_window():
+        window[0] = time.perf_counter()
+        window[1] = window[0] + duration
+
+    # The clock starts once every worker has built its client.
+    start_barrier = threading.Barrier(concurrency, action=open_window)
+
+    def worker(i):
+        op = op_factory(i)
+        local, local_errors = [], 0
+        start_barrier.wait()
+        while time.perf_counter() < window[1]:
+            t0 = time.perf_counter()
+            try:
+                ok = op()
+            except Exception:
+                ok = False
+            if ok:
+                local.append((time.perf_counter() - t0) * 1000.0)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - window[0]
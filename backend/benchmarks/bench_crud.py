@@ -0,0 +1,173 @@
+"""Latency and allocation benchmarks for the `crud.py` functions at realistic scale.
+
+    python -m backend.benchmarks.bench_crud --scale 100k
+    python -m backend.benchmarks.bench_crud --scale 100k --save backend/benchmarks/baselines/crud-100k.json
+    python -m backend.benchmarks.bench_crud --scale 100k --compare backend/benchmarks/baselines/crud-100k.json
+
+Scales (users / courses / graded enrollments):
+
+    10k     10,000 / 5,000 /    50,000
+    100k   100,000 / 5,000 /   500,000
+    1m   1,000,000 / 5,000 / 2,000,000
+
+Seeding the larger scales takes a while; pass `--dataset PATH` to seed once and
+reuse the file. Every run works on a fresh copy of the dataset, so the write
+cases (`upload_grades`, `enroll_student`, `authenticate_user`) never drift the
+next run's data.
+
+Each call gets its own session, as a request would. Latency is measured with
+the GC paused; allocations (tracemalloc peak and retained heap per call) are
+measured in a separate, shorter pass because tracing slows calls down.
+`authenticate_user` is dominated by argon2 verification by design.
+
+`--save` writes a JSON baseline (results plus git commit, Python/SQLAlchemy/
+SQLite versions); `--compare` prints the change against one and exits non-zero
+if p50, p95 or peak allocation regressed by more than `--threshold`.
+"""
+import argparse
+import math
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from ._common import (
+    make_engine, seed_users, seed_courses, seed_enrollments_and_grades, measure, measure_allocations,
+    print_table, save_baseline, compare_baseline,
+)
+from backend.app import crud, models
+
+SCALES = {
+    "10k": {"users": 10_000, "courses": 5_000, "grades": 50_000},
+    "100k": {"users": 100_000, "courses": 5_000, "grades": 500_000},
+    "1m": {"users": 1_000_000, "courses": 5_000, "grades": 2_000_000},
+}
+# Default calls per case; multiplied by --iterations-factor.
+ITERATIONS = {
+    "get_courses": 30,
+    "get_grades_for_student": 2_000,
+    "upload_grades": 300,
+    "enroll_student": 1_000,
+    "authenticate_user": 30,
+    "verify_refresh_token": 5_000,
+}
+REFRESH_TOKENS = 10_000
+UPLOAD_BATCH = 30
+
+
+def _raw_token(i: int) -> str:
+    return f"bench-refresh-token-{i}"
+
+
+def build_dataset(path: Path, scale: dict) -> None:
+    print(f"Seeding {scale['users']:,} users, {scale['courses']:,} courses, {scale['grades']:,} grades into {path}...")
+    engine, _ = make_engine(str(path))
+    seed_users(engine, scale["users"])
+    seed_courses(engine, scale["courses"])
+    seed_enrollments_and_grades(engine, scale["grades"])
+    with engine.begin() as conn:
+        conn.execute(insert(models.RefreshToken), [
+            {"user_id": 1 + i % scale["users"], "token_hash": crud._hash_token(_raw_token(i)), "revoked": False}
+            for i in range(REFRESH_TOKENS)
+        ])
+    engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--dataset", type=Path, help="seeded database to reuse (created if missing)")
+    parser.add_argument("--cases", nargs="+", choices=ITERATIONS, default=list(ITERATIONS))
+    parser.add_argument("--iterations-factor", type=float, default=1.0)
+    parser.add_argument("--alloc-iterations", type=int, default=20, help="calls per case in the tracemalloc pass")
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="JSON baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold for --compare")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    scale = SCALES[args.scale]
+
+    workdir = Path(tempfile.mkdtemp(prefix="p4bench-crud-"))
+    template = args.dataset or workdir / "template.db"
+    if not template.exists():
+        build_dataset(template, scale)
+    run_db = workdir / "run.db"
+    shutil.copyfile(template, run_db)
+    engine, Session = make_engine(str(run_db))
+
+    rng = random.Random(args.seed)
+    with engine.connect() as conn:
+        students = [r[0] for r in conn.exec_driver_sql(
+            "SELECT id FROM users WHERE role = 'student' ORDER BY random() LIMIT 5000")]
+        usernames = [r[0] for r in conn.exec_driver_sql("SELECT username FROM users ORDER BY random() LIMIT 50")]
+        faculty = conn.exec_driver_sql("SELECT id FROM users WHERE role = 'faculty' LIMIT 1").scalar() or 1
+        sample_courses = [r[0] for r in conn.exec_driver_sql("SELECT id FROM courses ORDER BY random() LIMIT 300")]
+        rosters = {}
+        for course_id in sample_courses:
+            ids = [r[0] for r in conn.exec_driver_sql(
+                "SELECT student_id FROM enrollments WHERE course_id = ? LIMIT ?", (course_id, UPLOAD_BATCH))]
+            if ids:
+                rosters[course_id] = ids
+    iterations = {name: max(1, int(ITERATIONS[name] * args.iterations_factor)) for name in args.cases}
+    # Fresh courses for enroll_student, so every (student, course) pair is new:
+    # enough for its warmup, timed and tracemalloc calls.
+    n = iterations.get("enroll_student", 0)
+    enroll_calls = n + min(20, n) + min(args.alloc_iterations, n)
+    with engine.begin() as conn:
+        first_new = conn.execute(insert(models.Course).returning(models.Course.id), [
+            {"code": f"BENCH{i:05d}", "name": "Benchmark course", "instructor": "Dr. Bench", "capacity": 10_000}
+            for i in range(math.ceil(enroll_calls / max(1, len(students))))
+        ]).scalars().all() if enroll_calls else []
+    enroll_pairs = iter([(s, c) for c in first_new for s in students])
+
+    def call(fn):
+        def run():
+            with Session() as db:
+                fn(db)
+        return run
+
+    cases = {
+        "get_courses": call(lambda db: crud.get_courses(db)),
+        "get_grades_for_student": call(lambda db: crud.get_grades_for_student(db, rng.choice(students))),
+        "upload_grades": call(lambda db: _upload(db, rng, rosters, faculty)),
+        "enroll_student": call(lambda db: crud.enroll_student(db, *next(enroll_pairs))),
+        "authenticate_user": call(lambda db: crud.authenticate_user(db, rng.choice(usernames), "password")),
+        "verify_refresh_token": call(
+            lambda db: crud.verify_refresh_token(db, _raw_token(rng.randrange(REFRESH_TOKENS)))),
+    }
+
+    results, rows = {}, []
+    for name in args.cases:
+        n = iterations[name]
+        warmup = min(20, n)
+        stats = measure(cases[name], n, warmup=warmup)
+        stats.update(measure_allocations(cases[name], min(args.alloc_iterations, n)))
+        results[name] = stats
+        rows.append((name, stats))
+    engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(rows, title=f"crud functions, scale {args.scale}")
+    print(f"\n  {'case':<40} {'peak heap/call':>16} {'retained/call':>15}")
+    for name, st in rows:
+        print(f"  {name:<40} {st['alloc_peak_kib']:>13.1f}KiB {st['alloc_retained_kib']:>12.1f}KiB")
+
+    params = {"scale": args.scale, **scale, "seed": args.seed, "iterations_factor": args.iterations_factor}
+    if args.save:
+        save_baseline(args.save, "crud", params, results)
+    if args.compare and compare_baseline(args.compare, results, args.threshold):
+        return 1
+    return 0
+
+
+def _upload(db, rng, rosters, uploaded_by):
+    course_id = rng.choice(list(rosters))
+    entries = [{"student_id": s, "grade_value": rng.choice(["1.0", "2.0", "3.0", "4.0"])} for s in rosters[course_id]]
+    crud.upload_grades(db, course_id, entries, uploaded_by)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Per-call overhead of the hot single-row lookups in `crud.py`.
+
+    python -m backend.benchmarks.bench_lookups
+
+"before" rebuilds a `db.query(...).filter(...).first()` expression on every
+call (what `crud` used to do); "after" is the current `crud` function, which
+executes a statement built once at import time with bound parameters. A
+`lambda_stmt` variant is included for comparison. The database is small so the
+numbers are dominated by Python-side statement handling, not SQLite.
+"""
+import argparse
+import random
+
+from sqlalchemy import insert, lambda_stmt, select
+
+from ._common import make_engine, seed_users, seed_courses, measure, print_table
+from backend.app import crud, models
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    engine, Session = make_engine()
+    seed_users(engine, args.users)
+    seed_courses(engine, 500)
+    raw_tokens = [f"token-{i}" for i in range(1_000)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.RefreshToken), [
+            {"user_id": 1 + i % args.users, "token_hash": crud._hash_token(t), "revoked": False}
+            for i, t in enumerate(raw_tokens)
+        ])
+
+    rng = random.Random(0)
+    db = Session()
+    User, Course, RT = models.User, models.Course, models.RefreshToken
+
+    def uid():
+        return rng.randint(1, args.users)
+
+    def uname():
+        return db.execute(select(User.username).where(User.id == uid())).scalar()
+
+    names = [uname() for _ in range(1_000)]
+
+    cases = {
+        "get_user_by_id": (
+            lambda: db.query(User).filter(User.id == uid()).first(),
+            lambda: crud.get_user_by_id(db, uid()),
+            lambda: db.execute(_lambda_user_by_id(uid())).scalars().first(),
+        ),
+        "get_user_by_username": (
+            lambda: db.query(User).filter(User.username == rng.choice(names)).first(),
+            lambda: crud.get_user_by_username(db, rng.choice(names)),
+            None,
+        ),
+        "get_course": (
+            lambda: db.query(Course).filter(Course.id == rng.randint(1, 500)).first(),
+            lambda: crud.get_course(db, rng.randint(1, 500)),
+            None,
+        ),
+        "verify_refresh_token": (
+            lambda: db.query(RT).filter(RT.token_hash == crud._hash_token(rng.choice(raw_tokens))).first(),
+            lambda: crud.verify_refresh_token(db, rng.choice(raw_tokens)),
+            None,
+        ),
+    }
+
+    rows = []
+    try:
+        for name, (before, after, alt) in cases.items():
+            rows.append((f"{name} before (db.query)", measure(before, args.iterations, warmup=200)))
+            rows.append((f"{name} after (prebuilt)", measure(after, args.iterations, warmup=200)))
+            if alt:
+                rows.append((f"{name} lambda_stmt", measure(alt, args.iterations, warmup=200)))
+            db.expunge_all()
+        build = measure(lambda: db.query(User).filter(User.id == 1), args.iterations, warmup=200)
+        rows.append(("construct db.query(...) only", build))
+    finally:
+        db.close()
+    print_table(rows, title=f"hot lookups, {args.iterations} calls each")
+
+
+def _lambda_user_by_id(user_id):
+    return lambda_stmt(lambda: select(models.User).where(models.User.id == user_id).limit(1))
+
+
+if __name__ == "__main__":
+    main()
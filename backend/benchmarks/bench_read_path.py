@@ -0,0 +1,97 @@
+"""ORM entity loading vs. the column-projected read path (`app.read_models`).
+
+    python -m backend.benchmarks.bench_read_path --rows 100000
+
+For each read pattern the ORM variant is what the endpoints did before (load
+`User`/`Course`/`Grade` entities, touch `Grade.course` lazily) and the
+projection variant is what they do now. Reports latency and the peak Python
+heap (tracemalloc) of one call.
+"""
+import argparse
+import tracemalloc
+
+from sqlalchemy import select
+
+from ._common import (
+    make_engine, seed_users, seed_courses, seed_enrollments_and_grades, measure, print_table,
+)
+from backend.app import crud, models, read_models
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="users and grades to seed")
+    parser.add_argument("--courses", type=int, default=5_000)
+    parser.add_argument("--iterations", type=int, default=5, help="full-table scans per case")
+    parser.add_argument("--page-iterations", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    engine, Session = make_engine()
+    print(f"Seeding {args.rows} users, {args.courses} courses, {args.rows} grades...")
+    seed_users(engine, args.rows)
+    seed_courses(engine, args.courses)
+    seed_enrollments_and_grades(engine, args.rows)
+
+    db = Session()
+
+    def fresh(fn):
+        # Each call starts with an empty identity map, as a request would.
+        def run():
+            fn()
+            db.expunge_all()
+            db.rollback()
+        return run
+
+    orm_users = fresh(lambda: crud.get_all_users(db))
+    lean_users = fresh(lambda: db.execute(select(*read_models.USER_COLUMNS)).all())
+    orm_grades = fresh(lambda: [
+        (g.id, g.grade_value, g.course.code if g.course else None)
+        for g in db.query(models.Grade).all()
+    ])
+    lean_grades = fresh(lambda: db.execute(
+        select(*read_models.GRADE_COLUMNS, models.Course.code.label("course_code"))
+        .outerjoin(models.Course, models.Course.id == models.Grade.course_id)
+    ).all())
+    orm_page = fresh(lambda: db.query(models.User).order_by(models.User.id).limit(500).all())
+    lean_page = fresh(lambda: read_models.list_users_page(db, limit=500))
+    student_id = db.execute(select(models.Grade.student_id).limit(1)).scalar()
+    orm_student = fresh(lambda: [
+        (g.id, g.course.code if g.course else None) for g in crud.get_grades_for_student(db, student_id)
+    ])
+    lean_student = fresh(lambda: read_models.grades_for_student(db, student_id))
+
+    cases = [
+        (f"all users ({args.rows}) ORM", orm_users, args.iterations),
+        (f"all users ({args.rows}) projection", lean_users, args.iterations),
+        (f"all grades+course ({args.rows}) ORM", orm_grades, args.iterations),
+        (f"all grades+course ({args.rows}) projection", lean_grades, args.iterations),
+        ("users page (500) ORM", orm_page, args.page_iterations),
+        ("users page (500) projection", lean_page, args.page_iterations),
+        ("one student's grades ORM (lazy course)", orm_student, args.page_iterations),
+        ("one student's grades projection", lean_student, args.page_iterations),
+    ]
+    rows, mem = [], []
+    try:
+        for name, fn, iterations in cases:
+            rows.append((name, measure(fn, iterations, warmup=1)))
+            mem.append((name, peak_kib(fn)))
+    finally:
+        db.close()
+
+    print_table(rows, title="latency")
+    print("\npeak Python heap per call")
+    for name, kib in mem:
+        print(f"  {name:<40} {kib / 1024.0:>10.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
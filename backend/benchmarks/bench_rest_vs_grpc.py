@@ -0,0 +1,229 @@
+"""REST vs. gRPC head-to-head on the same server process and database.
+
+    python -m backend.benchmarks.bench_rest_vs_grpc --concurrency 1 8 32 --duration 10
+
+Starts the app (uvicorn + the gRPC server it launches) on a freshly seeded
+throwaway SQLite database and, for each workload and concurrency level, drives
+the equivalent REST route and RPC for `--duration` seconds from a pool of
+client threads:
+
+    list_courses     GET  /api/courses/?limit=100            ListCourses(page_size=100)
+    student_grades   GET  /api/student/me/grades             GetStudentGrades
+    upload_grades    POST /api/faculty/courses/{id}/grades   UploadGrades (30 entries)
+    authenticate     POST /api/auth/login                    AuthenticateUser
+
+Reported per run: throughput, latency percentiles, server CPU per request (from
+/proc, Linux only), client CPU per request, and bytes on the wire per request
+in each direction. Bytes come from a separate sequential pass through a
+counting TCP proxy (connection setup amortized over `--bytes-requests`), so the
+proxy does not affect the timed runs.
+
+The two interfaces are not doing identical work, and the report should be read
+with that in mind: the REST routes authenticate a JWT and load the user on
+every call while the RPCs take ids in the request, and REST login also issues a
+refresh token. The client is Python too, so at high concurrency the client's
+own GIL can be the limit; watch the client CPU column. Login rate limiting is
+off on the server under test (all clients share 127.0.0.1), so `authenticate`
+measures the login itself.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import grpc
+
+from ._common import (
+    make_engine, seed_users, seed_courses, seed_enrollments_and_grades, summarize, save_baseline,
+)
+from ._load import AppServer, ByteCountingProxy, RestClient, run_workers
+from backend.app import crud
+from backend.app.grpc_services import (
+    course_service_pb2, course_service_pb2_grpc,
+    grade_service_pb2, grade_service_pb2_grpc,
+    user_service_pb2, user_service_pb2_grpc,
+)
+
+WORKLOADS = ("list_courses", "student_grades", "upload_grades", "authenticate")
+UPLOAD_BATCH = 30
+
+
+class Fixture:
+    """Ids and tokens the workloads pick from."""
+
+    def __init__(self, engine, seed: int):
+        with engine.connect() as conn:
+            self.students = [r[0] for r in conn.exec_driver_sql(
+                "SELECT id FROM users WHERE role = 'student' ORDER BY random() LIMIT 2000")]
+            self.usernames = [r[0] for r in conn.exec_driver_sql(
+                "SELECT username FROM users ORDER BY random() LIMIT 200")]
+            self.faculty_id = conn.exec_driver_sql("SELECT id FROM users WHERE role = 'faculty' LIMIT 1").scalar()
+            self.rosters = {}
+            for course_id, in conn.exec_driver_sql("SELECT id FROM courses ORDER BY random() LIMIT 200").all():
+                ids = [r[0] for r in conn.exec_driver_sql(
+                    "SELECT student_id FROM enrollments WHERE course_id = ? LIMIT ?", (course_id, UPLOAD_BATCH))]
+                if ids:
+                    self.rosters[course_id] = ids
+        self.student_tokens = {s: crud.create_access_token(str(s)) for s in self.students}
+        self.faculty_auth = {"Authorization": "Bearer " + crud.create_access_token(str(self.faculty_id))}
+        self.seed = seed
+
+
+def rest_op(name, fx: Fixture, client: RestClient, rng: random.Random):
+    if name == "list_courses":
+        return lambda: client.request("GET", "/api/courses/?limit=100")[0] == 200
+    if name == "student_grades":
+        def op():
+            s = rng.choice(fx.students)
+            headers = {"Authorization": "Bearer " + fx.student_tokens[s]}
+            return client.request("GET", "/api/student/me/grades", headers=headers)[0] == 200
+        return op
+    if name == "upload_grades":
+        def op():
+            course_id = rng.choice(list(fx.rosters))
+            entries = [{"student_id": s, "grade_value": rng.choice(["1.0", "2.0", "3.0", "4.0"])}
+                       for s in fx.rosters[course_id]]
+            return client.request("POST", f"/api/faculty/courses/{course_id}/grades",
+                                  json_body={"entries": entries}, headers=fx.faculty_auth)[0] == 200
+        return op
+    if name == "authenticate":
+        return lambda: client.request("POST", "/api/auth/login", form={
+            "username": rng.choice(fx.usernames), "password": "password"})[0] == 200
+    raise ValueError(name)
+
+
+def grpc_op(name, fx: Fixture, channel, rng: random.Random):
+    if name == "list_courses":
+        stub = course_service_pb2_grpc.CourseServiceStub(channel)
+        return lambda: bool(stub.ListCourses(course_service_pb2.ListCoursesRequest(page_size=100)).courses)
+    if name == "student_grades":
+        stub = grade_service_pb2_grpc.GradeServiceStub(channel)
+
+        def op():
+            stub.GetStudentGrades(grade_service_pb2.GetGradesRequest(student_id=rng.choice(fx.students)))
+            return True
+        return op
+    if name == "upload_grades":
+        stub = grade_service_pb2_grpc.GradeServiceStub(channel)
+
+        def op():
+            course_id = rng.choice(list(fx.rosters))
+            entries = [grade_service_pb2.GradeEntry(student_id=s, grade_value=rng.choice(["1.0", "2.0", "3.0", "4.0"]))
+                       for s in fx.rosters[course_id]]
+            return stub.UploadGrades(grade_service_pb2.UploadGradesRequest(
+                course_id=course_id, uploaded_by=fx.faculty_id, entries=entries)).success
+        return op
+    if name == "authenticate":
+        stub = user_service_pb2_grpc.UserServiceStub(channel)
+        return lambda: stub.AuthenticateUser(user_service_pb2.AuthRequest(
+            username=rng.choice(fx.usernames), password="password")).success
+    raise ValueError(name)
+
+
+def timed_run(server, fx, workload, protocol, concurrency, duration):
+    channels, clients = [], []
+
+    def factory(i):
+        rng = random.Random(fx.seed * 1000 + i)
+        if protocol == "rest":
+            client = RestClient(server.http_port)
+            clients.append(client)
+            return rest_op(workload, fx, client, rng)
+        # One channel (HTTP/2 connection) per worker, like one keep-alive
+        # connection per REST worker.
+        channel = grpc.insecure_channel(server.grpc_target)
+        channels.append(channel)
+        return grpc_op(workload, fx, channel, rng)
+
+    cpu0, client_cpu0 = server.cpu_seconds(), time.process_time()
+    latencies, errors, elapsed = run_workers(factory, concurrency, duration)
+    cpu1, client_cpu1 = server.cpu_seconds(), time.process_time()
+    for c in clients:
+        c.close()
+    for ch in channels:
+        ch.close()
+    done = len(latencies)
+    stats = summarize(latencies)
+    stats.update({
+        "requests": done,
+        "errors": errors,
+        "rps": done / elapsed if elapsed else 0.0,
+        "server_cpu_ms_per_req": (cpu1 - cpu0) * 1000.0 / done if done and cpu0 is not None else None,
+        "client_cpu_ms_per_req": (client_cpu1 - client_cpu0) * 1000.0 / done if done else None,
+    })
+    return stats
+
+
+def bytes_per_request(server, fx, workload, protocol, n):
+    target = server.http_port if protocol == "rest" else server.grpc_port
+    proxy = ByteCountingProxy(target)
+    rng = random.Random(fx.seed)
+    try:
+        if protocol == "rest":
+            client = RestClient(proxy.port)
+            op = rest_op(workload, fx, client, rng)
+        else:
+            channel = grpc.insecure_channel(f"127.0.0.1:{proxy.port}")
+            op = grpc_op(workload, fx, channel, rng)
+        for _ in range(n):
+            op()
+        if protocol == "rest":
+            client.close()
+        else:
+            channel.close()
+        time.sleep(0.2)  # let the proxy threads drain
+        return proxy.sent / n, proxy.received / n
+    finally:
+        proxy.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--grades", type=int, default=50_000)
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--bytes-requests", type=int, default=50)
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    engine, _ = make_engine()
+    db_path = engine.url.database
+    print(f"Seeding {args.users:,} users, {args.courses:,} courses, {args.grades:,} grades...")
+    seed_users(engine, args.users, seed=args.seed)
+    seed_courses(engine, args.courses, seed=args.seed)
+    seed_enrollments_and_grades(engine, args.grades, seed=args.seed)
+    fx = Fixture(engine, args.seed)
+    engine.dispose()
+
+    results = {}
+    log_path = Path(db_path).with_name("server.log")
+    with AppServer(f"sqlite:///{db_path}", log_path=log_path) as server:
+        print(f"Server up: REST :{server.http_port}, gRPC :{server.grpc_port} (log: {log_path})")
+        header = (f"  {'workload':<15} {'proto':<5} {'conc':>4} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} "
+                  f"{'errors':>6} {'srv cpu':>9} {'cli cpu':>9} {'bytes up':>9} {'bytes dn':>9}")
+        print("\n" + header)
+        for workload in args.workloads:
+            for protocol in ("rest", "grpc"):
+                up, down = bytes_per_request(server, fx, workload, protocol, args.bytes_requests)
+                for conc in args.concurrency:
+                    st = timed_run(server, fx, workload, protocol, conc, args.duration)
+                    st.update({"bytes_up_per_req": up, "bytes_down_per_req": down})
+                    results[f"{workload}/{protocol}/c{conc}"] = st
+                    srv = f"{st['server_cpu_ms_per_req']:.2f}ms" if st["server_cpu_ms_per_req"] is not None else "n/a"
+                    cli = f"{st['client_cpu_ms_per_req']:.2f}ms" if st["client_cpu_ms_per_req"] is not None else "n/a"
+                    print(f"  {workload:<15} {protocol:<5} {conc:>4} {st['rps']:>9.1f} {st['p50_ms']:>7.2f}ms "
+                          f"{st['p95_ms']:>7.2f}ms {st['p99_ms']:>7.2f}ms {st['errors']:>6} {srv:>9} {cli:>9} "
+                          f"{up:>9.0f} {down:>9.0f}")
+    if args.save:
+        params = {k: v for k, v in vars(args).items() if k != "save"}
+        save_baseline(args.save, "rest_vs_grpc", params, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Typeahead search latency at scale.
+
+    python -m backend.benchmarks.bench_search --users 100000
+
+Seeds a throwaway database, then times `search.search_users` /
+`search.search_courses` for a mix of short prefixes, common substrings (which
+match a large share of the table) and misses. The target is p99 < 10ms for
+user search at 100k users.
+"""
+import argparse
+import random
+
+from ._common import make_engine, seed_users, seed_courses, measure, print_table
+from backend.app import search
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--courses", type=int, default=5_000)
+    parser.add_argument("--iterations", type=int, default=2_000)
+    parser.add_argument("--limit", type=int, default=search.DEFAULT_LIMIT)
+    args = parser.parse_args(argv)
+
+    engine, Session = make_engine()
+    print(f"Seeding {args.users} users and {args.courses} courses...")
+    seed_users(engine, args.users)
+    seed_courses(engine, args.courses)
+
+    rng = random.Random(1)
+    user_queries = {
+        "prefix (2 chars)": ["an", "be", "ji", "ka", "mi"],
+        "prefix (5+ chars)": ["ana.s", "carlo.re", "nina.tan", "ivan.lim1"],
+        "substring common": ["santos", "reyes", "cruz", "garcia"],
+        "substring rare": ["santos4242", "tan9999", "mendoza123"],
+        "miss": ["zzzqqq", "xylophone"],
+    }
+    course_queries = {
+        "course code prefix": ["CS0", "MATH001", "STDISCM"],
+        "course name substring": ["istributed", "gorith", "alculus"],
+    }
+
+    db = Session()
+    rows = []
+    try:
+        for label, qs in user_queries.items():
+            rows.append((f"users: {label}", measure(
+                lambda: search.search_users(db, rng.choice(qs), limit=args.limit), args.iterations)))
+        rows.append(("users: substring + role=student", measure(
+            lambda: search.search_users(db, rng.choice(user_queries["substring common"]), role="student",
+                                        limit=args.limit), args.iterations)))
+        rows.append(("users: substring + role=faculty", measure(
+            lambda: search.search_users(db, rng.choice(user_queries["substring common"]), role="faculty",
+                                        limit=args.limit), args.iterations)))
+        for label, qs in course_queries.items():
+            rows.append((f"courses: {label}", measure(
+                lambda: search.search_courses(db, rng.choice(qs), limit=args.limit), args.iterations)))
+    finally:
+        db.close()
+    print_table(rows, title=f"search latency ({args.users} users, limit={args.limit})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Concurrent small-write throughput, with and without the write queue (`app/write_queue.py`).
+
+    python -m backend.benchmarks.bench_writes
+    python -m backend.benchmarks.bench_writes --threads 32 --ops 200 --max-wait-ms 1
+
+`--threads` workers each make `--ops` calls, cycling through the queued crud
+writes: `enroll_student` (always a new pair), `create_refresh_token` and a
+failed-login count (`_record_login_attempt`, what `authenticate_user` writes
+after a wrong password; the argon2 check itself is left out). Each call gets
+its own session, as a request would.
+
+Every mode runs on a fresh copy of the same seeded database:
+
+- `direct`: each call commits its own transaction, competing for SQLite's
+  write lock (and retrying within pysqlite's busy timeout);
+- `queue`: the calls go through a `WriteQueue`, which commits them in batches.
+
+Reports throughput, per-call latency, failed calls (such as "database is
+locked") and, for the queue, the average batch size.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ._common import make_engine, seed_users, seed_courses, summarize
+from backend.app import crud, write_queue
+
+MODES = ("direct", "queue")
+
+
+def _worker(Session, index, ops, students, courses, users, latencies, errors):
+    for n in range(ops):
+        kind = n % 3
+        t0 = time.perf_counter()
+        try:
+            with Session() as db:
+                if kind == 0:
+                    i = index * ops + n
+                    crud.enroll_student(db, students[i % len(students)], courses[i // len(students)])
+                elif kind == 1:
+                    crud.create_refresh_token(db, user_id=users[(index + n) % len(users)])
+                else:
+                    crud._record_login_attempt(db, users[(index * 7 + n) % len(users)], succeeded=False)
+        except Exception as e:
+            errors.append(type(e).__name__ + ": " + str(e).splitlines()[0])
+            continue
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+
+def run(mode, template: Path, workdir: Path, args):
+    db_path = workdir / f"{mode}.db"
+    shutil.copyfile(template, db_path)
+    engine, Session = make_engine(str(db_path))
+    with engine.connect() as conn:
+        students = [r[0] for r in conn.exec_driver_sql("SELECT id FROM users WHERE role = 'student'")]
+        users = [r[0] for r in conn.exec_driver_sql("SELECT id FROM users LIMIT 500")]
+        courses = [r[0] for r in conn.exec_driver_sql("SELECT id FROM courses")]
+    queue = None
+    if mode == "queue":
+        queue = write_queue.configure(write_queue.WriteQueue(
+            f"sqlite:///{db_path}", max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000))
+    latencies, errors = [], []
+    start = threading.Barrier(args.threads + 1)
+
+    def work(index):
+        start.wait()
+        _worker(Session, index, args.ops, students, courses, users, latencies, errors)
+
+    with ThreadPoolExecutor(args.threads) as pool:
+        futures = [pool.submit(work, i) for i in range(args.threads)]
+        start.wait()
+        t0 = time.perf_counter()
+        for f in futures:
+            f.result()
+        elapsed = time.perf_counter() - t0
+    batches = None
+    if queue is not None:
+        batch_sizes = write_queue.BATCH_SIZE.labels()._totals()
+        batches = batch_sizes[-1] / max(1, sum(batch_sizes[:-1]))
+        write_queue.configure(None)
+    engine.dispose()
+    return elapsed, latencies, errors, batches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=150, help="calls per thread")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=0.0)
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="p4bench-writes-"))
+    template = workdir / "template.db"
+    engine, _ = make_engine(str(template))
+    seed_users(engine, args.users)
+    # Enough courses that every enroll_student call is a new (student, course) pair.
+    seed_courses(engine, args.threads * args.ops // max(1, int(args.users * 0.8)) + 10)
+    engine.dispose()
+
+    total = args.threads * args.ops
+    print(f"\n{total:,} writes from {args.threads} threads")
+    print(f"  {'mode':<8} {'writes/s':>10} {'p50':>9} {'p99':>10} {'failed':>7} {'avg batch':>10}")
+    for mode in args.modes:
+        elapsed, latencies, errors, batch = run(mode, template, workdir, args)
+        st = summarize(latencies)
+        print(f"  {mode:<8} {len(latencies) / elapsed:>10,.0f} {st['p50_ms']:>7.2f}ms {st['p99_ms']:>8.2f}ms "
+              f"{len(errors):>7} {f'{batch:.1f}' if batch is not None else '':>10}")
+        for message in sorted(set(errors))[:3]:
+            print(f"           {message}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""Scenario load generator: replay registration-day and grade-release traffic.
+
+    python -m backend.benchmarks.scenarios registration_day --peak-vus 200
+    python -m backend.benchmarks.scenarios grade_release --peak-vus 300 --time-scale 0.25 --save report.json
+
+Runs the app in a subprocess on a seeded SQLite database (or on `--database`,
+e.g. one built by the bulk data generator, whose users must share one known
+password; pass it with `--password`), then simulates virtual users (VUs). Each
+VU is a thread that runs one user's session, with think times drawn from an
+exponential distribution between actions, until the ramp profile retires it.
+
+registration_day
+    Registration opens: students pile in within a minute, log in, page through
+    the course list, search for courses and enroll, with a few rejected
+    duplicate enrollments (400s, counted as expected outcomes).
+grade_release
+    Grades are posted: a steady ramp of students who log in once and then keep
+    polling `/me/grades`, refresh their access token (refresh-cookie churn),
+    and sometimes log out and back in, while a handful of faculty upload
+    grade batches.
+
+The report gives per-action latency and status counts, a timeline (active VUs,
+throughput, error rate and latency percentiles per `--bucket` seconds), and
+the saturation point: the first bucket where throughput stopped growing with
+load, p95 exceeded `--slo-ms`, or the error rate passed `--max-error-rate`.
+`--time-scale` shrinks every stage and think time for a quick smoke run.
+
+Login rate limiting is off on the server under test: every VU connects from
+127.0.0.1 and would otherwise share one client's login allowance.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import quote
+
+from ._common import (
+    make_engine, seed_users, seed_courses, seed_enrollments_and_grades, summarize, save_baseline, percentile,
+)
+from ._load import AppServer, RestClient
+
+EXPECTED = "expected"   # a business rejection we model on purpose (e.g. duplicate enrollment)
+
+
+class Population:
+    """Users and courses the VUs act as / on."""
+
+    def __init__(self, engine):
+        with engine.connect() as conn:
+            self.students = [r[0] for r in conn.exec_driver_sql(
+                "SELECT username FROM users WHERE role = 'student' ORDER BY random() LIMIT 50000")]
+            self.faculty = [r[0] for r in conn.exec_driver_sql(
+                "SELECT username FROM users WHERE role = 'faculty' ORDER BY random() LIMIT 500")]
+            self.courses = [tuple(r) for r in conn.exec_driver_sql("SELECT id, code FROM courses")]
+            self.rosters = defaultdict(list)
+            for course_id, student_id in conn.exec_driver_sql(
+                    "SELECT course_id, student_id FROM enrollments ORDER BY course_id LIMIT 200000"):
+                if len(self.rosters[course_id]) < 40:
+                    self.rosters[course_id].append(student_id)
+        if not self.students or not self.courses:
+            raise SystemExit("database has no students or courses to simulate")
+
+
+class Recorder:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.events = []        # (t, action, latency_ms, outcome)
+        self.vu_samples = []    # (t, active_vus)
+        self._lock = threading.Lock()
+
+    def record(self, action, latency_ms, outcome):
+        with self._lock:
+            self.events.append((time.perf_counter() - self.t0, action, latency_ms, outcome))
+
+    def sample_vus(self, n):
+        self.vu_samples.append((time.perf_counter() - self.t0, n))
+
+
+class VirtualUser:
+    def __init__(self, index, server, population, recorder, rng, time_scale, password):
+        self.index = index
+        self.client = RestClient(server.http_port)
+        self.pop = population
+        self.recorder = recorder
+        self.rng = rng
+        self.time_scale = time_scale
+        self.password = password
+        self.stop = threading.Event()
+        self.token = None
+
+    @property
+    def auth(self):
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    def think(self, mean_seconds):
+        """Pause like a user reading the page; returns False once retired."""
+        self.stop.wait(self.rng.expovariate(1.0 / (mean_seconds * self.time_scale)))
+        return not self.stop.is_set()
+
+    def call(self, action, method, path, expected=(), **kwargs):
+        t0 = time.perf_counter()
+        try:
+            status, body, headers = self.client.request(method, path, **kwargs)
+        except Exception:
+            self.recorder.record(action, (time.perf_counter() - t0) * 1000.0, "conn_error")
+            return None, None, {}
+        latency = (time.perf_counter() - t0) * 1000.0
+        if 200 <= status < 300:
+            outcome = "ok"
+        elif status in expected:
+            outcome = EXPECTED
+        else:
+            outcome = str(status)
+        self.recorder.record(action, latency, outcome)
+        return status, body, headers
+
+    def login(self, username):
+        status, body, _ = self.call("login", "POST", "/api/auth/login",
+                                    form={"username": username, "password": self.password})
+        if status == 200:
+            self.token = json.loads(body)["access_token"]
+            return True
+        return False
+
+    def close(self):
+        self.client.close()
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+
+def registration_day(vu: VirtualUser):
+    if not vu.login(vu.rng.choice(vu.pop.students)) or not vu.think(3):
+        return
+    while True:
+        r = vu.rng.random()
+        if r < 0.40:
+            path = "/api/student/courses?limit=50"
+            for _ in range(vu.rng.randint(1, 4)):
+                status, _, headers = vu.call("browse_courses", "GET", path, headers=vu.auth)
+                cursor = headers.get("X-Next-Cursor") if status == 200 else None
+                if not cursor or not vu.think(2):
+                    break
+                path = f"/api/student/courses?limit=50&cursor={quote(cursor)}"
+        elif r < 0.60:
+            code = vu.rng.choice(vu.pop.courses)[1]
+            vu.call("search_courses", "GET", f"/api/courses/search?q={code[:vu.rng.randint(2, 5)]}", headers=vu.auth)
+        elif r < 0.95:
+            course_id = vu.rng.choice(vu.pop.courses)[0]
+            vu.call("enroll", "POST", f"/api/student/courses/{course_id}/enroll", expected=(400,), headers=vu.auth)
+        else:
+            vu.call("my_grades", "GET", "/api/student/me/grades", headers=vu.auth)
+        if not vu.think(5):
+            return
+
+
+def grade_release(vu: VirtualUser):
+    if vu.rng.random() < 0.02 and vu.pop.faculty and vu.pop.rosters:
+        return _faculty_uploader(vu)
+    username = vu.rng.choice(vu.pop.students)
+    if not vu.login(username) or not vu.think(2):
+        return
+    polls = 0
+    while True:
+        vu.call("my_grades", "GET", "/api/student/me/grades", headers=vu.auth)
+        polls += 1
+        if polls % 5 == 0:
+            # Access token "expired": trade the refresh cookie for a new one.
+            status, body, _ = vu.call("refresh", "POST", "/api/auth/refresh")
+            if status == 200:
+                vu.token = json.loads(body)["access_token"]
+        if vu.rng.random() < 0.05:
+            vu.call("logout", "POST", "/api/auth/logout")
+            vu.token = None
+            if not vu.think(3) or not vu.login(username):
+                return
+        if not vu.think(10):
+            return
+
+
+def _faculty_uploader(vu: VirtualUser):
+    if not vu.login(vu.rng.choice(vu.pop.faculty)):
+        return
+    while vu.think(20):
+        course_id = vu.rng.choice(list(vu.pop.rosters))
+        entries = [{"student_id": s, "grade_value": vu.rng.choice(["1.0", "2.0", "3.0", "4.0"])}
+                   for s in vu.pop.rosters[course_id]]
+        vu.call("upload_grades", "POST", f"/api/faculty/courses/{course_id}/grades",
+                json_body={"entries": entries}, headers=vu.auth)
+
+
+# name -> (session function, stages as [(seconds, target VUs as a fraction of peak)])
+SCENARIOS = {
+    "registration_day": (registration_day, [(60, 1.0), (120, 1.0), (60, 0.3)]),
+    "grade_release": (grade_release, [(180, 1.0), (120, 1.0), (30, 0.0)]),
+}
+
+
+# ---------------------------------------------------------------------------
+# Engine
+
+def _target_vus(stages, elapsed, peak):
+    """Linear ramp between stage targets, like k6 stages."""
+    start_level, t = 0.0, 0.0
+    for seconds, level in stages:
+        if elapsed < t + seconds:
+            frac = (elapsed - t) / seconds if seconds else 1.0
+            return int(round(peak * (start_level + (level - start_level) * frac)))
+        start_level, t = level, t + seconds
+    return None  # finished
+
+
+def run(session, stages, peak, server, population, recorder, time_scale, password, seed):
+    stages = [(s * time_scale, level) for s, level in stages]
+    vus = []
+    next_index = 0
+
+    def vu_main(vu):
+        try:
+            session(vu)
+        except Exception:
+            recorder.record("session", 0.0, "client_exception")
+        finally:
+            vu.close()
+
+    while True:
+        elapsed = time.perf_counter() - recorder.t0
+        target = _target_vus(stages, elapsed, peak)
+        vus = [(vu, th) for vu, th in vus if th.is_alive()]
+        if target is None:
+            break
+        while len(vus) < target:
+            vu = VirtualUser(next_index, server, population, recorder, random.Random(seed * 100003 + next_index),
+                             time_scale, password)
+            th = threading.Thread(target=vu_main, args=(vu,), daemon=True)
+            th.start()
+            vus.append((vu, th))
+            next_index += 1
+        while len(vus) > target:
+            vu, _ = vus.pop()
+            vu.stop.set()
+        recorder.sample_vus(len(vus))
+        time.sleep(0.25)
+    for vu, _ in vus:
+        vu.stop.set()
+    for _, th in vus:
+        th.join(timeout=30)
+
+
+def timeline(recorder, bucket, exclude=()):
+    """Per-bucket load and latency. Actions in `exclude` count towards req/s and
+    errors but not the latency percentiles, so that a deliberately slow call
+    (login's password hash) does not mask how the rest of the API holds up."""
+    buckets = defaultdict(list)
+    for t, action, latency, outcome in recorder.events:
+        buckets[int(t // bucket)].append((None if action in exclude else latency, outcome))
+    vus = defaultdict(list)
+    for t, n in recorder.vu_samples:
+        vus[int(t // bucket)].append(n)
+    rows = []
+    for b in sorted(set(buckets) | set(vus)):
+        evs = buckets.get(b, [])
+        lat = sorted(l for l, o in evs if l is not None and o in ("ok", EXPECTED))
+        errors = sum(1 for _, o in evs if o not in ("ok", EXPECTED))
+        rows.append({
+            "t": b * bucket,
+            "vus": sum(vus[b]) / len(vus[b]) if vus.get(b) else 0.0,
+            "rps": len(evs) / bucket,
+            "error_rate": errors / len(evs) if evs else 0.0,
+            "p50_ms": percentile(lat, 50),
+            "p95_ms": percentile(lat, 95),
+            "p99_ms": percentile(lat, 99),
+        })
+    return rows
+
+
+def find_saturation(rows, slo_ms, max_error_rate):
+    """First bucket where load went up but throughput did not, p95 broke the
+    SLO, or errors passed the limit."""
+    best_rps, best_vus = 0.0, 0.0
+    for row in rows:
+        if row["vus"] <= 0:
+            continue
+        reason = None
+        if row["error_rate"] > max_error_rate:
+            reason = f"error rate {row['error_rate']:.1%} > {max_error_rate:.1%}"
+        elif row["p95_ms"] > slo_ms:
+            reason = f"p95 {row['p95_ms']:.0f}ms > SLO {slo_ms:.0f}ms"
+        elif best_vus and row["vus"] >= best_vus * 1.2 and row["rps"] < best_rps * 1.05:
+            reason = (f"throughput flat ({row['rps']:.1f} req/s) while VUs rose "
+                      f"{best_vus:.0f} -> {row['vus']:.0f}")
+        if reason:
+            return {**row, "reason": reason}
+        if row["rps"] > best_rps:
+            best_rps, best_vus = row["rps"], row["vus"]
+    return None
+
+
+def report(recorder, rows, saturation):
+    by_action = defaultdict(list)
+    outcomes = defaultdict(Counter)
+    for _, action, latency, outcome in recorder.events:
+        outcomes[action][outcome] += 1
+        if outcome in ("ok", EXPECTED):
+            by_action[action].append(latency)
+    actions = {}
+    print(f"\n  {'action':<16} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9}  outcomes")
+    for action in sorted(outcomes):
+        st = summarize(by_action[action])
+        st["outcomes"] = dict(outcomes[action])
+        actions[action] = st
+        outs = ", ".join(f"{k}={v}" for k, v in outcomes[action].most_common())
+        print(f"  {action:<16} {sum(outcomes[action].values()):>7} {st['p50_ms']:>7.1f}ms "
+              f"{st['p95_ms']:>7.1f}ms {st['p99_ms']:>7.1f}ms  {outs}")
+
+    print(f"\n  {'t(s)':>6} {'VUs':>6} {'req/s':>8} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for row in rows:
+        print(f"  {row['t']:>6.0f} {row['vus']:>6.0f} {row['rps']:>8.1f} {row['error_rate']:>6.1%} "
+              f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms")
+    if saturation:
+        print(f"\nSaturation at t={saturation['t']:.0f}s with ~{saturation['vus']:.0f} VUs, "
+              f"{saturation['rps']:.1f} req/s: {saturation['reason']}")
+    else:
+        print("\nNo saturation detected; raise --peak-vus to find the limit.")
+    return actions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", choices=SCENARIOS)
+    parser.add_argument("--peak-vus", type=int, default=100)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply stage durations and think times")
+    parser.add_argument("--database", type=Path, help="existing database to run against (not modified in place)")
+    parser.add_argument("--password", default="password", help="password shared by the users in --database")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--courses", type=int, default=1_000)
+    parser.add_argument("--grades", type=int, default=100_000)
+    parser.add_argument("--bucket", type=float, default=5.0, help="timeline resolution in seconds")
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="p95 latency objective")
+    parser.add_argument("--slo-exclude", default="login",
+                        help="comma-separated actions left out of timeline latency (default: login)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--save", type=Path, help="write the report as JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    session, stages = SCENARIOS[args.scenario]
+
+    engine, _ = make_engine()
+    db_path = Path(engine.url.database)
+    if args.database:
+        engine.dispose()
+        db_path.write_bytes(args.database.read_bytes())
+        engine, _ = make_engine(str(db_path))
+    else:
+        print(f"Seeding {args.users:,} users, {args.courses:,} courses, {args.grades:,} grades...")
+        seed_users(engine, args.users, seed=args.seed)
+        seed_courses(engine, args.courses, seed=args.seed)
+        seed_enrollments_and_grades(engine, args.grades, seed=args.seed)
+    population = Population(engine)
+    engine.dispose()
+
+    log_path = db_path.with_name("server.log")
+    with AppServer(f"sqlite:///{db_path}", log_path=log_path) as server:
+        total = sum(s for s, _ in stages) * args.time_scale
+        print(f"Running {args.scenario}: peak {args.peak_vus} VUs over {total:.0f}s (server log: {log_path})")
+        recorder = Recorder()
+        run(session, stages, args.peak_vus, server, population, recorder, args.time_scale, args.password, args.seed)
+
+    rows = timeline(recorder, args.bucket, set(args.slo_exclude.split(",")) - {""})
+    saturation = find_saturation(rows, args.slo_ms, args.max_error_rate)
+    actions = report(recorder, rows, saturation)
+    if args.save:
+        params = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items() if k != "save"}
+        save_baseline(args.save, f"scenario:{args.scenario}", params, actions,
+                      extra={"timeline": rows, "saturation": saturation})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
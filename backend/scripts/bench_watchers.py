@@ -0,0 +1,147 @@
+r"""Benchmark gRPC watch fan-out: many concurrent `WatchGrades` streams.
+
+Starts the gRPC server in a child process, opens `--watchers` streams to it
+from an asyncio client (spread over `--channels` connections and `--students`
+student topics, 0 meaning every watcher watches all grades), waits for every
+READY, then has the server publish `--events` grade changes to its hub and
+reports how long they took to reach every watcher. No database work is
+involved: that is the point of the shared hub.
+
+Usage:
+    python -m backend.scripts.bench_watchers
+    python -m backend.scripts.bench_watchers --watchers 10000 --students 0 --events 5
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[2]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def _serve(port, max_watches, conn):
+    """Child process: the gRPC server, publishing to its hub on request."""
+    import resource
+    import threading
+
+    # Nothing is read or written, but importing the app needs a database URL.
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    os.environ["GRPC_MAX_WATCHES"] = str(max_watches)
+    from backend.app import events
+    from backend.app.grpc_server import start_grpc_server
+
+    server = start_grpc_server(port=port)
+    conn.send(None)
+    try:
+        while True:
+            request = conn.recv()
+            if request == "stats":
+                conn.send((events.hub.subscriber_count(), threading.active_count(),
+                           resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+            elif request == "close":
+                events.hub.close_all()
+            elif request is None:
+                break
+            else:
+                topics, data = request
+                events.hub.publish_many((topic, "grade", data) for topic in topics)
+    finally:
+        server.stop(0)
+
+
+async def _run(args, conn):
+    import grpc
+    from backend.app.events import GRADES_TOPIC, student_grades_topic
+    from backend.app.grpc_services import grade_service_pb2 as pb
+
+    # A local subchannel pool each, or channels to one target share a connection.
+    channels = [grpc.aio.insecure_channel(f"127.0.0.1:{args.port}", options=[("grpc.use_local_subchannel_pool", 1)])
+                for _ in range(args.channels)]
+    methods = [
+        channel.unary_stream(
+            "/gradeservice.GradeService/WatchGrades",
+            request_serializer=pb.WatchGradesRequest.SerializeToString,
+            response_deserializer=pb.GradeChange.FromString,
+        )
+        for channel in channels
+    ]
+    t0 = time.perf_counter()
+    calls = [
+        methods[i % len(methods)](pb.WatchGradesRequest(student_id=1 + i % args.students if args.students else 0))
+        for i in range(args.watchers)
+    ]
+    ready = await asyncio.gather(*(call.read() for call in calls))
+    opened = time.perf_counter() - t0
+    assert all(m.type == pb.GradeChange.READY for m in ready)
+    conn.send("stats")
+    subscribers, threads, _ = conn.recv()
+    print(f"{args.watchers:,} watchers ready in {opened:.1f}s "
+          f"(server: {subscribers:,} hub subscriptions, {threads:,} threads)")
+
+    # Every watcher gets every event: with --students N each event goes to all N topics.
+    topics = [student_grades_topic(1 + s) for s in range(args.students)] if args.students else [GRADES_TOPIC]
+    latencies, rounds = [], []
+    for n in range(args.events):
+        data = {"id": n + 1, "student_id": 0, "course_id": 1, "grade_value": "4.0", "semester": None,
+                "uploaded_by": 1, "uploaded_at": None}
+        t_publish = time.perf_counter()
+        conn.send((topics, data))
+
+        async def receive(call):
+            await call.read()
+            latencies.append(time.perf_counter() - t_publish)
+
+        await asyncio.gather(*(receive(call) for call in calls))
+        rounds.append(time.perf_counter() - t_publish)
+
+    conn.send("stats")
+    _, _, rss = conn.recv()
+    print(f"{args.events} events x {args.watchers:,} watchers delivered")
+    print(f"  all watchers reached: mean {statistics.mean(rounds) * 1000:.0f} ms, max {max(rounds) * 1000:.0f} ms")
+    print(f"  per delivery: p50 {_percentile(latencies, 50) * 1000:.0f} ms, "
+          f"p99 {_percentile(latencies, 99) * 1000:.0f} ms")
+    print(f"  server max RSS {rss:.0f} MB")
+
+    # End the streams from the server side, as at shutdown.
+    conn.send("close")
+    await asyncio.gather(*(call.code() for call in calls))
+    for channel in channels:
+        await channel.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--watchers", type=int, default=10_000)
+    parser.add_argument("--channels", type=int, default=10, help="client connections")
+    parser.add_argument("--students", type=int, default=100, help="distinct student topics; 0: all grades")
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--port", type=int, default=50071)
+    args = parser.parse_args(argv)
+
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.get_context("spawn").Process(
+        target=_serve, args=(args.port, args.watchers, child_conn), daemon=True
+    )
+    server.start()
+    try:
+        conn.recv()  # server started
+        asyncio.run(_run(args, conn))
+    finally:
+        conn.send(None)
+        server.join(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+r"""Query-budget gate: call every REST route and gRPC method, check its SQL budget.
+
+Builds a throwaway database with `generate_data` (fixed seed, so counts are
+stable), runs the app in-process (FastAPI's TestClient plus a gRPC server on a
+free port) with row counting on, and drives each route / method once through a
+case below. The `request_context` stats of that call are compared with the
+`@query_budget` declared on the endpoint (see `backend/app/query_budget.py`).
+
+It fails (exit status 1) when a call exceeds its budget, when an endpoint has no
+budget, or when an endpoint has no case here, so new routes cannot slip past.
+Over-budget calls are listed with every statement shape they ran.
+
+Usage:
+    python -m backend.scripts.check_query_budgets
+    python -m backend.scripts.check_query_budgets --only roster --verbose
+"""
+import argparse
+import contextlib
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[2]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+PASSWORD = "password"
+# Fixed request shapes; budgets assume these.
+PAGE_SIZE = 20
+UPLOAD_BATCH = 10
+
+CASES = []
+
+
+def case(target):
+    """Register `fn(ctx)` as the case for `target`: "METHOD /route/template" or
+    "/package.Service/Method". The last call `fn` makes must be to `target`."""
+    def decorate(fn):
+        CASES.append((target, fn))
+        return fn
+    return decorate
+
+
+class Context:
+    """Fixture data and clients shared by the cases."""
+
+    def __init__(self, app, channel):
+        from fastapi.testclient import TestClient
+        from sqlalchemy import func, select
+        from backend.app import crud, models
+        from backend.app.database import SessionLocal
+
+        self.app = app
+        self.channel = channel
+        self.client = TestClient(app)
+        db = SessionLocal()
+        try:
+            def first(stmt):
+                return db.execute(stmt).first()
+
+            enrolled = (select(models.Enrollment.course_id, func.count().label("n"))
+                        .group_by(models.Enrollment.course_id).order_by(func.count().desc(), models.Enrollment.course_id))
+            self.course_id = first(enrolled).course_id
+            self.roster = [r[0] for r in db.execute(
+                select(models.Enrollment.student_id).where(models.Enrollment.course_id == self.course_id)
+                .order_by(models.Enrollment.student_id).limit(UPLOAD_BATCH))]
+            self.student = first(
+                select(models.User).join(models.Grade, models.Grade.student_id == models.User.id)
+                .where(models.User.role == "student").order_by(models.User.id)).User
+            # A course the student is not enrolled in.
+            taken = select(models.Enrollment.course_id).where(models.Enrollment.student_id == self.student.id)
+            self.open_course_id = first(
+                select(models.Course.id).where(models.Course.id.not_in(taken)).order_by(models.Course.id)).id
+            self.faculty = first(select(models.User).where(models.User.role == "faculty").order_by(models.User.id)).User
+            self.admin = first(
+                select(models.User).where(models.User.role == "course_audit_admin").order_by(models.User.id)).User
+        finally:
+            db.close()
+        self.tokens = {
+            user.role: crud.create_access_token(subject=str(user.id))
+            for user in (self.student, self.faculty, self.admin)
+        }
+        self._serial = 0
+
+    def headers(self, role):
+        return {"Authorization": f"Bearer {self.tokens[role]}"}
+
+    def metadata(self, role):
+        return (("authorization", f"Bearer {self.tokens[role]}"),)
+
+    def unique(self, prefix):
+        self._serial += 1
+        return f"{prefix}{self._serial:04d}"
+
+    def new_client(self):
+        from fastapi.testclient import TestClient
+        return TestClient(self.app)
+
+    def stub(self, name):
+        from backend.app.grpc_services import (
+            admin_service_pb2_grpc, course_service_pb2_grpc, grade_service_pb2_grpc, user_service_pb2_grpc,
+        )
+        modules = {"AdminService": admin_service_pb2_grpc, "CourseService": course_service_pb2_grpc,
+                   "GradeService": grade_service_pb2_grpc, "UserService": user_service_pb2_grpc}
+        return getattr(modules[name], f"{name}Stub")(self.channel)
+
+
+def _ok(response, status=200):
+    if response.status_code != status:
+        raise AssertionError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return response
+
+
+@contextlib.contextmanager
+def _closing_streams():
+    """Event streams only end when their hub subscription does: close every
+    subscription once the call in the block has opened one."""
+    from backend.app import events
+
+    def close_when_subscribed():
+        while not events.hub.subscriber_count():
+            time.sleep(0.01)
+        events.hub.close_all()
+
+    closer = threading.Thread(target=close_when_subscribed)
+    closer.start()
+    try:
+        yield
+    finally:
+        closer.join()
+
+
+def _watch(call, ready):
+    """Read a watch stream that `_closing_streams` ends; it must start with `ready`."""
+    import grpc
+    messages = []
+    try:
+        messages.extend(call)
+    except grpc.RpcError as e:
+        if e.code() != grpc.StatusCode.UNAVAILABLE:
+            raise AssertionError(f"{e.code()}: {e.details()}")
+    if not messages or messages[0].type != ready:
+        raise AssertionError(f"no READY message: {messages[:1]}")
+
+
+# REST
+
+@case("POST /api/auth/login")
+def _login(ctx):
+    _ok(ctx.new_client().post("/api/auth/login", data={"username": ctx.student.username, "password": PASSWORD}))
+
+
+@case("POST /api/auth/refresh")
+def _refresh(ctx):
+    client = ctx.new_client()
+    _ok(client.post("/api/auth/login", data={"username": ctx.student.username, "password": PASSWORD}))
+    _ok(client.post("/api/auth/refresh"))
+
+
+@case("POST /api/auth/logout")
+def _logout(ctx):
+    client = ctx.new_client()
+    _ok(client.post("/api/auth/login", data={"username": ctx.student.username, "password": PASSWORD}))
+    _ok(client.post("/api/auth/logout"))
+
+
+@case("GET /api/courses/")
+def _list_courses(ctx):
+    _ok(ctx.client.get(f"/api/courses/?limit={PAGE_SIZE}"))
+
+
+@case("GET /api/courses/search")
+def _search_courses(ctx):
+    _ok(ctx.client.get("/api/courses/search?q=Program"))
+
+
+@case("POST /api/courses/")
+def _create_course(ctx):
+    body = {"code": ctx.unique("QB"), "name": "Budget Checks", "instructor": "Dr. Ong", "capacity": 40}
+    _ok(ctx.client.post("/api/courses/", json=body, headers=ctx.headers("course_audit_admin")), 201)
+
+
+@case("PUT /api/courses/{course_id}")
+def _update_course(ctx):
+    body = {"code": ctx.unique("QB"), "name": "Budget Checks II", "instructor": "Dr. Ong", "capacity": 45}
+    _ok(ctx.client.put(f"/api/courses/{ctx.open_course_id}", json=body, headers=ctx.headers("course_audit_admin")))
+
+
+@case("DELETE /api/courses/{course_id}")
+def _delete_course(ctx):
+    body = {"code": ctx.unique("QB"), "name": "Doomed", "instructor": "Dr. Ong", "capacity": 10}
+    course = _ok(ctx.client.post("/api/courses/", json=body, headers=ctx.headers("course_audit_admin")), 201).json()
+    _ok(ctx.client.delete(f"/api/courses/{course['id']}", headers=ctx.headers("course_audit_admin")))
+
+
+@case("POST /api/faculty/courses/{course_id}/grades")
+def _upload_grades(ctx):
+    entries = [{"student_id": sid, "grade_value": "3.5"} for sid in ctx.roster]
+    _ok(ctx.client.post(f"/api/faculty/courses/{ctx.course_id}/grades", json={"entries": entries},
+                        headers=ctx.headers("faculty")))
+
+
+@case("GET /api/faculty/courses/{course_id}/roster")
+def _roster(ctx):
+    _ok(ctx.client.get(f"/api/faculty/courses/{ctx.course_id}/roster?limit={PAGE_SIZE}",
+                       headers=ctx.headers("faculty")))
+
+
+@case("GET /api/faculty/courses/{course_id}/stats")
+def _course_stats(ctx):
+    from backend.app import course_stats
+    course_stats.clear_cache()  # budget the recompute, not a cache hit
+    _ok(ctx.client.get(f"/api/faculty/courses/{ctx.course_id}/stats", headers=ctx.headers("faculty")))
+
+
+@case("GET /api/exports/courses/{course_id}/roster")
+def _export_roster(ctx):
+    _ok(ctx.client.get(f"/api/exports/courses/{ctx.course_id}/roster?format=csv", headers=ctx.headers("faculty")))
+
+
+@case("GET /api/exports/courses/{course_id}/grades")
+def _export_course_grades(ctx):
+    _ok(ctx.client.get(f"/api/exports/courses/{ctx.course_id}/grades?format=ndjson", headers=ctx.headers("faculty")))
+
+
+@case("GET /api/exports/grades")
+def _export_grades(ctx):
+    _ok(ctx.client.get("/api/exports/grades?format=csv", headers=ctx.headers("course_audit_admin")))
+
+
+@case("GET /api/faculty/me/grades")
+def _faculty_me_grades(ctx):
+    _ok(ctx.client.get("/api/faculty/me/grades", headers=ctx.headers("student")))
+
+
+@case("GET /api/student/courses")
+def _student_courses(ctx):
+    _ok(ctx.client.get(f"/api/student/courses?limit={PAGE_SIZE}", headers=ctx.headers("student")))
+
+
+@case("POST /api/student/courses/{course_id}/enroll")
+def _enroll(ctx):
+    _ok(ctx.client.post(f"/api/student/courses/{ctx.open_course_id}/enroll", headers=ctx.headers("student")))
+
+
+@case("GET /api/student/me/grades")
+def _student_grades(ctx):
+    _ok(ctx.client.get("/api/student/me/grades", headers=ctx.headers("student")))
+
+
+@case("GET /api/student/me/transcript")
+def _student_transcript(ctx):
+    _ok(ctx.client.get("/api/student/me/transcript", headers=ctx.headers("student")))
+
+
+@case("GET /api/student/me/grades/events")
+def _student_grade_events(ctx):
+    with _closing_streams():
+        response = _ok(ctx.client.get("/api/student/me/grades/events", headers=ctx.headers("student")))
+    if "event: ready" not in response.text:
+        raise AssertionError(f"no ready event: {response.text[:200]}")
+
+
+@case("GET /api/users/")
+def _list_users(ctx):
+    _ok(ctx.client.get(f"/api/users/?limit={PAGE_SIZE}&role=student"))
+
+
+@case("GET /api/users/search")
+def _search_users(ctx):
+    _ok(ctx.client.get("/api/users/search?q=ana&role=student"))
+
+
+@case("POST /api/users/")
+def _create_user(ctx):
+    name = ctx.unique("budget.user")
+    body = {"username": name, "email": f"{name}@example.edu", "password": PASSWORD, "role": "student"}
+    _ok(ctx.client.post("/api/users/", json=body), 201)
+
+
+@case("GET /api/admin/profile")
+def _profile(ctx):
+    _ok(ctx.client.get("/api/admin/profile?seconds=0.05", headers=ctx.headers("course_audit_admin")))
+
+
+@case("GET /api/admin/pool")
+def _pool(ctx):
+    _ok(ctx.client.get("/api/admin/pool", headers=ctx.headers("course_audit_admin")))
+
+
+@case("GET /api/changes")
+def _changes(ctx):
+    _ok(ctx.client.get("/api/changes", headers=ctx.headers("course_audit_admin")))
+
+
+# gRPC
+
+@case("/courseservice.CourseService/ListCourses")
+def _grpc_list_courses(ctx):
+    from backend.app.grpc_services import course_service_pb2 as pb
+    ctx.stub("CourseService").ListCourses(pb.ListCoursesRequest(page_size=PAGE_SIZE))
+
+
+@case("/courseservice.CourseService/GetCourse")
+def _grpc_get_course(ctx):
+    from backend.app.grpc_services import course_service_pb2 as pb
+    ctx.stub("CourseService").GetCourse(pb.CourseRequest(course_id=ctx.course_id))
+
+
+@case("/courseservice.CourseService/CreateCourse")
+def _grpc_create_course(ctx):
+    from backend.app.grpc_services import course_service_pb2 as pb
+    ctx.stub("CourseService").CreateCourse(
+        pb.CourseCreateRequest(code=ctx.unique("QG"), name="Budget Checks", instructor="Dr. Yu", capacity=30))
+
+
+@case("/courseservice.CourseService/UpdateCourse")
+def _grpc_update_course(ctx):
+    from backend.app.grpc_services import course_service_pb2 as pb
+    ctx.stub("CourseService").UpdateCourse(pb.CourseUpdateRequest(
+        id=ctx.open_course_id, code=ctx.unique("QG"), name="Budget Checks III", instructor="Dr. Yu", capacity=30))
+
+
+@case("/courseservice.CourseService/DeleteCourse")
+def _grpc_delete_course(ctx):
+    from backend.app.grpc_services import course_service_pb2 as pb
+    stub = ctx.stub("CourseService")
+    course = stub.CreateCourse(pb.CourseCreateRequest(code=ctx.unique("QG"), name="Doomed", capacity=10))
+    stub.DeleteCourse(pb.CourseRequest(course_id=course.id))
+
+
+@case("/courseservice.CourseService/GetCourseRoster")
+def _grpc_roster(ctx):
+    from backend.app.grpc_services import course_service_pb2 as pb
+    ctx.stub("CourseService").GetCourseRoster(pb.CourseRosterRequest(course_id=ctx.course_id, page_size=PAGE_SIZE))
+
+
+@case("/courseservice.CourseService/GetCourseStats")
+def _grpc_course_stats(ctx):
+    from backend.app import course_stats
+    from backend.app.grpc_services import course_service_pb2 as pb
+    course_stats.clear_cache()
+    ctx.stub("CourseService").GetCourseStats(pb.CourseStatsRequest(course_id=ctx.course_id))
+
+
+@case("/gradeservice.GradeService/GetStudentGrades")
+def _grpc_grades(ctx):
+    from backend.app.grpc_services import grade_service_pb2 as pb
+    ctx.stub("GradeService").GetStudentGrades(pb.GetGradesRequest(student_id=ctx.student.id))
+
+
+@case("/gradeservice.GradeService/UploadGrades")
+def _grpc_upload(ctx):
+    from backend.app.grpc_services import grade_service_pb2 as pb
+    entries = [pb.GradeEntry(student_id=sid, grade_value="3.0") for sid in ctx.roster]
+    response = ctx.stub("GradeService").UploadGrades(
+        pb.UploadGradesRequest(course_id=ctx.course_id, uploaded_by=ctx.faculty.id, entries=entries))
+    if not response.success:
+        raise AssertionError(response.message)
+
+
+@case("/gradeservice.GradeService/StreamStudentGrades")
+def _grpc_stream_grades(ctx):
+    from backend.app.grpc_services import grade_service_pb2 as pb
+    list(ctx.stub("GradeService").StreamStudentGrades(pb.GetGradesByStudentRequest(student_id=ctx.student.id)))
+
+
+@case("/gradeservice.GradeService/WatchGrades")
+def _grpc_watch_grades(ctx):
+    from backend.app.grpc_services import grade_service_pb2 as pb
+    with _closing_streams():
+        _watch(ctx.stub("GradeService").WatchGrades(pb.WatchGradesRequest(student_id=ctx.student.id)),
+               pb.GradeChange.READY)
+
+
+@case("/courseservice.CourseService/WatchCourseChanges")
+def _grpc_watch_courses(ctx):
+    from backend.app.grpc_services import course_service_pb2 as pb
+    with _closing_streams():
+        _watch(ctx.stub("CourseService").WatchCourseChanges(pb.WatchCoursesRequest()), pb.CourseChange.READY)
+
+
+@case("/userservice.UserService/AuthenticateUser")
+def _grpc_auth(ctx):
+    from backend.app.grpc_services import user_service_pb2 as pb
+    response = ctx.stub("UserService").AuthenticateUser(
+        pb.AuthRequest(username=ctx.student.username, password=PASSWORD))
+    if not response.success:
+        raise AssertionError(response.message)
+
+
+@case("/userservice.UserService/GetUser")
+def _grpc_get_user(ctx):
+    from backend.app.grpc_services import user_service_pb2 as pb
+    ctx.stub("UserService").GetUser(pb.UserRequest(user_id=ctx.student.id))
+
+
+@case("/userservice.UserService/ListUsers")
+def _grpc_list_users(ctx):
+    from backend.app.grpc_services import user_service_pb2 as pb
+    ctx.stub("UserService").ListUsers(pb.ListUsersRequest(page_size=PAGE_SIZE, role="student"))
+
+
+@case("/userservice.UserService/SearchUsers")
+def _grpc_search_users(ctx):
+    from backend.app.grpc_services import user_service_pb2 as pb
+    ctx.stub("UserService").SearchUsers(pb.SearchUsersRequest(query="ana", role="student"))
+
+
+@case("/userservice.UserService/CreateUser")
+def _grpc_create_user(ctx):
+    from backend.app.grpc_services import user_service_pb2 as pb
+    name = ctx.unique("budget.grpc")
+    ctx.stub("UserService").CreateUser(
+        pb.CreateUserRequest(username=name, email=f"{name}@example.edu", password=PASSWORD, role="student"))
+
+
+@case("/adminservice.AdminService/CaptureProfile")
+def _grpc_profile(ctx):
+    from backend.app.grpc_services import admin_service_pb2 as pb
+    ctx.stub("AdminService").CaptureProfile(pb.ProfileRequest(seconds=0.05),
+                                            metadata=ctx.metadata("course_audit_admin"))
+
+
+@case("/adminservice.AdminService/ListChanges")
+def _grpc_changes(ctx):
+    from backend.app.grpc_services import admin_service_pb2 as pb
+    ctx.stub("AdminService").ListChanges(pb.ChangesRequest(), metadata=ctx.metadata("course_audit_admin"))
+
+
+def endpoints(app):
+    """Map every checkable target to its handler function."""
+    from fastapi.routing import APIRoute
+    from backend.app.grpc_server import SERVICERS
+
+    def api_routes(routes):
+        for route in routes:
+            if isinstance(route, APIRoute):
+                yield route
+            elif hasattr(route, "original_router"):
+                # Newer FastAPI keeps included routers nested (paths already prefixed).
+                yield from api_routes(route.original_router.routes)
+
+    found = {}
+    for route in api_routes(app.routes):
+        if route.endpoint.__module__.startswith("backend.app.routers"):
+            for method in route.methods:
+                found[f"{method} {route.path}"] = route.endpoint
+    for servicer, _ in SERVICERS:
+        for service in _service_descriptors(servicer):
+            for method in service.methods:
+                found[f"/{service.full_name}/{method.name}"] = getattr(servicer, method.name)
+    return found
+
+
+def _service_descriptors(servicer):
+    import importlib
+    for base in servicer.__mro__[1:]:
+        if base.__name__.endswith("Servicer") and base.__module__.endswith("_pb2_grpc"):
+            pb2 = importlib.import_module(base.__module__[:-len("_grpc")])
+            yield pb2.DESCRIPTOR.services_by_name[base.__name__[:-len("Servicer")]]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", help="only targets containing this text")
+    parser.add_argument("--verbose", "-v", action="store_true", help="list statements for every call")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="p4budget-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'budget.db'}"
+    os.environ.setdefault("TRACE_EXPORT", "")
+    # The report below covers what the N+1 / slow-query warnings would say.
+    logging.getLogger("backend.app.sql_instrumentation").setLevel(logging.ERROR)
+
+    from backend.scripts.generate_data import generate
+    generate(workdir / "budget.db", users=600, courses=40, enrollments=1500, graded_ratio=0.8,
+             refresh_tokens=300, seed=1, password=PASSWORD, cheap_hash=True, workers=1, log=lambda *_: None)
+
+    import grpc
+    from backend.app import query_budget, request_context, sql_instrumentation
+    from backend.app.grpc_server import start_grpc_server
+    from backend.app.main import app
+
+    sql_instrumentation.set_row_counting(True)
+    captured = []
+    request_context.on_finish(captured.append)
+    port = _free_port()
+    server = start_grpc_server(port)
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    failures = 0
+    try:
+        ctx = Context(app, channel)
+        handlers = endpoints(app)
+        cases = dict(CASES)
+        print(f"\n  {'target':<56} {'statements':>10} {'rows':>9}")
+        for target in sorted(set(handlers) | set(cases)):
+            if args.only and args.only not in target:
+                continue
+            budget = query_budget.budget_of(handlers[target]) if target in handlers else None
+            problems, stats = [], None
+            if target not in handlers:
+                problems.append("case for an endpoint that no longer exists")
+            elif budget is None:
+                problems.append("no @query_budget on the handler")
+            if target not in cases:
+                problems.append("no case in check_query_budgets.py drives it")
+            else:
+                del captured[:]
+                try:
+                    cases[target](ctx)
+                except Exception as e:
+                    problems.append(f"call failed: {e}")
+                stats = captured[-1] if captured else None
+                if stats is not None and stats.name != target:
+                    problems.append(f"last call was {stats.name}, not this target")
+                elif stats is not None and budget is not None:
+                    problems.extend(query_budget.violations(stats, budget))
+            used = (f"{stats.query_count:>4}/{budget.statements:<5}" if stats and budget else f"{'-':>10}")
+            rows = (f"{stats.rows_loaded:>4}/{budget.rows if budget.rows is not None else '-':<4}"
+                    if stats and budget else f"{'-':>9}")
+            print(f"{'FAIL' if problems else 'ok':>4}  {target:<56} {used} {rows}")
+            for problem in problems:
+                print(f"        {problem}")
+            if stats is not None and (problems or args.verbose):
+                for line in query_budget.statement_report(stats):
+                    print(f"          {line}")
+            failures += bool(problems)
+    finally:
+        channel.close()
+        server.stop(0)
+    print(f"\n{failures} failing" if failures else "\nAll endpoints within budget.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+r"""Delete change log entries older than the retention period.
+
+The app compacts `change_log` every `CHANGE_LOG_COMPACT_INTERVAL_SECONDS`
+(see `backend/app/outbox.py`). Run this where that is turned off, or to trim
+further than `CHANGE_LOG_RETENTION_HOURS` once. Consumers whose cursor falls
+before what is left get 410 Gone and have to re-list.
+
+Usage:
+    python -m backend.scripts.compact_changes
+    python -m backend.scripts.compact_changes --hours 24
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[2]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+
+def main(argv=None):
+    from backend.app import config, outbox
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=float, default=config.CHANGE_LOG_RETENTION_HOURS,
+                        help="keep entries newer than this")
+    parser.add_argument("--batch-size", type=int, default=outbox.COMPACT_BATCH, help="entries per DELETE")
+    args = parser.parse_args(argv)
+
+    from backend.app.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    try:
+        removed = outbox.compact(db, datetime.utcnow() - timedelta(hours=args.hours), batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Removed {removed:,} change log entries in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
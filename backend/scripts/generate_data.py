@@ -0,0 +1,356 @@
+r"""Bulk synthetic data generator for load and performance testing.
+
+`seed.py` creates a few demo accounts through `crud`, one argon2 hash and one
+commit per user, which is fine for three users and hopeless for a realistic
+dataset. This script builds a fresh SQLite database with users, courses,
+enrollments, grades and refresh tokens at any scale:
+
+- rows are generated in worker processes (`--workers`) and written with one
+  `executemany` per chunk in a single transaction per table, with journaling
+  off and secondary indexes, search tables and student summaries built once
+  after the load;
+- every chunk draws from its own RNG seeded by `(--seed, table, chunk)`, so the
+  same arguments always produce the same database, whatever the worker count;
+- all users share one password (`--password`). By default its argon2 hash is
+  computed once with the app's settings and stored on every row, so logins cost
+  what they cost in production. `--test-only-cheap-hash` instead gives each user
+  a distinctly salted argon2 hash at minimum cost parameters, so login-heavy
+  load tests measure the API instead of the hash. Never use it outside tests.
+
+The defaults (100k users, 10k courses, 400k enrollments, ~320k grades, 180k
+refresh tokens) make about a million rows; `--scale` multiplies them all.
+
+Usage:
+    # From repository root:
+    python -m backend.scripts.generate_data --out perf.db
+    python -m backend.scripts.generate_data --out small.db --scale 0.01 --seed 7
+    python -m backend.scripts.generate_data --out login.db --test-only-cheap-hash
+
+    # then point the app (or a benchmark's --database) at it:
+    DATABASE_URL=sqlite:///./perf.db uvicorn backend.app.main:app
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Insert repository root into sys.path so the script also runs as a file.
+repo_root = Path(__file__).resolve().parents[2]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+CHUNK = 20000
+# Timestamps are laid out around a fixed date so output is reproducible.
+EPOCH = datetime(2025, 1, 6, 8, 0, 0)
+
+FIRST_NAMES = ["ana", "ben", "carlo", "dana", "eli", "faye", "gio", "hana", "ivan", "jo", "kai", "lea", "migs", "nina"]
+LAST_NAMES = ["santos", "reyes", "cruz", "bautista", "garcia", "tan", "lim", "chua", "dela_cruz", "mendoza"]
+DEPTS = ["CS", "MATH", "PHYS", "CHEM", "BIO", "ENG", "HIST", "ECON", "PHIL", "STDISCM"]
+TOPICS = ["Introduction to", "Advanced", "Topics in", "Seminar on", "Foundations of"]
+SUBJECTS = ["Programming", "Distributed Systems", "Algorithms", "Calculus", "Databases", "Networks"]
+INSTRUCTORS = ["Dr. Smith", "Dr. Lopez", "Dr. Yu", "Dr. Ramos", "Dr. Ong", "Dr. Villanueva", "Dr. Aquino"]
+CAPACITIES = [30, 40, 50, 120]
+GRADE_VALUES = ["4.0", "3.5", "3.0", "2.5", "2.0", "1.5", "1.0", "0.0"]
+GRADE_WEIGHTS = [12, 18, 22, 18, 12, 8, 6, 4]
+SEMESTERS = ["2024-T3", "2025-T1", "2025-T2"]
+
+# Column order of the tuples each generator yields.
+COLUMNS = {
+    "users": ("id", "username", "email", "password_hash", "role", "is_active",
+              "failed_login_attempts", "locked_until", "created_at"),
+    "courses": ("id", "code", "name", "instructor", "capacity", "created_at"),
+    "enrollments": ("student_id", "course_id", "enrolled_at"),
+    "grades": ("student_id", "course_id", "grade_value", "semester", "uploaded_by", "uploaded_at"),
+    "refresh_tokens": ("user_id", "token_hash", "revoked", "expires_at", "created_at"),
+}
+
+# Per-worker state set by `_init_worker`.
+_state = {}
+
+
+def _rng(seed: int, table: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{table}:{chunk}")
+
+
+def _ts(dt: datetime) -> str:
+    # The format SQLAlchemy's SQLite DateTime type stores and parses.
+    return dt.isoformat(" ", "microseconds")
+
+
+def _cheap_hash(password: bytes, salt: bytes) -> str:
+    from argon2.low_level import Type, hash_secret
+    # Minimum argon2 cost; passlib verifies it like any other argon2 hash.
+    return hash_secret(password, salt, time_cost=1, memory_cost=8, parallelism=1,
+                       hash_len=16, type=Type.ID).decode()
+
+
+def _init_worker(state: dict):
+    _state.clear()
+    _state.update(state)
+
+
+def _gen_users(task):
+    chunk, start, count = task
+    rng = _rng(_state["seed"], "users", chunk)
+    password, shared_hash = _state["password"], _state["password_hash"]
+    student_ratio = _state["student_ratio"]
+    rows = []
+    for user_id in range(start, start + count):
+        name = f"{rng.choice(FIRST_NAMES)}.{rng.choice(LAST_NAMES)}{user_id}"
+        r = rng.random()
+        if r < student_ratio:
+            role = "student"
+        elif r < student_ratio + (1 - student_ratio) * 0.9:
+            role = "faculty"
+        else:
+            role = "course_audit_admin"
+        password_hash = shared_hash or _cheap_hash(password, rng.randbytes(16))
+        created = EPOCH - timedelta(days=rng.random() * 730)
+        rows.append((user_id, name, f"{name}@example.edu", password_hash, role, 1, 0, None, _ts(created)))
+    return rows
+
+
+def _gen_courses(task):
+    chunk, start, count = task
+    rng = _rng(_state["seed"], "courses", chunk)
+    rows = []
+    for course_id in range(start, start + count):
+        created = EPOCH - timedelta(days=30 + rng.random() * 60)
+        rows.append((
+            course_id, f"{rng.choice(DEPTS)}{course_id:05d}", f"{rng.choice(TOPICS)} {rng.choice(SUBJECTS)}",
+            rng.choice(INSTRUCTORS), rng.choice(CAPACITIES), _ts(created),
+        ))
+    return rows
+
+
+def _gen_enrollments(task):
+    """Enroll `quotas[i]` distinct students in course `first_course + i`; grade some of them."""
+    chunk, first_course, quotas = task
+    rng = _rng(_state["seed"], "enrollments", chunk)
+    students, faculty = _state["students"], _state["faculty"]
+    graded_ratio = _state["graded_ratio"]
+    enrollments, grades = [], []
+    for course_id, quota in enumerate(quotas, first_course):
+        uploader = rng.choice(faculty) if faculty else None
+        semester = rng.choice(SEMESTERS)
+        for student_id in rng.sample(students, quota):
+            enrolled = EPOCH + timedelta(seconds=rng.random() * 14 * 86400)
+            enrollments.append((student_id, course_id, _ts(enrolled)))
+            if rng.random() < graded_ratio:
+                uploaded = EPOCH + timedelta(days=100, seconds=rng.random() * 7 * 86400)
+                value = rng.choices(GRADE_VALUES, GRADE_WEIGHTS)[0]
+                grades.append((student_id, course_id, value, semester, uploader, _ts(uploaded)))
+    return enrollments, grades
+
+
+def _gen_refresh_tokens(task):
+    chunk, start, count = task
+    rng = _rng(_state["seed"], "refresh_tokens", chunk)
+    n_users = _state["n_users"]
+    rows = []
+    for _ in range(count):
+        created = EPOCH + timedelta(seconds=rng.random() * 120 * 86400)
+        token_hash = hashlib.sha256(rng.randbytes(32)).hexdigest()
+        rows.append((rng.randint(1, n_users), token_hash, int(rng.random() < 0.1),
+                     _ts(created + timedelta(days=7)), _ts(created)))
+    return rows
+
+
+def _ranges(total: int, chunk: int = CHUNK):
+    return [(i, start + 1, min(chunk, total - start)) for i, start in enumerate(range(0, total, chunk))]
+
+
+def enrollment_quotas(capacities, total: int, n_students: int):
+    """Spread `total` enrollments over courses as evenly as their capacities allow."""
+    caps = [min(c, n_students) for c in capacities]
+    if sum(caps) < total:
+        raise ValueError(f"{total:,} enrollments do not fit in {len(caps):,} courses "
+                         f"(room for {sum(caps):,}); add courses or lower --enrollments")
+    quotas = [0] * len(caps)
+    remaining = total
+    while remaining:
+        open_courses = [i for i, c in enumerate(caps) if quotas[i] < c]
+        share = max(1, remaining // len(open_courses))
+        for i in open_courses:
+            add = min(share, caps[i] - quotas[i], remaining)
+            quotas[i] += add
+            remaining -= add
+            if not remaining:
+                break
+    return quotas
+
+
+class Loader:
+    """Writes generated rows into a fresh SQLite file over a raw sqlite3 connection."""
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(str(path), isolation_level=None)
+        for pragma in ("journal_mode = OFF", "synchronous = OFF", "temp_store = MEMORY",
+                       "cache_size = -262144", "locking_mode = EXCLUSIVE"):
+            self.conn.execute(f"PRAGMA {pragma}")
+        self.counts = {}
+
+    def insert(self, table: str, rows):
+        if not rows:
+            return
+        cols = COLUMNS[table]
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", rows)
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+
+    def begin(self):
+        self.conn.execute("BEGIN")
+
+    def commit(self):
+        self.conn.execute("COMMIT")
+
+    def close(self):
+        self.conn.close()
+
+
+def _map(pool, fn, tasks):
+    return pool.imap(fn, tasks) if pool else map(fn, tasks)
+
+
+def _pool(workers: int, state: dict):
+    if workers <= 1:
+        _init_worker(state)
+        return None
+    return multiprocessing.Pool(workers, initializer=_init_worker, initargs=(state,))
+
+
+def generate(out: Path, users: int, courses: int, enrollments: int, graded_ratio: float, refresh_tokens: int,
+             seed: int = 0, password: str = "password", cheap_hash: bool = False, workers: int = None,
+             student_ratio: float = 0.9, log=print):
+    """Build a new database at `out`; return `{table: rows}`."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from sqlalchemy.schema import CreateTable
+    from backend.app import models, student_summary  # noqa: F401  (registers the tables)
+    from backend.app.crud import pwd_context
+    from backend.app.database import Base
+    from backend.app.search import install_search_index
+
+    workers = workers or os.cpu_count() or 1
+    engine = create_engine(f"sqlite:///{out}")
+    # Tables only; indexes are cheaper to build once over the loaded data.
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(table))
+    engine.dispose()
+
+    state = {
+        "seed": seed, "student_ratio": student_ratio, "graded_ratio": graded_ratio, "n_users": users,
+        "password": password.encode(), "password_hash": None if cheap_hash else pwd_context.hash(password),
+    }
+    loader = Loader(out)
+    t0 = time.perf_counter()
+    try:
+        loader.begin()
+        pool = _pool(workers, state)
+        try:
+            students, faculty, capacities = [], [], []
+            for rows in _map(pool, _gen_users, _ranges(users)):
+                loader.insert("users", rows)
+                for row in rows:
+                    if row[4] == "student":
+                        students.append(row[0])
+                    elif row[4] == "faculty":
+                        faculty.append(row[0])
+            for rows in _map(pool, _gen_courses, _ranges(courses)):
+                loader.insert("courses", rows)
+                capacities.extend(row[4] for row in rows)
+            log(f"  users, courses      {time.perf_counter() - t0:6.1f}s")
+        finally:
+            if pool:
+                pool.close()
+
+        quotas = enrollment_quotas(capacities, enrollments, len(students))
+        # Roughly CHUNK enrollments per task.
+        per_task = max(1, CHUNK * len(quotas) // max(1, enrollments))
+        tasks = [(i, start + 1, quotas[start:start + per_task])
+                 for i, start in enumerate(range(0, len(quotas), per_task))]
+        pool = _pool(workers, {**state, "students": students, "faculty": faculty})
+        try:
+            for enrollment_rows, grade_rows in _map(pool, _gen_enrollments, tasks):
+                loader.insert("enrollments", enrollment_rows)
+                loader.insert("grades", grade_rows)
+            log(f"  enrollments, grades {time.perf_counter() - t0:6.1f}s")
+            for rows in _map(pool, _gen_refresh_tokens, _ranges(refresh_tokens)):
+                loader.insert("refresh_tokens", rows)
+            log(f"  refresh tokens      {time.perf_counter() - t0:6.1f}s")
+        finally:
+            if pool:
+                pool.close()
+        loader.commit()
+    finally:
+        loader.close()
+
+    engine = create_engine(f"sqlite:///{out}")
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine)
+    install_search_index(engine)
+    log(f"  indexes, search     {time.perf_counter() - t0:6.1f}s")
+    with Session(engine) as db:
+        loader.counts["student_summaries"] = student_summary.rebuild(db)
+        db.commit()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    log(f"  summaries, analyze  {time.perf_counter() - t0:6.1f}s")
+    return loader.counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", type=Path, required=True, help="SQLite file to create")
+    parser.add_argument("--force", action="store_true", help="overwrite --out if it exists")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every row count")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--courses", type=int, default=10_000)
+    parser.add_argument("--enrollments", type=int, default=400_000)
+    parser.add_argument("--graded-ratio", type=float, default=0.8, help="share of enrollments with a grade")
+    parser.add_argument("--refresh-tokens", type=int, default=180_000)
+    parser.add_argument("--student-ratio", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default="password", help="password every generated user can log in with")
+    parser.add_argument("--test-only-cheap-hash", action="store_true",
+                        help="per-user argon2 hashes at minimum cost; for load tests only")
+    parser.add_argument("--workers", type=int, default=None, help="generator processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.out.exists():
+        if not args.force:
+            parser.error(f"{args.out} exists; pass --force to overwrite it")
+        args.out.unlink()
+    counts = {k: max(0, round(getattr(args, k) * args.scale))
+              for k in ("users", "courses", "enrollments", "refresh_tokens")}
+    if args.test_only_cheap_hash:
+        print("WARNING: --test-only-cheap-hash stores deliberately weak password hashes; test data only.")
+    print(f"Generating into {args.out} (seed {args.seed})...")
+    t0 = time.perf_counter()
+    try:
+        rows = generate(args.out, counts["users"], counts["courses"], counts["enrollments"], args.graded_ratio,
+                        counts["refresh_tokens"], seed=args.seed, password=args.password,
+                        cheap_hash=args.test_only_cheap_hash, workers=args.workers, student_ratio=args.student_ratio)
+    except ValueError as e:
+        args.out.unlink(missing_ok=True)
+        parser.error(str(e))
+    elapsed = time.perf_counter() - t0
+    total = sum(rows.values())
+    print()
+    for table, n in rows.items():
+        print(f"  {table:<16} {n:>10,}")
+    print(f"  {'total':<16} {total:>10,}  in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    print(f"\nEvery user's password is {args.password!r}.")
+
+
+if __name__ == "__main__":
+    main()
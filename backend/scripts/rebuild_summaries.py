@@ -0,0 +1,45 @@
+r"""Recompute every row of `student_summaries` from `grades`.
+
+Grade uploads keep the summaries current (see `backend/app/student_summary.py`).
+Run this once to backfill a database that has grades from before the table
+existed, and after writing grades around the app (bulk loads, manual SQL).
+The table is replaced in one transaction, so transcripts keep reading the old
+rows until it commits.
+
+Usage:
+    python -m backend.scripts.rebuild_summaries
+    DATABASE_URL=sqlite:///./big.db python -m backend.scripts.rebuild_summaries --batch-size 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[2]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+
+def main(argv=None):
+    from backend.app import student_summary
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batch-size", type=int, default=student_summary.BATCH_SIZE,
+                        help="students per INSERT")
+    args = parser.parse_args(argv)
+
+    from backend.app.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    try:
+        total = student_summary.rebuild(db, batch_size=args.batch_size, log=print)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt {total:,} student summaries in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ r"""Seed script for populating the database with sample data.
 
 This script creates sample users (student, faculty, admin) and a sample course.
 It's designed to work when run directly (python backend\scripts\seed.py) or as
-a module (python -m backend.scripts.seed).
+a module (python -m backend.scripts.seed). For bulk datasets at load-testing
+scale use `generate_data.py` instead.
 
 Usage:
     # From repository root, with venv activated:
@@ -0,0 +1,152 @@
+r"""Stand-in OTLP/HTTP trace collector and trace viewer for local debugging.
+
+`serve` accepts OTLP/JSON on POST /v1/traces (what the backend sends with
+TRACE_EXPORT=otlp) and appends each batch to a file in the same format that
+TRACE_EXPORT=file writes. `show` prints the traces in such a file as indented
+span trees with durations.
+
+Usage:
+    # terminal 1
+    python -m backend.scripts.trace_collector serve --port 4318 --out traces.jsonl
+    # terminal 2
+    TRACE_EXPORT=otlp uvicorn backend.app.main:app
+
+    # then, or directly on a TRACE_EXPORT=file output:
+    python -m backend.scripts.trace_collector show traces.jsonl --slowest 5
+    python -m backend.scripts.trace_collector show traces.jsonl --name "enroll"
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock
+
+
+def _iter_spans(payload):
+    for rs in payload.get("resourceSpans", ()):
+        for ss in rs.get("scopeSpans", ()):
+            yield from ss.get("spans", ())
+
+
+def _attr(value):
+    for v in value.values():
+        return v
+    return None
+
+
+def serve(port: int, out: Path):
+    lock = Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path.rstrip("/") != "/v1/traces":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self.send_error(400, "expected OTLP/JSON")
+                return
+            spans = list(_iter_spans(payload))
+            with lock, out.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+            roots = [s for s in spans if not s.get("parentSpanId")]
+            for s in roots:
+                ms = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+                print(f"{s['traceId'][:8]}  {ms:8.2f} ms  {s['name']}")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    print(f"Collecting OTLP/JSON traces on :{port}/v1/traces into {out}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def _load(path: Path):
+    traces = defaultdict(list)
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                for span in _iter_spans(json.loads(line)):
+                    traces[span["traceId"]].append(span)
+    return traces
+
+
+def _print_tree(spans):
+    by_parent = defaultdict(list)
+    ids = {s["spanId"] for s in spans}
+    for s in spans:
+        parent = s.get("parentSpanId")
+        by_parent[parent if parent in ids else None].append(s)
+    t0 = min(int(s["startTimeUnixNano"]) for s in spans)
+
+    def walk(span, depth):
+        start = (int(span["startTimeUnixNano"]) - t0) / 1e6
+        ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+        attrs = {a["key"]: _attr(a["value"]) for a in span.get("attributes", ())}
+        label = span["name"]
+        if "db.statement" in attrs:
+            label += "  " + " ".join(str(attrs["db.statement"]).split())[:100]
+        status = span.get("status", {})
+        error = f"  ERROR {status.get('message', '')}" if status.get("code") == 2 else ""
+        print(f"{start:9.2f} {ms:9.2f} ms  {'  ' * depth}{label}{error}")
+        for child in sorted(by_parent[span["spanId"]], key=lambda s: int(s["startTimeUnixNano"])):
+            walk(child, depth + 1)
+
+    for root in sorted(by_parent[None], key=lambda s: int(s["startTimeUnixNano"])):
+        walk(root, 0)
+
+
+def show(path: Path, trace_id: str = None, name: str = None, slowest: int = None):
+    traces = _load(path)
+
+    def duration(spans):
+        return max(int(s["endTimeUnixNano"]) for s in spans) - min(int(s["startTimeUnixNano"]) for s in spans)
+
+    selected = []
+    for tid, spans in traces.items():
+        if trace_id and not tid.startswith(trace_id):
+            continue
+        if name and not any(name in s["name"] for s in spans if not s.get("parentSpanId")):
+            continue
+        selected.append((tid, spans))
+    if slowest:
+        selected = sorted(selected, key=lambda t: duration(t[1]), reverse=True)[:slowest]
+    for tid, spans in selected:
+        print(f"trace {tid}  ({len(spans)} spans, {duration(spans) / 1e6:.2f} ms)")
+        print(f"{'start':>9} {'duration':>12}  span")
+        _print_tree(spans)
+        print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve", help="accept OTLP/JSON over HTTP and append to a file")
+    p_serve.add_argument("--port", type=int, default=4318)
+    p_serve.add_argument("--out", type=Path, default=Path("traces.jsonl"))
+    p_show = sub.add_parser("show", help="print span trees from a trace file")
+    p_show.add_argument("file", type=Path)
+    p_show.add_argument("--trace", help="trace id (prefix)")
+    p_show.add_argument("--name", help="only traces whose root span name contains this")
+    p_show.add_argument("--slowest", type=int, help="only the N slowest traces")
+    args = parser.parse_args(argv)
+    if args.cmd == "serve":
+        serve(args.port, args.out)
+    else:
+        show(args.file, args.trace, args.name, args.slowest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
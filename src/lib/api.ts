@@ -43,6 +43,25 @@ export async function apiFetch(path: string, opts: RequestInit = {}, retry = tru
   return res;
 }
 
+// List endpoints return one page (100 rows by default) and put the cursor for the
+// next one in this header; it is absent on the last page.
+const NEXT_CURSOR_HEADER = 'X-Next-Cursor';
+const MAX_PAGE_SIZE = 500;
+
+export async function fetchAllPages<T>(path: string): Promise<T[]> {
+  const items: T[] = [];
+  const sep = path.includes('?') ? '&' : '?';
+  let cursor: string | null = null;
+  do {
+    const query = `limit=${MAX_PAGE_SIZE}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+    const res = await apiFetch(`${path}${sep}${query}`);
+    if (!res.ok) throw new Error(`Failed to fetch ${path}`);
+    items.push(...(await res.json()));
+    cursor = res.headers.get(NEXT_CURSOR_HEADER);
+  } while (cursor);
+  return items;
+}
+
 export async function loginRequest(username: string, password: string) {
   const body = new URLSearchParams();
   body.set('username', username);
@@ -59,4 +78,4 @@ export async function logoutRequest() {
   return fetch(`${BASE_URL}/api/auth/logout`, { method: 'POST', credentials: 'include' });
 }
 
-export default { apiFetch, loginRequest, logoutRequest };
+export default { apiFetch, fetchAllPages, loginRequest, logoutRequest };
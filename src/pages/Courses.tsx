@@ -19,9 +19,7 @@ interface Course {
    GET /api/student/courses
 --------------------------- */
 async function fetchCourses() {
-  const res = await api.apiFetch("/api/student/courses");
-  if (!res.ok) throw new Error("Failed to fetch courses");
-  return res.json();
+  return api.fetchAllPages<Course>("/api/student/courses");
 }
 
 const Courses = () => {
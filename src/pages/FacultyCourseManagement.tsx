@@ -26,11 +26,7 @@ const FacultyCourseManagement = () => {
   const qc = useQueryClient();
   const { data: courses = [], isLoading } = useQuery({
     queryKey: ['courses'], 
-    queryFn: async () => {
-      const res = await api.apiFetch('/api/courses');
-      if (!res.ok) throw new Error('Failed to load courses');
-      return res.json();
-    }
+    queryFn: () => api.fetchAllPages<Course>('/api/courses')
   });
   const [formState, setFormState] = useState<Omit<Course, 'id'>>({
     code: "",
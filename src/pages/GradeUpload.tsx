@@ -1,12 +1,14 @@
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import Layout from "@/components/Layout";
 import { Card, CardHeader, CardTitle, CardDescription, CardContent, CardFooter } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Label } from "@/components/ui/label";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Input } from "@/components/ui/input";
+import { Popover, PopoverContent, PopoverTrigger } from "@/components/ui/popover";
+import { Command, CommandEmpty, CommandInput, CommandItem, CommandList } from "@/components/ui/command";
 import { showSuccess, showError } from "@/utils/toast";
-import { Trash2 } from "lucide-react";
+import { ChevronsUpDown, Trash2 } from "lucide-react";
 import { useQuery } from "@tanstack/react-query";
 import api from '@/lib/api';
 
@@ -31,20 +33,69 @@ interface User {
 let nextId = 0;
 
 async function fetchCourses() {
-  const res = await api.apiFetch('/api/courses');
-  if (!res.ok) throw new Error('Failed to fetch courses');
-  return res.json();
+  return api.fetchAllPages<Course>('/api/courses');
 }
 
-async function fetchUsers() {
-  const res = await api.apiFetch('/api/users');
-  if (!res.ok) throw new Error('Failed to fetch users');
+async function searchStudents(q: string): Promise<User[]> {
+  const res = await api.apiFetch(`/api/users/search?role=student&q=${encodeURIComponent(q)}`);
+  if (!res.ok) throw new Error('Failed to search students');
   return res.json();
 }
 
+// Typeahead over /api/users/search: there are too many students to list them all.
+const StudentPicker = ({ value, onSelect }: { value: string; onSelect: (user: User) => void }) => {
+  const [open, setOpen] = useState(false);
+  const [input, setInput] = useState("");
+  const [query, setQuery] = useState("");
+
+  useEffect(() => {
+    const timer = setTimeout(() => setQuery(input.trim()), 200);
+    return () => clearTimeout(timer);
+  }, [input]);
+
+  const { data: matches = [], isFetching } = useQuery({
+    queryKey: ['student_search', query],
+    queryFn: () => searchStudents(query),
+    enabled: query.length > 0,
+    staleTime: 30_000,
+  });
+
+  return (
+    <Popover open={open} onOpenChange={setOpen}>
+      <PopoverTrigger asChild>
+        <Button variant="outline" role="combobox" type="button" className="w-full justify-between font-normal">
+          {value || "Select student"}
+          <ChevronsUpDown className="ml-2 h-4 w-4 opacity-50" />
+        </Button>
+      </PopoverTrigger>
+      <PopoverContent className="p-0" align="start">
+        <Command shouldFilter={false}>
+          <CommandInput placeholder="Search students..." value={input} onValueChange={setInput} />
+          <CommandList>
+            <CommandEmpty>
+              {!query ? "Type a username to search." : isFetching ? "Searching..." : "No students found."}
+            </CommandEmpty>
+            {matches.map((user) => (
+              <CommandItem
+                key={user.id}
+                value={String(user.id)}
+                onSelect={() => {
+                  onSelect(user);
+                  setOpen(false);
+                }}
+              >
+                {user.username}
+              </CommandItem>
+            ))}
+          </CommandList>
+        </Command>
+      </PopoverContent>
+    </Popover>
+  );
+};
+
 const GradeUpload = () => {
   const { data: courses = [] } = useQuery({ queryKey: ['courses'], queryFn: fetchCourses });
-  const { data: users = [] } = useQuery({ queryKey: ['users'], queryFn: fetchUsers });
 
   const [selectedCourse, setSelectedCourse] = useState<string | undefined>(undefined);
   const [gradeEntries, setGradeEntries] = useState<GradeEntry[]>([
@@ -173,24 +224,10 @@ const GradeUpload = () => {
               {gradeEntries.map((entry) => (
                 <div key={entry.id} className="grid grid-cols-12 gap-4 items-center">
                   <div className="col-span-5">
-                    <Select
-                      value={entry.studentId}
-                      onValueChange={(userId) => {
-                        const user = (users as User[]).find(u => String(u.id) === userId);
-                        if (user) handleStudentSelect(entry.id, user.username, user.id);
-                      }}
-                    >
-                      <SelectTrigger>
-                        <SelectValue placeholder="Select student" />
-                      </SelectTrigger>
-                      <SelectContent>
-                        {(users as User[]).map((user) => (
-                          <SelectItem key={user.id} value={String(user.id)}>
-                            {user.username}
-                          </SelectItem>
-                        ))}
-                      </SelectContent>
-                    </Select>
+                    <StudentPicker
+                      value={entry.studentName}
+                      onSelect={(user) => handleStudentSelect(entry.id, user.username, user.id)}
+                    />
                   </div>
 
                   <div className="col-span-3">
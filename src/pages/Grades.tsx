@@ -34,12 +34,7 @@ const Grades = () => {
         setGrades(gradeData);
 
         // Fetch courses for lookup
-        const resCourses = await api.apiFetch("/api/courses");
-        if (!resCourses.ok) {
-          console.error("Failed to fetch courses list");
-          return;
-        }
-        const courseData: Course[] = await resCourses.json();
+        const courseData = await api.fetchAllPages<Course>("/api/courses");
 
         // Build lookup dictionary
         const lookup: Record<number, Course> = {};